@@ -1,7 +1,6 @@
 # main.py
 import os
 import sys
-import shutil
 from obsidianknittrpy.modules.commandline import (
     commandline_setup,
 )
@@ -15,21 +14,25 @@ from obsidianknittrpy.modules.command_handlers import (
     handle_processingmodule_remove,
     handle_processingmodule_list,
     handle_processingmodule_export,
+    handle_worker,
+    handle_stats,
 )
 from obsidianknittrpy.modules.utility import (
     init_picknick_basket,
     convert_format_args,
     pre_configure_obsidianhtml_fork,
+    collect_rendering_overrides,
 )
 from obsidianknittrpy.modules.core.ResourceLogger import ResourceLogger
 from obsidianknittrpy.modules.core.ConfigurationHandler import ConfigurationHandler
 from obsidianknittrpy.modules.core.ExternalHandler import ExternalHandler
 from obsidianknittrpy.modules.core.CustomModuleHandler import CustomModuleHandler
+from obsidianknittrpy.modules.core.RunWorkspace import RunWorkspace
 import logging
 
 
 def main():
-    RL = ResourceLogger()
+    RL = ResourceLogger.instance()
     parser = commandline_setup()
     args = parser.parse_args()
     if args.command is None:
@@ -59,6 +62,22 @@ def main():
             EH.unset(args["file"], args["key"])
         elif args["action"] == "list":
             EH.list(file=args["file"])
+    elif args.command == "worker":
+        args = convert_format_args(args)
+        logging.basicConfig(level=args["loglevel"])
+        CH = ConfigurationHandler(
+            last_run_path=None, loglevel=args["loglevel"], is_gui=True
+        )
+        CH.apply_defaults()
+        handle_worker(args, CH)
+    elif args.command == "stats":
+        args = convert_format_args(args)
+        logging.basicConfig(level=args["loglevel"])
+        CH = ConfigurationHandler(
+            last_run_path=None, loglevel=args["loglevel"], is_gui=True
+        )
+        CH.apply_defaults()
+        handle_stats(args, CH)
     else:
         # Command handling
         # 1. translate arguments
@@ -71,6 +90,12 @@ def main():
             last_run_path=None, loglevel=args["loglevel"], is_gui=True
         )
         CH.apply_defaults()
+        ResourceLogger.configure(
+            format=CH.get_key("RESOURCE_LOG", "format"),
+            flush_interval=CH.get_key("RESOURCE_LOG", "flush_interval"),
+            max_size_mb=CH.get_key("RESOURCE_LOG", "max_size_mb"),
+            backup_count=CH.get_key("RESOURCE_LOG", "backup_count"),
+        )
         EH = ExternalHandler(
             interface_dir=CH.get_key("DIRECTORIES_PATHS", "interface_dir"),
             loglevel=args["loglevel"],
@@ -86,11 +111,13 @@ def main():
                 CH.load_custom_pipeline(args["custom_pipeline"])
             if args["custom_format_definitions"]:
                 CH.load_custom_format_definitions(args["custom_format_definitions"])
-            # 3. clear out work dir
-            if os.path.exists(CH.get_key("DIRECTORIES_PATHS", "work_dir")):
-                shutil.rmtree(CH.get_key("DIRECTORIES_PATHS", "work_dir"))
-                RL.log("main", "clears", CH.get_key("DIRECTORIES_PATHS", "work_dir"))
-            os.makedirs(CH.get_key("DIRECTORIES_PATHS", "work_dir"))
+            # 3. create a run-scoped work dir, so that parallel invocations do not collide
+            workspace = RunWorkspace(
+                runs_directory=CH.default_runs_location, loglevel=args["loglevel"]
+            )
+            workspace.create()
+            CH.apply_run_workspace(workspace)
+            CH.set_overrides(collect_rendering_overrides(args))
             RL.add_log_location(CH.get_key("DIRECTORIES_PATHS", "work_dir"))
             RL.log("main", "creates", CH.get_key("DIRECTORIES_PATHS", "work_dir"))
             RL.log("main", "creates", RL.log_file)
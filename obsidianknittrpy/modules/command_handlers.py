@@ -8,17 +8,14 @@ from obsidianknittrpy.modules.utility import (
     open_folder,
     open_file,
 )
-from obsidianknittrpy.modules.guis.guis import handle_ot_guis, ObsidianKnittrGUI
-from obsidianknittrpy.modules.obsidian_html.ObsidianHTML_Limiter import (
-    ObsidianHTML_Limiter,
-)
 from obsidianknittrpy.modules.core.ResourceLogger import ResourceLogger
 from obsidianknittrpy.modules.core.ExternalHandler import ExternalHandler
-from obsidianknittrpy.modules.obsidian_html.ObsidianHTML import ObsidianHTML
+from obsidianknittrpy.modules.core.VaultRootResolver import VaultRootResolver
+from obsidianknittrpy.modules.core.TimingHistory import TimingHistory
 from obsidianknittrpy.modules.processing.processing_module_runner import (
     ProcessingPipeline,
 )
-from obsidianknittrpy.modules.rendering.renderer_v2 import RenderManager
+from obsidianknittrpy.modules.utils import yaml_io
 from obsidianknittrpy.modules.utils.file_strings import (
     prepare_file_strings,
     prepare_file_suffixes,
@@ -26,16 +23,50 @@ from obsidianknittrpy.modules.utils.file_strings import (
 import os as os
 import sys as sys
 import logging as logging
-import yaml as yaml
+
+# The GUIs (tkinter), ObsidianHTML and the rendering-modules are imported by the handlers
+# using them, so that light commands (`version`, `tools`, `open`, `stats`) start quickly.
+# See `scripts/check_import_time.py`.
 
 
 def main(pb, CH, loglevel=None, export=False, import_=False, export_path=None):
+    from obsidianknittrpy.modules.obsidian_html.ObsidianHTML import ObsidianHTML
+    from obsidianknittrpy.modules.obsidian_html.ObsidianHTML_Limiter import (
+        ObsidianHTML_Limiter,
+    )
+    from obsidianknittrpy.modules.rendering.renderer_v2 import RenderManager
+    from obsidianknittrpy.modules.rendering.RenderCache import RenderCache
+    from obsidianknittrpy.modules.rendering.RenderBackend import get_render_backend
+    from obsidianknittrpy.modules.rendering.ExecutionCache import ExecutionCache
+    from obsidianknittrpy.modules.rendering.RenderExecutor import RenderExecutor
+    from obsidianknittrpy.modules.rendering.OutputSnapshots import OutputSnapshots
+    from obsidianknittrpy.modules.rendering.RenderScheduler import RenderScheduler
+
     # Level = 0 > manuscript_dir > check
     # Level = -1 > true vault-root > check
     # Level > 0 = manuscript_dir - level
     # obsidian_limiter.add_limiter() # < these must be called before and after oHTML is processed.
     # obsidian_limiter.remove_limiter() # < these must be called before and after oHTML is processed.
-    RL = ResourceLogger(log_directory=CH.get_key("DIRECTORIES_PATHS", "work_dir"))
+    RL = ResourceLogger.instance(
+        log_directory=CH.get_key("DIRECTORIES_PATHS", "work_dir")
+    )
+    vault_root_resolver = VaultRootResolver(
+        cache_path=CH.default_vault_root_cache_location, loglevel=loglevel
+    )
+    vault_root = None
+    manuscript_path = CH.get_key("MANUSCRIPT", "manuscript_path")
+    timing_history = TimingHistory(
+        path=(
+            CH.default_timing_history_location
+            if CH.get_key("TIMINGS", "record")
+            else None
+        ),
+        manuscript=manuscript_path,
+        run_id=CH.run_workspace.run_id,
+        window=CH.get_key("TIMINGS", "window"),
+        max_records=CH.get_key("TIMINGS", "max_records"),
+        loglevel=loglevel,
+    )
     if CH.get_key("OBSIDIAN_HTML", "limit_scope"):
         obsidian_limiter = ObsidianHTML_Limiter(
             manuscript_path=os.path.normpath(
@@ -44,14 +75,26 @@ def main(pb, CH, loglevel=None, export=False, import_=False, export_path=None):
             auto_submit=CH.get_key("GENERAL_CONFIGURATION", "full_submit"),
             level=CH.get_key("OBSIDIAN_HTML_LIMITER", "level"),
             loglevel=loglevel,
+            vault_root_resolver=vault_root_resolver,
+            virtual=CH.get_key("OBSIDIAN_HTML_LIMITER", "virtual") is not False,
+            overlay_directory=os.path.join(CH.run_workspace.work_dir, "vault-overlay"),
         )
         obsidian_limiter.add_limiter()
+        # the limiter's '.obsidian'-folder is transient, so it must not end up in the resolver's cache.
+        vault_root = obsidian_limiter.scope_root
+        manuscript_path = obsidian_limiter.scoped_manuscript_path
         if obsidian_limiter.selected_limiter_is_vaultroot:
             RL.log(
                 action="used vault",
                 module=f"{obsidian_limiter.__module__}.add_limiter",
                 resource=obsidian_limiter.selected_limiter_directory,
             )
+        elif obsidian_limiter.virtual:
+            RL.log(
+                action="created overlay",
+                module=f"{obsidian_limiter.__module__}.add_limiter",
+                resource=obsidian_limiter.overlay_directory,
+            )
         elif not obsidian_limiter.selected_limiter_preexisted:
             RL.log(
                 action="created",
@@ -68,7 +111,8 @@ def main(pb, CH, loglevel=None, export=False, import_=False, export_path=None):
                 f"{obsidian_limiter.__module__} used the directory '{obsidian_limiter.selected_limiter_directory}', but it was flagged as both pre-existing and non-root. This should be impossible."
             )
         pb["objects"]["obsidian_limiter"] = obsidian_limiter
-        CH.applied_settings["OBSIDIAN_HTML_LIMITER"]["level"] = obsidian_limiter.level
+        if CH.get_key("OBSIDIAN_HTML_LIMITER", "level") != "auto":
+            CH.applied_settings["OBSIDIAN_HTML_LIMITER"]["level"] = obsidian_limiter.level
         CH.applied_settings["OBSIDIAN_HTML_LIMITER"][
             "selected_limiter_preexisted"
         ] = obsidian_limiter.selected_limiter_preexisted
@@ -80,8 +124,8 @@ def main(pb, CH, loglevel=None, export=False, import_=False, export_path=None):
         if not import_:
             CH.save_last_run(CH.default_guiconfiguration_location)
         obsidian_html = ObsidianHTML(
-            manuscript_path=CH.get_key("MANUSCRIPT", "manuscript_path"),
-            config_path=CH.default_obsidianhtmlconfiguration_location,
+            manuscript_path=manuscript_path,
+            config_path=CH.run_workspace.obsidianhtml_config_path,
             use_convert=CH.get_key("OBSIDIAN_HTML", "verb") in ["convert", True],
             use_own_fork=CH.get_key("OBSIDIAN_HTML", "use_custom_fork"),
             verbose=CH.get_key("OBSIDIAN_HTML", "verbose_flag"),
@@ -89,10 +133,17 @@ def main(pb, CH, loglevel=None, export=False, import_=False, export_path=None):
             work_dir=CH.get_key("DIRECTORIES_PATHS", "work_dir"),
             # work_dir=r"D:\Dokumente neu\Repositories\python\obsidian-html",
             output_dir=CH.get_key("DIRECTORIES_PATHS", "output_dir"),
+            timeout=CH.get_key("OBSIDIAN_HTML", "timeout"),
+            worker_state_path=CH.default_obsidianhtml_worker_state_location,
+            environment=CH.run_workspace.isolated_environment(),
+            vault_root_resolver=vault_root_resolver,
+            vault_root=vault_root,
         )
         obsidian_html.setup_config(RL)
 
-        obsidian_html.run()
+        RL.begin_stage("obsidianhtml")
+        with timing_history.timed("obsidianhtml"):
+            obsidian_html.run()
         path_ = get_text_file_path(
             obsidian_html.output["output_path"],
         )
@@ -103,17 +154,22 @@ def main(pb, CH, loglevel=None, export=False, import_=False, export_path=None):
         )
     if CH.get_key("OBSIDIAN_HTML", "limit_scope"):
         pb["objects"]["obsidian_limiter"].remove_limiter()
+        limiter_resource = (
+            obsidian_limiter.overlay_directory
+            if obsidian_limiter.virtual
+            else obsidian_limiter.selected_limiter_directory
+        )
         if pb["objects"]["obsidian_limiter"].removed_selected_limiter_directory_success:
             RL.log(
                 action="removed",
                 module=f"{pb["objects"]["obsidian_limiter"].__module__}.remove_limiter",
-                resource=obsidian_limiter.selected_limiter_directory,
+                resource=limiter_resource,
             )
         else:
             RL.log(
                 action="kept",
                 module=f"{pb["objects"]["obsidian_limiter"].__module__}.remove_limiter",
-                resource=obsidian_limiter.selected_limiter_directory,
+                resource=limiter_resource,
             )
     if export:
         CH.export_config(file_path=export_path)
@@ -121,6 +177,7 @@ def main(pb, CH, loglevel=None, export=False, import_=False, export_path=None):
         arguments = {}
         arguments.update(CH.get_key("GENERAL_CONFIGURATION"))
         arguments.update(CH.get_key("OBSIDIAN_HTML"))
+        RL.begin_stage("processing")
         pipeline = ProcessingPipeline(
             config_file=CH.applied_pipeline,
             custom_module_directory=CH.get_key(
@@ -128,10 +185,9 @@ def main(pb, CH, loglevel=None, export=False, import_=False, export_path=None):
             ),
             arguments=arguments,
             debug=True,
-            log_directory=os.path.normpath(
-                os.path.join(CH.get_key("DIRECTORIES_PATHS", "output_dir"), "mod")
-            ),
+            log_directory=os.path.normpath(CH.run_workspace.module_log_directory),
             RL=RL,
+            timing_history=timing_history,
         )
         processed_string = pipeline.run(load_text_file(path_))
         # RL.log(action="read",module=)
@@ -158,6 +214,7 @@ def main(pb, CH, loglevel=None, export=False, import_=False, export_path=None):
         logger__ = logging.getLogger("main")
         if CH.get_key("GENERAL_CONFIGURATION", "render_to_outputs"):
             # if logger__.getEffectiveLevel() <= logging.DEBUG:
+            RL.begin_stage("rendering")
             mod_directory = os.path.normpath(
                 os.path.join(
                     os.path.dirname(
@@ -166,6 +223,33 @@ def main(pb, CH, loglevel=None, export=False, import_=False, export_path=None):
                     "mod",
                 )
             )
+            render_cache = RenderCache(
+                cache_directory=CH.default_render_cache_location,
+                max_size_mb=CH.get_key("RENDERING", "cache_max_size_mb"),
+                bypass=not CH.get_key("RENDERING", "use_cache"),
+                loglevel=loglevel,
+            )
+            scheduler = RenderScheduler(
+                max_concurrency=CH.get_key("RENDERING", "max_concurrency"),
+                capacity=CH.get_key("RENDERING", "capacity"),
+                cost_weights=CH.get_key("RENDERING", "cost_weights"),
+                fail_fast=CH.get_key("RENDERING", "fail_fast"),
+                history=timing_history,
+                loglevel=loglevel,
+            )
+            backend_name = CH.get_key("RENDERING", "backend")
+            backend = get_render_backend(
+                backend_name,
+                loglevel=loglevel,
+                **(
+                    {
+                        "latency": CH.get_key("RENDERING", "fake_latency"),
+                        "output_size": CH.get_key("RENDERING", "fake_output_size"),
+                    }
+                    if backend_name == "fake"
+                    else {}
+                ),
+            )
             renderManager = RenderManager(
                 file_strings=file_strings,
                 custom_file_names=None,
@@ -180,28 +264,107 @@ def main(pb, CH, loglevel=None, export=False, import_=False, export_path=None):
                 ),
                 parameters=CH.get_key("OUTPUT_FORMAT_VALUES"),
                 working_directory=working_directory,
+                run_workspace=CH.run_workspace,
+                render_cache=render_cache,
+                scheduler=scheduler,
+                isolate_formats=CH.get_key("RENDERING", "isolate_formats"),
+                backend=backend,
+                group_formats=CH.get_key("RENDERING", "group_formats"),
+                execution_cache=(
+                    ExecutionCache(
+                        cache_directory=CH.default_execution_cache_location,
+                        manuscript_path=CH.get_key("MANUSCRIPT", "manuscript_path"),
+                        loglevel=loglevel,
+                    )
+                    if CH.get_key("RENDERING", "execution_cache")
+                    else None
+                ),
+                executor=RenderExecutor(
+                    log_directory=CH.run_workspace.render_log_directory,
+                    timeout=CH.get_key("RENDERING", "timeout"),
+                    loglevel=loglevel,
+                ),
+                timing_history=timing_history,
             )
-            renderManager.execute()
-            # and store the output directory in a config-file to be openable afterwards.
             OH = ExternalHandler(
                 interface_dir=CH.get_key("DIRECTORIES_PATHS", "output_dir"),
                 loglevel=loglevel,
             )
-            OH.set(
-                "output-data",
-                "directory",
-                renderManager.output_data["rendered_output_directory"],
-            )
-            OH.set(
-                "output-data",
-                "paths",
-                renderManager.output_data["rendered_output_paths"],
-            )
+            if CH.get_key("GENERAL_CONFIGURATION", "backup_output_before_rendering"):
+                with timing_history.timed("backup"):
+                    snapshot_path = backup_previous_outputs(CH, OH, loglevel)
+                if snapshot_path is not None:
+                    RL.log(
+                        action="backed up",
+                        module=f"{OutputSnapshots.__module__}.snapshot",
+                        resource=snapshot_path,
+                    )
+            renderManager.execute()
+            # and store the output directory in a config-file to be openable afterwards.
+            with OH.batch():
+                OH.set(
+                    "output-data",
+                    "manuscript",
+                    os.path.normcase(
+                        os.path.realpath(CH.get_key("MANUSCRIPT", "manuscript_path"))
+                    ),
+                )
+                OH.set(
+                    "output-data",
+                    "directory",
+                    renderManager.output_data["rendered_output_directory"],
+                )
+                OH.set(
+                    "output-data",
+                    "paths",
+                    renderManager.output_data["rendered_output_paths"],
+                )
             RL.log(
                 action="created",
                 module=f"{OH.__module__}.set",
                 resource=OH._get_filepath("output-data"),
             )
+        for record, median, slowdown in timing_history.regressions(
+            CH.get_key("TIMINGS", "regression_threshold")
+        ):
+            logger__.warning(
+                f"{record["stage"]}{f" '{record["name"]}'" if record["name"] else ""} took {record["duration"]:.2f}s, "
+                f"{slowdown:.0f}% longer than the median of earlier runs ({median:.2f}s)."
+            )
+
+
+def backup_previous_outputs(CH, OH, loglevel=None):
+    """
+    Snapshot the outputs of the previous render of the current manuscript before they are re-rendered.
+
+    The previous outputs are taken from the `output-data` of the last render; nothing is backed up
+    if it rendered a different manuscript.
+
+    :return: Path of the snapshot, or `None` if there was nothing to back up.
+    """
+    from obsidianknittrpy.modules.rendering.OutputSnapshots import OutputSnapshots
+
+    manuscript_path = CH.get_key("MANUSCRIPT", "manuscript_path")
+    try:
+        previous_manuscript = OH.get("output-data", "manuscript")
+        previous_paths = OH.get("output-data", "paths")
+    except (FileNotFoundError, KeyError):
+        return None
+    if previous_manuscript != os.path.normcase(os.path.realpath(manuscript_path)):
+        return None
+    snapshots = OutputSnapshots(
+        backup_directory=CH.default_backup_location,
+        manuscript_path=manuscript_path,
+        keep=CH.get_key("BACKUP", "keep"),
+        max_age_days=CH.get_key("BACKUP", "max_age_days"),
+        loglevel=loglevel,
+    )
+    return snapshots.snapshot(
+        {
+            format_name: [path, os.path.splitext(path)[0] + "_files"]
+            for format_name, path in (previous_paths or {}).items()
+        }
+    )
 
 
 def handle_openlist(args, pb, CH):
@@ -214,10 +377,8 @@ def handle_openlist(args, pb, CH):
         interface_dir=CH.get_key("DIRECTORIES_PATHS", "output_dir"),
         loglevel=args["loglevel"],
     )
-    p = OH._get_filepath("output-data")
-    if os.path.exists(p):
-        with open(p, "r", encoding="utf-8") as f:
-            yml_data = yaml.safe_load(f)
+    yml_data = OH.load("output-data")
+    if yml_data is not None:
         if os.path.exists(yml_data["directory"]):
             logger = logging.getLogger(__name__)
             logger.setLevel(level=args["loglevel"])
@@ -247,11 +408,15 @@ def handle_openlist(args, pb, CH):
 
 def handle_import(args, pb, CH):
     """Import config-file generated by export."""
+    from obsidianknittrpy.modules.guis.guis import handle_ot_guis
+
 
     # CH.load_last_run(
     #     last_run_path=CH.default_guiconfiguration_location
     # )  # must be modified to point to the lastrun-path.
-    RL = ResourceLogger(log_directory=CH.get_key("DIRECTORIES_PATHS", "work_dir"))
+    RL = ResourceLogger.instance(
+        log_directory=CH.get_key("DIRECTORIES_PATHS", "work_dir")
+    )
     RL.log(
         action="loaded",
         module=f"{CH.__module__}.handle_import",
@@ -279,12 +444,16 @@ def handle_import(args, pb, CH):
 
 def handle_gui(args, pb, CH, EH, export=False, import_=False):
     """Execute the GUI command."""
+    from obsidianknittrpy.modules.guis.guis import handle_ot_guis, ObsidianKnittrGUI
+
 
     # setup defaults, load last-run
     CH.load_last_run(
         last_run_path=CH.default_guiconfiguration_location
     )  # must be modified to point to the lastrun-path.
-    RL = ResourceLogger(log_directory=CH.get_key("DIRECTORIES_PATHS", "work_dir"))
+    RL = ResourceLogger.instance(
+        log_directory=CH.get_key("DIRECTORIES_PATHS", "work_dir")
+    )
     RL.log(
         action="loaded",
         module=f"{CH.__module__}.handle_gui",
@@ -411,6 +580,101 @@ def handle_version(args):
     exit(0)
 
 
+def handle_worker(args, CH):
+    """
+    Start, stop or query the warm ObsidianHTML-worker.
+
+    While the worker is running, conversions submitted by 'gui' and 'import'
+    are handled by it instead of launching a new 'obsidianhtml'-process.
+    """
+    from obsidianknittrpy.modules.obsidian_html.ObsidianHTML_Worker import (
+        ObsidianHTML_Worker,
+        ObsidianHTML_WorkerClient,
+        start_worker_detached,
+    )
+
+    logger = logging.getLogger(__name__)
+    logger.setLevel(level=args["loglevel"])
+    state_path = CH.default_obsidianhtml_worker_state_location
+    client = ObsidianHTML_WorkerClient(state_path)
+    if args["worker_action"] == "start":
+        if client.is_running():
+            logger.info("ObsidianHTML-worker is already running.")
+        elif args["foreground"]:
+            ObsidianHTML_Worker(state_path, loglevel=args["loglevel"]).serve()
+        else:
+            pid = start_worker_detached(state_path, loglevel=args["loglevel"])
+            if pid is None:
+                raise RuntimeError(
+                    "ObsidianHTML-worker could not be started. Run 'worker start --foreground' to see why."
+                )
+            logger.info(f"ObsidianHTML-worker started (pid {pid}).")
+    elif args["worker_action"] == "stop":
+        if client.shutdown() is None:
+            logger.info("ObsidianHTML-worker is not running.")
+        else:
+            logger.info("ObsidianHTML-worker stopped.")
+    elif args["worker_action"] == "status":
+        response = client.request({"action": "ping"}, timeout=client.connect_timeout)
+        if response is None:
+            print("ObsidianHTML-worker: not running")
+        else:
+            print(
+                f"ObsidianHTML-worker: running (pid {response["pid"]}, obsidianhtml {response["obsidianhtml_version"]})"
+            )
+
+
+def handle_stats(args, CH):
+    """
+    Show the durations of recent runs from the timing-history, grouped by manuscript.
+
+    Stages whose latest run took more than the threshold longer than the median of
+    their earlier runs are flagged.
+    """
+    threshold = (
+        args["threshold"]
+        if args["threshold"] is not None
+        else CH.get_key("TIMINGS", "regression_threshold")
+    )
+    timing_history = TimingHistory(
+        path=CH.default_timing_history_location,
+        window=CH.get_key("TIMINGS", "window"),
+        max_records=CH.get_key("TIMINGS", "max_records"),
+        loglevel=args["loglevel"],
+    )
+    manuscript = (
+        os.path.normcase(os.path.realpath(args["input"])) if args["input"] else None
+    )
+    trends = timing_history.trends(
+        manuscript=manuscript,
+        stage=args["stage"],
+        runs=args["runs"],
+        threshold=threshold,
+    )
+    if not trends:
+        print(f"No timings recorded in '{CH.default_timing_history_location}'.")
+        return
+    for manuscript_path, rows in trends.items():
+        print(f"\n{manuscript_path}")
+        toolchain = None
+        for row in sorted(
+            rows, key=lambda row: (row["toolchain"] or "", row["stage"], row["name"] or "")
+        ):
+            if row["toolchain"] != toolchain and row["toolchain"] is not None:
+                toolchain = row["toolchain"]
+                print(f"  [{toolchain}]")
+            name = row["stage"] + (f" {row["name"]}" if row["name"] else "")
+            last = " ".join(f"{duration:.2f}" for duration in row["last"])
+            flag = (
+                f"  SLOWER +{row["slowdown"]:.0f}%"
+                if row["slowdown"] is not None
+                else ""
+            )
+            print(
+                f"    {name:<55} {row["runs"]:>4} runs  median {row["median"]:>8.2f}s  last: {last}{flag}"
+            )
+
+
 def handle_processingmodule_add(args, CH, CMH):
     """
     Add a module to the `custom_modules`-subdirectory in the application-directory.
@@ -422,7 +686,9 @@ def handle_processingmodule_remove(args, CH, CMH):
     """
     Remove a module from the `custom_modules`-subdirectory in the application-directory.
     """
-    RL = ResourceLogger(log_directory=CH.get_key("DIRECTORIES_PATHS", "work_dir"))
+    RL = ResourceLogger.instance(
+        log_directory=CH.get_key("DIRECTORIES_PATHS", "work_dir")
+    )
     try:
         removed_module_path = CMH.remove(args["module_name"])
         if removed_module_path is not None:
@@ -459,7 +725,7 @@ def handle_processingmodule_export(args, CH, CMH):
         # export all internal modules
         CMH.logger.info(f"Exporting current pipeline:")
         print("\n")
-        print(yaml.dump(CH.applied_pipeline))
+        print(yaml_io.dump(CH.applied_pipeline))
         print("\n")
         print("\n")
         CMH.logger.info(
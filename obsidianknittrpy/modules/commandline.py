@@ -40,6 +40,7 @@ def commandline_setup():
         """,
     )
     common_arguments(gui_parser)  # Reuse shared arguments for 'gui'
+    rendering_arguments(gui_parser)
     gui_parser_setup(gui_parser)
     # --- 'version' command setup ---
     version_parser = subparsers.add_parser("version", help="Get the version.")
@@ -88,6 +89,7 @@ def commandline_setup():
         For more information, see help on modes 'export' and 'gui'.
         """,
     )
+    rendering_arguments(import_parser)
     import_parser = import_parser_setup(import_parser)
 
     # --- 'extension' command setup ---
@@ -162,6 +164,38 @@ def commandline_setup():
         formatter_class=argparse.RawTextHelpFormatter,
     )
     processingmodule_parser = custommodule_parser_setup(processingmodule_parser)
+
+    # --- 'worker' command setup ---
+    worker_parser = subparsers.add_parser(
+        "worker",
+        help="Manage the warm ObsidianHTML-worker (start, stop, status).",
+        formatter_class=argparse.RawTextHelpFormatter,
+        description="""
+        Manage a long-lived background-process which keeps 'obsidianhtml' imported.
+        While it is running, conversions are submitted to it over a local socket
+        (named pipe on windows) instead of starting a new 'obsidianhtml'-process,
+        which removes the startup-cost of repeated conversions.
+        Custom ObsidianHTML-forks are always run as a separate process.
+        """,
+    )
+    worker_parser_setup(worker_parser)
+
+    # --- 'stats' command setup ---
+    stats_parser = subparsers.add_parser(
+        "stats",
+        help="Show the durations of recent runs and flag regressions.",
+        formatter_class=argparse.RawTextHelpFormatter,
+        description="""
+        Show how long the stages of recent runs took, per manuscript:
+        the ObsidianHTML-conversion, every processing-module, the staging of
+        dependencies and the render of every format.
+
+        A stage is flagged if its latest run took more than the threshold
+        longer than the median of its earlier runs. Durations are recorded
+        separately per toolchain-version (e.g. after updating Quarto).
+        """,
+    )
+    stats_parser_setup(stats_parser)
     return parser
 
 
@@ -228,6 +262,37 @@ Valid Examples:
     # Add more common arguments as needed
 
 
+def rendering_arguments(parser):
+    """Add per-run overrides of the rendering-settings."""
+    rendering_group = parser.add_argument_group("Rendering")
+    rendering_group.add_argument(
+        "--no-render-cache",
+        dest="no_render_cache",
+        action="store_true",
+        help="Re-render every format, even if an identical render is cached. Fresh renders are still cached.",
+    )
+    rendering_group.add_argument(
+        "--max-concurrency",
+        dest="max_concurrency",
+        type=int,
+        default=None,
+        help="Maximum number of formats rendered at the same time when rendering in parallel.",
+    )
+    rendering_group.add_argument(
+        "--fail-fast",
+        dest="fail_fast",
+        action="store_true",
+        help="Cancel formats which have not started rendering yet once one format failed.",
+    )
+    rendering_group.add_argument(
+        "--render-backend",
+        dest="render_backend",
+        choices=["auto", "quarto", "pandoc", "fake"],
+        default=None,
+        help="Engine used to render the formats. 'auto' renders documents without executable chunks via Pandoc and all others via Quarto. 'pandoc' skips Quarto and cannot execute code-chunks; 'fake' renders deterministic stand-in outputs for benchmarking.",
+    )
+
+
 def parser_add_disablers(convert_parser):
     # Disablers
     disablers_group = convert_parser.add_argument_group("Disablers")
@@ -484,6 +549,65 @@ def openlist_parser_setup(openlist_parser):
     return openlist_parser
 
 
+def worker_parser_setup(worker_parser):
+    worker_parser.add_argument(
+        "worker_action",
+        choices=["start", "stop", "status"],
+        help="Start, stop or query the ObsidianHTML-worker.",
+    )
+    worker_parser.add_argument(
+        "--foreground",
+        action="store_true",
+        help="Run the worker in the current process instead of detaching it.",
+    )
+    worker_parser.add_argument(
+        '--loglevel',
+        default='INFO',
+        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
+        help="Set the logging level (default: INFO)",
+    )
+    return worker_parser
+
+
+def stats_parser_setup(stats_parser):
+    stats_parser.add_argument(
+        "-i",
+        "--input",
+        required=False,
+        help="Only show the runs of this manuscript.",
+    )
+    stats_parser.add_argument(
+        "--stage",
+        choices=["obsidianhtml", "module", "dependencies", "backup", "render", "rendering"],
+        default=None,
+        help="Only show this stage.",
+    )
+    stats_parser.add_argument(
+        "--runs",
+        type=int,
+        default=5,
+        help="Number of recent durations shown per stage (default: 5).",
+    )
+    stats_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=None,
+        help="Flag stages whose latest run took this many percent longer than the median of earlier runs (default: TIMINGS.regression_threshold).",
+    )
+    stats_parser.add_argument(
+        '--loglevel',
+        default='INFO',
+        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
+        help="Set the logging level (default: INFO)",
+    )
+    stats_parser.add_argument(
+        "pass_through",
+        nargs="*",
+        help=argparse.SUPPRESS,
+    )
+    return stats_parser
+
+
 def custommodule_parser_setup(custommodule_parser):
     """
     Set up the `custommodule` subparser and its subcommands: `list`, `add`, and `remove`.
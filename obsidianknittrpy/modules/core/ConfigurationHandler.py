@@ -1,12 +1,18 @@
 import yaml
 import os
+import sys
+import copy
+import json
+import hashlib
+import tempfile
 import argparse
-import re as re
 from appdirs import site_config_dir
 from pathlib import Path
 import logging
 from obsidianknittrpy.modules.core.ResourceLogger import ResourceLogger
+from obsidianknittrpy.modules.core.FormatDefinitions import FormatDefinitions
 from obsidianknittrpy.modules.utility import ask_input
+from obsidianknittrpy.modules.utils import yaml_io
 
 
 class ConfigurationHandler:
@@ -45,26 +51,75 @@ class ConfigurationHandler:
                 "obsidian_html-configuration.yml",
             )
         )
+        self.default_obsidianhtml_worker_state_location = os.path.normpath(
+            os.path.join(
+                self.application_directory,
+                "obsidian_html-worker.json",
+            )
+        )
+        self.default_vault_root_cache_location = os.path.normpath(
+            os.path.join(
+                self.application_directory,
+                "vault-roots.yml",
+            )
+        )
+        self.default_render_cache_location = os.path.normpath(
+            os.path.join(
+                self.application_directory,
+                "render-cache",
+            )
+        )
+        self.default_execution_cache_location = os.path.normpath(
+            os.path.join(
+                self.application_directory,
+                "execution-cache",
+            )
+        )
+        self.default_timing_history_location = os.path.normpath(
+            os.path.join(
+                self.application_directory,
+                "timing-history.jsonl",
+            )
+        )
+        self.default_backup_location = os.path.normpath(
+            os.path.join(
+                self.application_directory,
+                "backups",
+            )
+        )
+        self.default_runs_location = os.path.normpath(
+            os.path.join(
+                self.application_directory,
+                "runs",
+            )
+        )
+        self.default_config_snapshot_location = os.path.normpath(
+            os.path.join(
+                self.application_directory,
+                "config-snapshot.json",
+            )
+        )
+        self.run_workspace = None
+        self.overrides = {}
         self.applied_format_definitions_is_custom = False
 
-        self.init_default_settings()  # not exported, not saved
-        ## initialise directories
-        for directory in [
-            self.default_settings["DIRECTORIES_PATHS"]["work_dir"],
-            self.default_settings["DIRECTORIES_PATHS"]["output_dir"],
-            self.default_settings["DIRECTORIES_PATHS"]["interface_dir"],
-            self.default_settings["DIRECTORIES_PATHS"]["custom_module_dir"],
-        ]:
-            if not os.path.exists(directory):
-                os.makedirs(directory, exist_ok=True)
-        self.init_default_pipeline()  # not exported, not saved
-        self.init_default_format_definitions()  # not exported, not saved
         self.file_history = []
-        self.init_file_history()
         self.obsidianhtml_config = []
-        self.init_obsidianhtml_configuration()
         self.default_guiconfiguration = []
-        self.init_guiconfiguration_history()
+        self.init_default_settings()  # not exported, not saved
+        self.init_default_pipeline()  # not exported, not saved
+        self.init_default_format_definitions()  # not exported, not saved
+        if not self.load_config_snapshot():
+            ## initialise directories
+            for directory in self.snapshot_directories():
+                if not os.path.exists(directory):
+                    os.makedirs(directory, exist_ok=True)
+            self.default_pipeline = yaml_io.safe_load(self.default_pipeline_yaml)
+            self.default_formats = self.get_formats(self.default_format_definitions)
+            self.init_file_history()
+            self.init_obsidianhtml_configuration()
+            self.init_guiconfiguration_history()
+            self.save_config_snapshot()
         self.last_run_path = None
         self.is_gui = None
         ## initiate the applied settings instanes by copying over the default settings
@@ -73,12 +128,121 @@ class ConfigurationHandler:
         if is_gui is not None:
             self.is_gui = is_gui
 
+    ### Snapshot
+
+    def snapshot_directories(self):
+        return [
+            self.default_settings["DIRECTORIES_PATHS"]["work_dir"],
+            self.default_settings["DIRECTORIES_PATHS"]["output_dir"],
+            self.default_settings["DIRECTORIES_PATHS"]["interface_dir"],
+            self.default_settings["DIRECTORIES_PATHS"]["custom_module_dir"],
+        ]
+
+    def snapshot_key(self):
+        """
+        Key a config-snapshot is valid for: the hash of the source-files whose output it holds,
+        and the application-directory.
+
+        :return: The key, or `None` if one of the directories or configuration-files created on
+                 initialisation does not exist.
+        """
+        for path in self.snapshot_directories() + [
+            self.default_history_location,
+            self.default_guiconfiguration_location,
+            self.default_obsidianhtmlconfiguration_location,
+        ]:
+            if not os.path.exists(path):
+                return None
+        key = hashlib.sha256(self.application_directory.encode("utf-8"))
+        for source in [__file__, sys.modules[FormatDefinitions.__module__].__file__]:
+            with open(source, "rb") as f:
+                key.update(f.read())
+        return key.hexdigest()
+
+    def load_config_snapshot(self):
+        """
+        Restore the parsed default pipeline and format-definitions from the config-snapshot in the
+        application-directory.
+
+        The snapshot is only used if neither this file nor `FormatDefinitions` changed since it was
+        written, and the directories and configuration-files created on initialisation still exist,
+        so that these need not be created and the defaults need not be parsed again.
+
+        :return: `True` if the snapshot was valid and restored.
+        """
+        try:
+            with open(
+                self.default_config_snapshot_location, "r", encoding="utf-8"
+            ) as f:
+                snapshot = json.load(f)
+            if snapshot["key"] != self.snapshot_key():
+                return False
+            definitions = FormatDefinitions.from_dict(
+                self.default_format_definitions, snapshot["format_definitions"]
+            )
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            self.logger.debug(f"Config-snapshot could not be loaded: {e}")
+            return False
+        self.default_pipeline = snapshot["default_pipeline"]
+        self.default_formats = list(definitions.formats)
+        self.logger.debug(
+            f"Config-snapshot loaded from {self.default_config_snapshot_location}"
+        )
+        return True
+
+    def save_config_snapshot(self):
+        """Write the config-snapshot read by `load_config_snapshot()`."""
+        key = self.snapshot_key()
+        if key is None:
+            return
+        snapshot = {
+            "key": key,
+            "default_pipeline": self.default_pipeline,
+            "format_definitions": FormatDefinitions.load(
+                self.default_format_definitions
+            ).to_dict(),
+        }
+        try:
+            fd, temp_path = tempfile.mkstemp(
+                dir=self.application_directory, suffix=".tmp"
+            )
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f)
+            os.replace(temp_path, self.default_config_snapshot_location)
+        except Exception as e:
+            self.logger.debug(f"Config-snapshot could not be saved: {e}")
+
     def apply_defaults(self):
         """Apply the default settings to the applied settings"""
         self.applied_settings = self.load_default_settings()
         self.applied_pipeline = self.load_default_pipeline()
         self.applied_format_definitions = self.load_default_format_definitions()
 
+    def apply_run_workspace(self, run_workspace=None):
+        """
+        Point the working directory to a run-scoped workspace.
+
+        The workspace is remembered, and re-applied whenever loaded configurations
+        (last-run, imported configs) would otherwise restore a shared working directory.
+        """
+        if run_workspace is not None:
+            self.run_workspace = run_workspace
+        if self.run_workspace is not None:
+            self.applied_settings["DIRECTORIES_PATHS"][
+                "work_dir"
+            ] = self.run_workspace.work_dir
+
+    def set_overrides(self, overrides):
+        """
+        Set per-run settings (e.g. from commandline-flags) which take precedence over the applied settings.
+
+        `overrides` is a dict of `{section: {key: value}}`. Overrides are only visible through `get_key()`,
+        so they survive loading configurations and are never saved into the last-run configuration.
+        """
+        self.overrides = overrides
+
     def init_default_settings(self):
         self.default_settings = {
             "DIRECTORIES_PATHS": {
@@ -102,19 +266,52 @@ class ConfigurationHandler:
                 "use_custom_fork": False,
                 "verbose_flag": False,
                 "limit_scope": False,
+                "timeout": None,  # seconds; `None` disables the timeout
             },
             "GENERAL_CONFIGURATION": {
                 "strip_local_md_links": False,
                 "keep_filename": False,
                 "render_to_outputs": False,
-                "parallelise_rendering": False,
+                "parallelise_rendering": True,
                 "backup_output_before_rendering": False,
                 "full_submit": False,
             },
+            "RENDERING": {
+                "use_cache": True,
+                "cache_max_size_mb": 2048,
+                "max_concurrency": None,  # `None` uses the number of CPUs
+                "capacity": None,  # summed cost of concurrent renders; `None` derives it from CPUs and memory
+                "cost_weights": {"pdf": 3, "docx": 2, "html": 1},
+                "fail_fast": False,
+                "timeout": None,  # seconds a single render may take; or a dict by file-suffix (with an optional 'default')
+                "isolate_formats": True,  # render every format in its own scratch-directory
+                "group_formats": True,  # render formats sharing one document with a single Quarto-invocation
+                "execution_cache": True,  # keep knitr-/Jupyter-chunk-caches across runs; requires `isolate_formats`
+                "backend": "auto",  # one of 'auto' (Pandoc for chunk-free documents), 'quarto', 'pandoc', 'fake'
+                "fake_latency": 1.0,  # seconds per render of the 'fake'-backend; or a dict by file-suffix
+                "fake_output_size": 65536,  # bytes written per render of the 'fake'-backend
+            },
+            "BACKUP": {
+                "keep": 10,  # number of snapshots kept per manuscript by `backup_output_before_rendering`
+                "max_age_days": 30,  # `None` keeps snapshots regardless of their age
+            },
+            "RESOURCE_LOG": {
+                "format": "text",  # 'text' (resource_log.txt) or 'jsonl' (resource_log.jsonl)
+                "flush_interval": 1.0,  # seconds between writes of buffered entries
+                "max_size_mb": 10,  # rotate the log-file once it grows beyond this
+                "backup_count": 3,  # number of rotated log-files kept
+            },
+            "TIMINGS": {
+                "record": True,  # keep the duration of every stage in the timing-history
+                "window": 10,  # number of earlier runs the median is taken over
+                "regression_threshold": 25,  # percent slower than the median which is reported
+                "max_records": 20000,
+            },
             "EXECUTION_DIRECTORIES": {"exec_dir_selection": 1},
             "OUTPUT_TYPE": [],
             "OBSIDIAN_HTML_LIMITER": {
                 "level": -1,
+                "virtual": True,  # mirror the selected directory instead of creating '.obsidian' inside the vault
                 "selected_limiter_is_vaultroot": bool,
                 "selected_limiter_preexisted": bool,
             },
@@ -444,10 +641,12 @@ quarto::pdf
                     os.makedirs(directory, exist_ok=True)
                 if not os.path.exists(self.default_history_location):
                     # Write the file, except if it exists already
-                    with open(
-                        self.default_history_location, 'w', encoding='utf-8'
-                    ) as f:
-                        yaml.dump(self.file_history, f, allow_unicode=True)
+                    yaml_io.write_file(
+                        self.default_history_location,
+                        self.file_history,
+                        safe=False,
+                        allow_unicode=True,
+                    )
                     self.logger.debug(
                         f"File-history saved to {self.default_history_location}"
                     )
@@ -465,10 +664,12 @@ quarto::pdf
                     os.makedirs(directory, exist_ok=True)
                 if not os.path.exists(self.default_guiconfiguration_location):
                     # Write the file, except if it exists already
-                    with open(
-                        self.default_guiconfiguration_location, 'w', encoding='utf-8'
-                    ) as f:
-                        yaml.dump(self.default_guiconfiguration, f, allow_unicode=True)
+                    yaml_io.write_file(
+                        self.default_guiconfiguration_location,
+                        self.default_guiconfiguration,
+                        safe=False,
+                        allow_unicode=True,
+                    )
                     self.logger.debug(
                         f"GUI-Configuration saved to {self.default_guiconfiguration_location}"
                     )
@@ -488,12 +689,12 @@ quarto::pdf
                     os.makedirs(directory, exist_ok=True)
                 if not os.path.exists(self.default_obsidianhtmlconfiguration_location):
                     # Write the file, except if it exists already
-                    with open(
+                    yaml_io.write_file(
                         self.default_obsidianhtmlconfiguration_location,
-                        'w',
-                        encoding='utf-8',
-                    ) as f:
-                        yaml.dump(self.obsidianhtml_config, f, allow_unicode=True)
+                        self.obsidianhtml_config,
+                        safe=False,
+                        allow_unicode=True,
+                    )
                     self.logger.debug(
                         f"ObsidianHTML-Configuration saved to {self.default_obsidianhtmlconfiguration_location}"
                     )
@@ -515,6 +716,8 @@ quarto::pdf
             return self.file_history
 
     def get_key(self, type=str, key=None):
+        if key is not None and key in self.overrides.get(type, {}):
+            return self.overrides[type][key]
         if type != "":
             if type in self.applied_settings:
                 if key != None:
@@ -525,9 +728,11 @@ quarto::pdf
         pass
 
     def get_formats(self, format_definitions_string=str):
-        pattern = r"^(?!\s*;)\S+::\S+"
-        matches = re.findall(pattern, format_definitions_string, re.MULTILINE)
-        return matches
+        if format_definitions_string is getattr(
+            self, "default_format_definitions", None
+        ) and hasattr(self, "default_formats"):
+            return list(self.default_formats)
+        return list(FormatDefinitions.load(format_definitions_string).formats)
 
     ### Loaders
 
@@ -538,8 +743,8 @@ quarto::pdf
 
     def load_default_pipeline(self):
         """Load default pipeline-yaml."""
-        # Initialize with values directly in the class
-        return yaml.safe_load(self.default_pipeline_yaml)
+        # Parsed once on initialisation, or restored from the config-snapshot
+        return copy.deepcopy(self.default_pipeline)
 
     def load_default_format_definitions(self):
         """Load default pipeline-yaml."""
@@ -566,8 +771,7 @@ quarto::pdf
 
         """
         try:
-            with open(custom_config_path, 'r', encoding='utf-8') as f:
-                custom_config = yaml.safe_load(f)
+            custom_config = yaml_io.load_file(custom_config_path)
             allowed_missing_keys = ["OUTPUT_FORMAT_VALUES"] + list(
                 custom_config["OUTPUT_FORMAT_VALUES"].keys()
             )
@@ -577,6 +781,7 @@ quarto::pdf
                 dict_user=custom_config,
                 allowed_missing_keys=allowed_missing_keys,
             )
+            self.apply_run_workspace()
             self.logger.info(f"Configuration merged with {custom_config_path}")
         except FileNotFoundError:
             self.logger.error(
@@ -667,8 +872,7 @@ quarto::pdf
         """Load last run configuration for GUI mode, merging with defaults."""
         if last_run_path is not None:
             try:
-                with open(last_run_path, 'r', encoding='utf-8') as f:
-                    last_run_config = yaml.safe_load(f)
+                last_run_config = yaml_io.load_file(last_run_path)
                 if last_run_config is not None:
                     default_dirs = self.applied_settings["DIRECTORIES_PATHS"]
                     self.applied_settings.update(last_run_config)
@@ -683,8 +887,16 @@ quarto::pdf
                     self.applied_settings["DIRECTORIES_PATHS"]["custom_module_dir"] = (
                         default_dirs["custom_module_dir"]
                     )
+                    # settings introduced after the last-run was saved
+                    for section, values in self.default_settings.items():
+                        if isinstance(values, dict) and isinstance(
+                            self.applied_settings.get(section), dict
+                        ):
+                            for key, value in values.items():
+                                self.applied_settings[section].setdefault(key, value)
+                    self.apply_run_workspace()
                 self.logger.info("Last-Run configuration loaded for GUI mode.")
-                ResourceLogger(
+                ResourceLogger.instance(
                     log_directory=self.get_key("DIRECTORIES_PATHS", "work_dir")
                 ).log(
                     module=f"{self.__module__}.load_last_run",
@@ -700,10 +912,11 @@ quarto::pdf
         """Save the current configuration as the last run configuration."""
         if last_run_path is not None:
             try:
-                with open(last_run_path, 'w', encoding='utf-8') as f:
-                    yaml.dump(self.applied_settings, f, allow_unicode=True)
+                yaml_io.write_file(
+                    last_run_path, self.applied_settings, safe=False, allow_unicode=True
+                )
                 self.logger.info(f"Last-Run configuration saved to {last_run_path}")
-                ResourceLogger(
+                ResourceLogger.instance(
                     log_directory=self.get_key("DIRECTORIES_PATHS", "work_dir")
                 ).log(
                     module=f"{self.__module__}.save_last_run",
@@ -719,14 +932,13 @@ quarto::pdf
         """Load the file-history"""
         if file_history_path is not None:
             try:
-                with open(file_history_path, 'r', encoding='utf-8') as f:
-                    file_history_config = yaml.safe_load(f)
+                file_history_config = yaml_io.load_file(file_history_path)
                 if file_history_config is not None:
                     self.file_history.extend(file_history_config)
                     self.logger.info(
                         f"GUI-mode: File-history-config loaded from '{file_history_path}'."
                     )
-                    ResourceLogger(
+                    ResourceLogger.instance(
                         log_directory=self.get_key("DIRECTORIES_PATHS", "work_dir")
                     ).log(
                         module=f"{self.__module__}.load_file_history",
@@ -742,10 +954,11 @@ quarto::pdf
         """Save the current configuration as the last run configuration."""
         if file_history_path is not None:
             try:
-                with open(file_history_path, 'w', encoding='utf-8') as f:
-                    yaml.dump(self.file_history, f, allow_unicode=True)
+                yaml_io.write_file(
+                    file_history_path, self.file_history, safe=False, allow_unicode=True
+                )
                 self.logger.info(f"File-history-config saved to '{file_history_path}'.")
-                ResourceLogger(
+                ResourceLogger.instance(
                     log_directory=self.get_key("DIRECTORIES_PATHS", "work_dir")
                 ).log(
                     module=f"{self.__module__}.save_file_history",
@@ -764,8 +977,7 @@ quarto::pdf
         """
         if custom_pipeline_path is not None:
             try:
-                with open(custom_pipeline_path, "r", encoding="utf-8") as f:
-                    self.custom_pipeline_yaml = yaml.safe_load(f)
+                self.custom_pipeline_yaml = yaml_io.load_file(custom_pipeline_path)
                 if self.custom_pipeline_yaml is not None:
                     self.applied_pipeline = self.custom_pipeline_yaml
                 else:
@@ -804,7 +1016,7 @@ quarto::pdf
         confirm_overwrite = "n"
         if file_path is None:
             self.logger.info(f"Generated configuration exported below:\n\n\n\n")
-            print(yaml.dump(self.applied_settings))
+            print(yaml_io.dump(self.applied_settings))
             exit(0)
         elif file_path is not None:
             if os.path.exists(file_path):
@@ -816,16 +1028,16 @@ quarto::pdf
                     self.logger.info(
                         f"The contents of the file '{file_path}' remain unchanged. The generated custom configuration is instead shown below:\n\n\n\n"
                     )
-                    print(yaml.dump(self.applied_settings))
+                    print(yaml_io.dump(self.applied_settings))
                 elif confirm_overwrite == "y":  # user chose to overwrite existing file
                     with open(file_path, 'w', encoding='utf-8') as f:
                         if default:
-                            yaml.dump(self.default_settings, f, allow_unicode=True)
+                            yaml_io.dump(self.default_settings, f, allow_unicode=True)
                             self.logger.info(
                                 f"Default Configuration exported to '{file_path}'."
                             )
                         else:
-                            yaml.dump(self.applied_settings, f, allow_unicode=True)
+                            yaml_io.dump(self.applied_settings, f, allow_unicode=True)
                             self.logger.info(
                                 f"Custom Configuration exported to '{file_path}'."
                             )
@@ -833,12 +1045,12 @@ quarto::pdf
             else:  # file does not exist, so no need to ask for overwrite
                 with open(file_path, 'w', encoding='utf-8') as f:
                     if default:
-                        yaml.dump(self.default_settings, f, allow_unicode=True)
+                        yaml_io.dump(self.default_settings, f, allow_unicode=True)
                         self.logger.info(
                             f"Default Configuration exported to '{file_path}'."
                         )
                     else:
-                        yaml.dump(self.applied_settings, f, allow_unicode=True)
+                        yaml_io.dump(self.applied_settings, f, allow_unicode=True)
                         self.logger.info(
                             f"Custom Configuration exported to '{file_path}'."
                         )
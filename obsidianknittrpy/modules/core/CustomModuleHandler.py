@@ -7,10 +7,10 @@ from pathlib import Path
 from obsidianknittrpy.modules.processing.processing_module_runner import BaseModule
 from obsidianknittrpy.modules.utils.dynamic_loader import import_custom_module
 from obsidianknittrpy.modules.utility import ask_input
+from obsidianknittrpy.modules.utils import yaml_io
 import logging
 import pkgutil
 import ast
-import yaml
 
 
 class CustomModuleHandler:
@@ -190,7 +190,7 @@ class CustomModuleHandler:
                                         "enabled": False,
                                         "file_name": Path(file_path).stem,
                                     }
-                                    print(yaml.dump(yaml_struct))
+                                    print(yaml_io.dump(yaml_struct))
                                 except Exception as e:
                                     raise Exception(
                                         f"Error when calling process() on {needle_class}: {e}"
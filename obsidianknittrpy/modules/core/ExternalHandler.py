@@ -1,8 +1,13 @@
 import argparse
 import os
-import yaml
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 import logging
+from obsidianknittrpy.modules.utils import yaml_io
+from obsidianknittrpy.modules.utils.file_lock import file_lock
+
+_UNSET = object()
 
 
 class ExternalHandler:
@@ -11,6 +16,12 @@ class ExternalHandler:
 
     It does _not_ handle the implementation of said dependencies in the
     processing-code within `main()`/`handle_x()`.
+
+    Every configuration-file in the interface-directory is read on first access and kept in
+    memory afterwards. Changes made by `set()` and `unset()` are written immediately, or once at
+    the end of a `batch()`-block. Files are written atomically while holding a lock shared with
+    other processes, and changes are merged into the file's current contents, so parallel runs
+    do not overwrite each other's keys.
     """
 
     def __init__(
@@ -25,54 +36,120 @@ class ExternalHandler:
         )
         self.logger.setLevel(loglevel)
         self.configurable_tools = ["obsidian-html", "R"]
+        self.store = {}  # file -> contents; `None` if the file does not exist
+        self.pending = {}  # file -> {key: value or _UNSET} not yet written
+        self.batch_depth = 0
+        self.lock = threading.RLock()
+        self._file_names = None
 
     def _get_filepath(self, key):
         return os.path.join(self.interface_dir, f"{key}.yml")
 
+    def _get_lockpath(self, key):
+        return os.path.join(self.interface_dir, f".{key}.yml.lock")
+
     def is_path(self, value):
         # Check if value is a string and represents an existing path
         return isinstance(value, str) and (
             os.path.exists(value) or Path(value).exists()
         )
 
+    def files(self):
+        """Names of the configuration-files in the interface-directory."""
+        with self.lock:
+            if self._file_names is None:
+                self._file_names = {
+                    os.path.splitext(entry.name)[0]
+                    for entry in os.scandir(self.interface_dir)
+                    if entry.name.endswith(".yml") and entry.is_file()
+                }
+            return sorted(self._file_names)
+
+    def load(self, file):
+        """Return the contents of a configuration-file, or `None` if it does not exist."""
+        with self.lock:
+            if file not in self.store:
+                try:
+                    self.store[file] = yaml_io.load_file(self._get_filepath(file)) or {}
+                except FileNotFoundError:
+                    self.store[file] = None
+            return self.store[file]
+
+    @contextmanager
+    def batch(self):
+        """Collect the `set()`s and `unset()`s of the `with`-block, and write every file once at its end."""
+        with self.lock:
+            self.batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self.lock:
+                self.batch_depth -= 1
+                if self.batch_depth == 0:
+                    self.flush()
+
+    def flush(self):
+        """Write the pending changes of every file."""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            for file, changes in pending.items():
+                filepath = self._get_filepath(file)
+                with file_lock(self._get_lockpath(file)):
+                    try:
+                        data = yaml_io.load_file(filepath) or {}
+                    except FileNotFoundError:
+                        data = {}
+                    for key, value in changes.items():
+                        if value is _UNSET:
+                            data.pop(key, None)
+                        else:
+                            data[key] = value
+                    if data:
+                        yaml_io.write_file(filepath, data, safe=False)
+                    elif os.path.exists(filepath):
+                        os.remove(filepath)
+                        yaml_io.invalidate(filepath)
+                        self.logger.warning(f"Removed '{file}'.")
+                self.store[file] = data if data else None
+                if self._file_names is not None:
+                    if data:
+                        self._file_names.add(file)
+                    else:
+                        self._file_names.discard(file)
+
     def set(self, file, key, value):
         """Sets the path for a given key."""
-
-        filepath = self._get_filepath(file)
-        if not os.path.exists(filepath):  # create file if not existent
-            with open(filepath, "w", encoding="utf-8") as f:
-                yaml.dump({}, f)
-        with open(filepath, "r", encoding="utf-8") as f:
-            data = yaml.safe_load(f)
-        data[key] = value
-        with open(filepath, "w", encoding="utf-8") as f:
-            yaml.dump(data, f)
+        with self.lock:
+            data = self.load(file)
+            if data is None:
+                data = self.store[file] = {}
+            data[key] = value
+            self.pending.setdefault(file, {})[key] = value
+            if self.batch_depth == 0:
+                self.flush()
         self.logger.info(f"Set '{file}.{key}' to '{value}'.")
 
     def unset(self, file, key):
         """Removes the configuration for a given key."""
-        filepath = self._get_filepath(file)
-        if os.path.exists(filepath):
-            with open(filepath, "r", encoding="utf-8") as f:
-                data_ = yaml.safe_load(f)  # get the data
-                data_.pop(key, None)
-            with open(filepath, "w", encoding="utf-8") as f:
-                yaml.dump(data_, f)
+        with self.lock:
+            data = self.load(file)
+            if data is None:
+                raise FileNotFoundError(
+                    f"File '{self._get_filepath(file)}' does not exist."
+                )
+            data.pop(key, None)
+            self.pending.setdefault(file, {})[key] = _UNSET
             self.logger.info(f"Removed '{file}.{key}'.")
-            if len(data_) == 0:
-                os.remove(filepath)
-                self.logger.warning(f"Removed '{file}'.")
-        else:
-            raise FileNotFoundError(f"File '{filepath}' does not exist.")
+            if self.batch_depth == 0:
+                self.flush()
 
     def list(self, file=None, return_type=None):
         """Lists all tools, their configured keys, as well as unconfigured and unrecognised tools."""
         if file is not None:
             # Handle case where a specific file is set
             filepath = self._get_filepath(file)
-            if os.path.exists(filepath):
-                with open(filepath, encoding="utf-8") as f:
-                    data = yaml.safe_load(f) or {}
+            data = self.load(file)
+            if data is not None:
                 print(f"Configuration for '{file}':")
                 for key, value in data.items():
                     print(f"    {key}: {value}")
@@ -91,18 +168,12 @@ class ExternalHandler:
         unrecognised_tools = set()
 
         # Iterate through all YAML files in the directory
-        for filename in os.listdir(self.interface_dir):
-            if filename.endswith(".yml"):
-                tool = os.path.splitext(filename)[0]
-                filepath = os.path.join(self.interface_dir, filename)
-                with open(filepath, encoding="utf-8") as f:
-                    data = yaml.safe_load(f) or {}
-
-                if tool in self.configurable_tools:
-                    unset_tools.discard(tool)
-                    set_tools[tool] = data
-                else:
-                    unrecognised_tools.add(tool)
+        for tool in self.files():
+            if tool in self.configurable_tools:
+                unset_tools.discard(tool)
+                set_tools[tool] = self.load(tool) or {}
+            else:
+                unrecognised_tools.add(tool)
         if return_type is None:
             # Print Set tools
             print("Set tools:")
@@ -135,14 +206,13 @@ class ExternalHandler:
     def get(self, file, key):
         """Gets the value for a specific key in a specific configuration-file."""
         filepath = self._get_filepath(file)
-        if os.path.exists(filepath):
-            with open(filepath, "r", encoding="utf-8") as f:
-                data_ = yaml.safe_load(f)  # get the data
-                if key in data_:
-                    return data_[key]
-                else:
-                    raise KeyError(
-                        f"Key '{key}' not present in handled configuration-file {filepath}"
-                    )
+        data_ = self.load(file)
+        if data_ is not None:
+            if key in data_:
+                return data_[key]
+            else:
+                raise KeyError(
+                    f"Key '{key}' not present in handled configuration-file {filepath}"
+                )
         else:
             raise FileNotFoundError(f"File '{filepath}' does not exist.")
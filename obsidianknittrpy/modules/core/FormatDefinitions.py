@@ -0,0 +1,177 @@
+import os
+import re
+import hashlib
+import threading
+
+
+class FormatDefinitions:
+    """
+    Index of the format-definitions, mapping every format to the specs of its arguments.
+
+    The definitions (see `ConfigurationHandler.init_default_format_definitions()`) consist of
+    sections, each starting with a non-indented format-name (e.g. `quarto::html`) followed by
+    its indented, pipe-delimited argument-definitions up to the next empty line:
+
+    ```
+    quarto::html
+    	number-depth:edit|Type:Integer|Default:3|String:"..."|Max:99|Min:1
+    	toc:checkbox|Type:boolean|Default:1|String:"..."
+    ```
+
+    All sections are parsed in a single pass. Indices are cached for the whole process by the
+    hash of the definitions' text, so `ConfigurationHandler.get_formats()`, `handle_ot_guis()`
+    and every `OT` share one parse; definition-files are additionally only re-read if their
+    modification-time or size changed.
+    """
+
+    format_pattern = re.compile(r"^(?!\s*;)\S+::\S+")
+    key_value_pattern = re.compile(r"(?P<Key>[-\w]+):(?P<Val>.*)")
+
+    _cache = {}  # text-hash -> FormatDefinitions
+    _files = {}  # path -> ((mtime, size), text-hash)
+    _lock = threading.Lock()
+
+    def __init__(self, text):
+        self.text = text
+        self.digest = self.hash(text)
+        self.formats = []  # format-names, as returned by `get_formats()`
+        self.sections = {}  # section-name -> spec; `None` if the section is empty
+        self.parse()
+
+    @staticmethod
+    def hash(text):
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def load(cls, definitions):
+        """
+        Return the index of `definitions`, parsing them only if they were not parsed before.
+
+        :param definitions: The format-definitions, or the path of a file containing them.
+        """
+        if isinstance(definitions, cls):
+            return definitions
+        if "\n" not in definitions and os.path.isfile(definitions):
+            return cls.load_file(definitions)
+        digest = cls.hash(definitions)
+        with cls._lock:
+            index = cls._cache.get(digest)
+        if index is None:
+            index = cls(definitions)
+            with cls._lock:
+                index = cls._cache.setdefault(digest, index)
+        return index
+
+    @classmethod
+    def load_file(cls, path):
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with cls._lock:
+            cached = cls._files.get(path)
+            if cached is not None and cached[0] == signature:
+                index = cls._cache.get(cached[1])
+                if index is not None:
+                    return index
+        with open(path, "r") as f:
+            index = cls.load(f.read())
+        with cls._lock:
+            cls._files[path] = (signature, index.digest)
+        return index
+
+    @classmethod
+    def from_dict(cls, text, data):
+        """
+        Rebuild the index of `text` from the output of `to_dict()` without parsing `text` again.
+
+        :raises ValueError: If `data` was not created from `text`.
+        """
+        digest = cls.hash(text)
+        if data["digest"] != digest:
+            raise ValueError("Format-definitions do not match their index.")
+        index = cls.__new__(cls)
+        index.text = text
+        index.digest = digest
+        index.formats = list(data["formats"])
+        index.sections = dict(data["sections"])
+        with cls._lock:
+            return cls._cache.setdefault(digest, index)
+
+    def to_dict(self):
+        """Return the index as plain data, e.g. for storing it as JSON."""
+        return {
+            "digest": self.digest,
+            "formats": self.formats,
+            "sections": self.sections,
+        }
+
+    def __contains__(self, format):
+        return format in self.sections
+
+    def get(self, format):
+        """
+        Return the spec of a section as a dict with
+
+        - `arguments`: dict mapping every argument (sorted by name) to a dict of its properties, starting with its `Control`
+        - `attributes`: dict of the `renderingpackage`-metadata
+
+        or `None` if the section is empty.
+
+        :raises KeyError: If the section is not defined.
+        """
+        return self.sections[format]
+
+    def parse(self):
+        section = None
+        lines = []
+        for line in self.text.split("\n") + [""]:
+            match = self.format_pattern.match(line)
+            if match:
+                self.formats.append(match.group(0))
+            if section is None:
+                if line.strip() and not line[0].isspace() and not line.startswith(";"):
+                    section = line.strip()
+                    lines = []
+            elif line == "":
+                if section not in self.sections:  # the first definition takes precedence
+                    self.sections[section] = self.parse_section(lines)
+                section = None
+            else:
+                lines.append(line)
+
+    def parse_section(self, lines):
+        if not lines:
+            return None
+        arguments = {}
+        attributes = {}
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith(";"):  # Skip comments and empty lines
+                continue
+            # Check if the line defines a rendering package - this is metadata
+            if "renderingpackage" in line:
+                key = line.split(":")[0]
+                for kv in line.split("|"):
+                    if kv.count("Value:"):
+                        attributes[key] = kv.split("Value:")[1]
+                continue
+            # Split the line by the pipe character to extract key-value pairs
+            current_param = None
+            for kv in line.split("|"):
+                key, value = self.parse_key_value(kv)
+                if key and value:
+                    if current_param is None:
+                        current_param = key
+                        arguments[current_param] = {"Control": value}
+                    else:
+                        arguments[current_param][key] = value
+        return {
+            "arguments": {key: arguments[key] for key in sorted(arguments)},
+            "attributes": attributes,
+        }
+
+    def parse_key_value(self, kv):
+        """Parse a key-value pair from the string."""
+        match = self.key_value_pattern.match(kv.strip())
+        if match:
+            return match.group("Key"), match.group("Val").strip()
+        return None, None
@@ -1,5 +1,58 @@
 import os
+import json
+import time
+import atexit
+import logging
 import datetime
+import threading
+
+
+class _LogWriter:
+    """Buffers the lines of a single log-file, and appends them to it in one write."""
+
+    def __init__(self, path, max_bytes=None, backup_count=0):
+        self.path = path
+        self.format = "jsonl" if path.endswith(".jsonl") else "text"
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.lines = []
+        self.lock = threading.Lock()
+
+    def write(self, line):
+        """Buffer `line` and return the number of buffered lines."""
+        with self.lock:
+            self.lines.append(line)
+            return len(self.lines)
+
+    def flush(self):
+        with self.lock:
+            if not self.lines:
+                return
+            data = "".join(self.lines)
+            self.lines = []
+            try:
+                if (
+                    self.max_bytes
+                    and os.path.exists(self.path)
+                    and os.path.getsize(self.path) + len(data) > self.max_bytes
+                ):
+                    self.rotate()
+                with open(self.path, "a", encoding="utf-8") as log:
+                    log.write(data)
+            except OSError as e:
+                logging.getLogger(__name__).warning(
+                    f"Resource-log '{self.path}' could not be written: {e}"
+                )
+
+    def rotate(self):
+        """Move `<log>` to `<log>.1`, `<log>.1` to `<log>.2`, ..., dropping the oldest."""
+        if self.backup_count <= 0:
+            os.remove(self.path)
+            return
+        for index in range(self.backup_count - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{index}"):
+                os.replace(f"{self.path}.{index}", f"{self.path}.{index + 1}")
+        os.replace(self.path, f"{self.path}.1")
 
 
 class ResourceLogger:
@@ -20,6 +73,14 @@ class ResourceLogger:
 
     ```
 
+    With `configure(format="jsonl")`, entries are instead written to `resource_log.jsonl` as JSON-lines,
+    which additionally carry the seconds since the process started (`monotonic`), the ID of the
+    current stage (see `begin_stage()`) and the logging thread:
+
+    ```
+    {"time": "2025-01-21T19:47:59.142734", "monotonic": 0.412, "stage": "2:processing", "thread": "MainThread", "module": "main", "action": "inits", "resource": "default config"}
+    ```
+
     Note that its implementation is not absolute and still a work-in-progress.
 
     # Workflow:
@@ -27,14 +88,81 @@ class ResourceLogger:
     - the main invoked method `.log()` records a module, its action, and the resource it modified.
     - if actions must be logged before the log-file could be written to disk, they get cached until the file can be written to disk.
       In that case, use `.add_log_location()` to add a log-file's path after the class has been instantiated and cached logging has already occured.
+
+    # Buffering
+
+    Instances are light-weight views: all instances logging to the same file share a single
+    buffered, thread-safe writer for the whole process, and entries cached before any log-file
+    was known are written to the first one set. Use `ResourceLogger.instance()` to get the
+    process-wide logger. Buffered entries are written every `flush_interval` seconds, once
+    `buffer_size` entries are pending, and when the process exits. A log-file growing beyond
+    `max_bytes` is rotated, keeping `backup_count` old files.
     """
 
+    file_names = {"text": "resource_log.txt", "jsonl": "resource_log.jsonl"}
+    format = "text"
+    flush_interval = 1.0  # seconds
+    buffer_size = 256  # entries
+    max_bytes = 10 * 1024 * 1024
+    backup_count = 3
+
+    _instance = None
+    _writers = {}
+    _pending = []
+    _lock = threading.RLock()
+    _flusher = None
+    _stage_counter = 0
+    _stage = None
+    _start_time = time.monotonic()
+
     def __init__(self, log_directory=None):
         """Set up class structure"""
-        self.logs_pre_logfile_existance = []
-        self.log_file = None
+        self._log_file = None
+        if log_directory is not None:
+            self.add_log_location(log_directory)
+
+    @classmethod
+    def instance(cls, log_directory=None):
+        """Return the process-wide logger, pointing it to `log_directory` if given."""
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
         if log_directory is not None:
-            self.log_file = os.path.join(log_directory, "resource_log.txt")
+            cls._instance.add_log_location(log_directory)
+        return cls._instance
+
+    @classmethod
+    def configure(
+        cls, format=None, flush_interval=None, max_size_mb=None, backup_count=None
+    ):
+        """Set the format and the buffering- and rotation-policy of all log-files opened afterwards."""
+        if format is not None:
+            if format not in cls.file_names:
+                raise ValueError(
+                    f"Invalid resource-log format '{format}', must be one of {list(cls.file_names)}."
+                )
+            cls.format = format
+        if flush_interval is not None:
+            cls.flush_interval = flush_interval
+        if max_size_mb is not None:
+            cls.max_bytes = int(max_size_mb * 1024 * 1024)
+        if backup_count is not None:
+            cls.backup_count = backup_count
+
+    @property
+    def log_file(self):
+        return self._log_file
+
+    @log_file.setter
+    def log_file(self, log_file):
+        self._log_file = log_file
+        if log_file is None:
+            return
+        with ResourceLogger._lock:
+            pending, ResourceLogger._pending = ResourceLogger._pending, []
+        writer = self._writer()
+        for entry in pending:
+            writer.write(self.format_entry(entry, writer.format))
 
     def add_log_location(self, log_directory=None):
         """
@@ -42,20 +170,91 @@ class ResourceLogger:
         This method will then write currently-cached logs to disk, and all subsequent logs will occur normally.
         """
         if log_directory is not None:
-            self.log_file = os.path.join(log_directory, "resource_log.txt")
+            self.log_file = os.path.join(log_directory, self.file_names[self.format])
+
+    def _writer(self):
+        key = os.path.normcase(os.path.abspath(self._log_file))
+        with ResourceLogger._lock:
+            writer = ResourceLogger._writers.get(key)
+            if writer is None:
+                writer = ResourceLogger._writers[key] = _LogWriter(
+                    self._log_file, self.max_bytes, self.backup_count
+                )
+            return writer
 
-    def log(self, module, action, resource):
+    @staticmethod
+    def format_entry(entry, format):
+        if format == "jsonl":
+            return json.dumps(entry, ensure_ascii=False) + "\n"
+        return f"[{entry["time"]}] {entry["module"].ljust(100)} {entry["action"].ljust(30)} {entry["resource"]}\n"
+
+    @classmethod
+    def begin_stage(cls, name):
+        """
+        Tag the entries logged from now on, by any thread, with a new stage-ID.
+
+        :return: The stage-ID, e.g. `3:rendering`.
+        """
+        with cls._lock:
+            cls._stage_counter += 1
+            cls._stage = f"{cls._stage_counter}:{name}"
+            return cls._stage
+
+    def log(self, module, action, resource, stage=None):
         """Logs an action with a timestamp to the class-instance's log-file."""
-        timestamp = datetime.datetime.now().isoformat()
-        log_entry = f"[{timestamp}] {module.ljust(100)} {action.ljust(30)} {resource}\n"
-        if self.log_file is not None:
-            with open(self.log_file, "a", encoding="utf-8") as log:
-                if len(self.logs_pre_logfile_existance) > 0:
-                    for each_log_entry in self.logs_pre_logfile_existance:
-                        log.write(each_log_entry)
-                    self.logs_pre_logfile_existance = []
-                    log.write(log_entry)
-                else:
-                    log.write(log_entry)
-        else:
-            self.logs_pre_logfile_existance.append(log_entry)
+        entry = {
+            "time": datetime.datetime.now().isoformat(),
+            "monotonic": round(time.monotonic() - self._start_time, 6),
+            "stage": stage if stage is not None else ResourceLogger._stage,
+            "thread": threading.current_thread().name,
+            "module": module,
+            "action": action,
+            "resource": str(resource),
+        }
+        if self._log_file is None:
+            with ResourceLogger._lock:
+                ResourceLogger._pending.append(entry)
+            return
+        writer = self._writer()
+        if writer.write(self.format_entry(entry, writer.format)) >= self.buffer_size:
+            writer.flush()
+        self._start_flusher()
+
+    @classmethod
+    def flush(cls):
+        """Write the buffered entries of all log-files."""
+        with cls._lock:
+            writers = list(cls._writers.values())
+        for writer in writers:
+            writer.flush()
+
+    @classmethod
+    def _start_flusher(cls):
+        if cls._flusher is not None:
+            return
+        with cls._lock:
+            if cls._flusher is not None:
+                return
+            cls._flusher = threading.Thread(
+                target=cls._flush_periodically, name=cls.__qualname__, daemon=True
+            )
+            cls._flusher.start()
+            atexit.register(cls.flush)
+
+    @classmethod
+    def _flush_periodically(cls):
+        while True:
+            time.sleep(cls.flush_interval)
+            cls.flush()
+
+    @classmethod
+    def _after_fork(cls):
+        # the parent writes its own buffers; the flusher-thread does not exist in the child
+        cls._lock = threading.RLock()
+        cls._writers = {}
+        cls._pending = []
+        cls._flusher = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=ResourceLogger._after_fork)
@@ -0,0 +1,132 @@
+import os
+import sys
+import time
+import uuid
+import shutil
+import datetime
+import logging
+
+
+class RunWorkspace:
+    """
+    Run-scoped working-directory, so that multiple invocations can run side by side.
+
+    Every invocation which converts a manuscript gets its own directory below the
+    `runs`-directory in the application-directory. All files which previously lived at
+    fixed locations are placed in there instead:
+
+    - the working directory (ObsidianHTML-output, rendering-configs, resource-log)
+    - the ObsidianHTML-configuration
+    - the module-logs of the processing-pipeline (`mod/`)
+    - the logs of the render-commands (`render-logs/`)
+
+    Additionally, `temp_file_name()` provides run-unique names for files that must be
+    written outside of the workspace, e.g. into the vault when rendering from the
+    source-note's directory. Stable names are used where caches depend on the file-name
+    and the file is written into a run-private directory.
+
+    # Naming
+
+    Run-IDs are composed of timestamp, process-id and a random suffix:
+
+    ```
+    20250121T194759-12345-1a2b3c4d
+    ```
+
+    They are unique without any coordination between processes, so no lock-file is
+    required. Workspaces of earlier runs are removed once they are older than
+    `retention_hours` and their process is no longer alive.
+    """
+
+    def __init__(self, runs_directory, run_id=None, retention_hours=24, loglevel=None):
+        self.logger = logging.getLogger(
+            self.__class__.__module__ + "." + self.__class__.__qualname__
+        )
+        self.logger.setLevel(loglevel)
+        self.runs_directory = os.path.normpath(runs_directory)
+        self.run_id = run_id if run_id else self.new_run_id()
+        self.retention_hours = retention_hours
+        self.work_dir = os.path.join(self.runs_directory, self.run_id)
+        self.obsidianhtml_config_path = os.path.join(
+            self.work_dir, "obsidian_html-configuration.yml"
+        )
+        self.module_log_directory = os.path.join(self.work_dir, "mod")
+        self.render_log_directory = os.path.join(self.work_dir, "render-logs")
+        self.obsidianhtml_appdir = os.path.join(self.work_dir, "obsidianhtml-appdir")
+
+    @staticmethod
+    def new_run_id():
+        """Create a collision-free run-ID without coordinating with other processes."""
+        timestamp = datetime.datetime.now().strftime("%Y%m%dT%H%M%S")
+        return f"{timestamp}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+    def create(self):
+        """Create the workspace and prune stale workspaces of earlier runs."""
+        os.makedirs(self.runs_directory, exist_ok=True)
+        self.prune_stale()
+        os.makedirs(self.work_dir)  # must not exist yet; run-IDs are unique
+        self.logger.debug(f"Created run-workspace '{self.work_dir}'.")
+        return self.work_dir
+
+    def temp_file_name(self, format_name, suffix="qmd", stable=False):
+        """
+        Return a file-name for a format's temporary file.
+
+        :param stable: Return the same name in every run. Only use this for files written into run-private directories.
+        """
+        if stable:
+            return f"temp_{format_name.replace('::', '_')}.{suffix}"
+        return f"temp_{format_name.replace('::', '_')}_{self.run_id}.{suffix}"
+
+    def prune_stale(self):
+        """Remove workspaces older than `retention_hours` whose process has exited."""
+        if self.retention_hours is None:
+            return []
+        cutoff = time.time() - self.retention_hours * 3600
+        removed = []
+        for entry in os.scandir(self.runs_directory):
+            if not entry.is_dir() or entry.name == self.run_id:
+                continue
+            try:
+                if entry.stat().st_mtime > cutoff:
+                    continue
+            except FileNotFoundError:
+                continue  # removed concurrently by another run
+            if self._owner_is_alive(entry.name):
+                continue
+            shutil.rmtree(entry.path, ignore_errors=True)
+            removed.append(entry.path)
+            self.logger.debug(f"Removed stale run-workspace '{entry.path}'.")
+        return removed
+
+    @staticmethod
+    def _owner_is_alive(run_id):
+        """Check if the process which created the workspace `run_id` is still running."""
+        parts = run_id.split("-")
+        if len(parts) != 3 or not parts[1].isdigit():
+            return False
+        pid = int(parts[1])
+        if pid == os.getpid():
+            return True
+        if sys.platform == "win32":
+            return False  # rely on the workspace's age
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def isolated_environment(self, env=None):
+        """
+        Return a copy of `env` in which ObsidianHTML keeps its temporary vault-copy inside
+        this workspace instead of its shared application-directory.
+
+        ObsidianHTML resolves that directory via `appdirs`, which only honours environment
+        variables on XDG-platforms. On windows and macOS, the environment is returned unchanged.
+        """
+        env = dict(os.environ if env is None else env)
+        if sys.platform not in ["win32", "darwin"]:
+            env["XDG_CONFIG_HOME"] = self.obsidianhtml_appdir
+        return env
@@ -0,0 +1,228 @@
+import os
+import json
+import time
+import datetime
+import logging
+import tempfile
+import threading
+import statistics
+from contextlib import contextmanager
+
+
+class TimingHistory:
+    """
+    Persisted durations of the stages of every run, used to spot regressions and to order render-jobs.
+
+    # Storage
+
+    Records are appended as JSON-lines to a file in the application-directory, one line per
+    timed stage:
+
+    ```
+    {"run": "20250121T194759-12345-1a2b3c4d", "time": "2025-01-21T19:48:03", "manuscript": "<path>", "stage": "render", "name": "quarto::pdf", "toolchain": "quarto 1.6.39", "duration": 4.21}
+    ```
+
+    Stages are `obsidianhtml`, `module` (one record per processing-module), `dependencies`,
+    `backup`, `render` (one record per format) and `rendering` (the whole rendering-pipeline). Records
+    are keyed by manuscript, stage, name and toolchain-version, so updating Quarto starts a new
+    series instead of being reported as a regression.
+
+    Appending a single line is safe across concurrent runs. The file is only read once a query
+    requires it, and compacted to the newest `max_records` records when it grows beyond that.
+
+    # Regressions
+
+    A stage regressed if it took more than `threshold` percent longer than the median of its
+    last `window` durations in earlier runs. Differences below `noise_floor` seconds are ignored.
+    """
+
+    noise_floor = 0.05
+
+    def __init__(
+        self,
+        path=None,
+        manuscript=None,
+        run_id=None,
+        window=10,
+        max_records=20000,
+        loglevel=None,
+    ):
+        self.logger = logging.getLogger(
+            self.__class__.__module__ + "." + self.__class__.__qualname__
+        )
+        self.logger.setLevel(loglevel)
+        self.path = path
+        self.manuscript = (
+            os.path.normcase(os.path.realpath(manuscript)) if manuscript else None
+        )
+        self.run_id = run_id
+        self.window = window
+        self.max_records = max_records
+        self.lock = threading.Lock()
+        self._records = None
+        self.run_records = []
+
+    @property
+    def records(self):
+        """All records, oldest first. Loaded on first access."""
+        with self.lock:
+            if self._records is None:
+                self._records = self.load()
+            return self._records
+
+    def load(self):
+        records = []
+        if self.path is None or not os.path.exists(self.path):
+            return records
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue  # truncated by an interrupted run
+        except OSError as e:
+            self.logger.warning(f"Timing-history '{self.path}' could not be read: {e}")
+            return []
+        if len(records) > self.max_records:
+            records = records[-self.max_records :]
+            self.compact(records)
+        return records
+
+    def compact(self, records):
+        directory = os.path.dirname(self.path)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+        os.replace(temp_path, self.path)
+        self.logger.debug(f"Compacted timing-history to {len(records)} records.")
+
+    def record(self, stage, duration, name=None, toolchain=None):
+        """Store the `duration` (seconds) of a stage of the current run."""
+        entry = {
+            "run": self.run_id,
+            "time": datetime.datetime.now().isoformat(timespec="seconds"),
+            "manuscript": self.manuscript,
+            "stage": stage,
+            "name": name,
+            "toolchain": toolchain,
+            "duration": round(duration, 4),
+        }
+        with self.lock:
+            self.run_records.append(entry)
+            if self._records is not None:
+                self._records.append(entry)
+            if self.path is None:
+                return
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    @contextmanager
+    def timed(self, stage, name=None, toolchain=None):
+        """Record the duration of the `with`-block; nothing is recorded if it raises."""
+        start_time = time.perf_counter()
+        yield
+        self.record(stage, time.perf_counter() - start_time, name, toolchain)
+
+    @staticmethod
+    def key(record):
+        return (
+            record.get("manuscript"),
+            record.get("stage"),
+            record.get("name"),
+            record.get("toolchain"),
+        )
+
+    def series(self, key, exclude_run=None):
+        """Durations recorded under `key`, oldest first."""
+        return [
+            record["duration"]
+            for record in self.records
+            if self.key(record) == key
+            and (exclude_run is None or record.get("run") != exclude_run)
+        ]
+
+    def estimate(self, name, stage="render"):
+        """
+        Return the expected duration of `name` in seconds, or `None` if it was never recorded.
+
+        Durations of the current manuscript are preferred; otherwise those of all manuscripts are used.
+        """
+        durations = [
+            record
+            for record in self.records
+            if record.get("stage") == stage and record.get("name") == name
+        ]
+        own = [
+            record for record in durations if record.get("manuscript") == self.manuscript
+        ]
+        durations = [record["duration"] for record in (own if own else durations)]
+        if not durations:
+            return None
+        return statistics.median(durations[-self.window :])
+
+    def is_regression(self, duration, previous, threshold):
+        """Return the slowdown in percent if `duration` regressed against `previous`, else `None`."""
+        if not previous:
+            return None
+        median = statistics.median(previous[-self.window :])
+        if duration - median <= self.noise_floor or median <= 0:
+            return None
+        slowdown = 100 * (duration - median) / median
+        return slowdown if slowdown > threshold else None
+
+    def regressions(self, threshold):
+        """
+        Compare the stages of the current run against earlier runs.
+
+        :return: List of `(record, median, slowdown in percent)` of regressed stages.
+        """
+        regressed = []
+        for record in list(self.run_records):
+            previous = self.series(self.key(record), exclude_run=self.run_id)
+            slowdown = self.is_regression(record["duration"], previous, threshold)
+            if slowdown is not None:
+                regressed.append(
+                    (
+                        record,
+                        statistics.median(previous[-self.window :]),
+                        slowdown,
+                    )
+                )
+        return regressed
+
+    def trends(self, manuscript=None, stage=None, runs=5, threshold=25):
+        """
+        Summarise the recorded series, optionally filtered by manuscript and stage.
+
+        :return: Dict mapping manuscripts to lists of dicts with the `stage`, `name`, `toolchain`,
+            number of `runs`, `median` of the earlier durations, the `last` durations and the
+            `slowdown` of the latest one (`None` unless it regressed).
+        """
+        grouped = {}
+        for record in self.records:
+            if manuscript is not None and record.get("manuscript") != manuscript:
+                continue
+            if stage is not None and record.get("stage") != stage:
+                continue
+            grouped.setdefault(self.key(record), []).append(record["duration"])
+        summary = {}
+        for key, durations in grouped.items():
+            summary.setdefault(key[0], []).append(
+                {
+                    "stage": key[1],
+                    "name": key[2],
+                    "toolchain": key[3],
+                    "runs": len(durations),
+                    "median": statistics.median(durations[-self.window - 1 : -1])
+                    if len(durations) > 1
+                    else durations[0],
+                    "last": durations[-runs:],
+                    "slowdown": self.is_regression(
+                        durations[-1], durations[:-1], threshold
+                    ),
+                }
+            )
+        return summary
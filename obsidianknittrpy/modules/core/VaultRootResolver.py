@@ -0,0 +1,117 @@
+import os
+import logging
+import yaml
+from obsidianknittrpy.modules.utils import yaml_io
+
+
+class VaultRootResolver:
+    """
+    Resolves the root-directory of the Obsidian-vault containing a given note or directory.
+
+    A vault-root is the closest ancestor-directory containing a `.obsidian`-folder. Results
+    are memoised per directory, and optionally persisted to `cache_path` so that subsequent
+    runs do not have to walk the directory-tree again. Cached entries are only trusted if the
+    cached root still contains its `.obsidian`-folder; otherwise the tree is walked again.
+
+    The upwards-search stops at the filesystem-root, so paths outside of any vault
+    resolve to `None` instead of looping forever.
+
+    This class is shared by `ObsidianHTML_Limiter`, `ObsidianHTML` and anything else which
+    needs to know the vault a manuscript belongs to.
+    """
+
+    max_cache_entries = 500
+
+    def __init__(self, cache_path=None, loglevel=None):
+        self.logger = logging.getLogger(
+            self.__class__.__module__ + "." + self.__class__.__qualname__
+        )
+        self.logger.setLevel(loglevel)
+        self.cache_path = cache_path
+        self.cache = self.load_cache()
+
+    def load_cache(self):
+        if self.cache_path is None or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            cache = yaml_io.load_file(self.cache_path)
+        except (OSError, yaml.YAMLError) as e:
+            self.logger.warning(f"Ignoring unreadable vault-root cache: {e}")
+            return {}
+        return cache if isinstance(cache, dict) else {}
+
+    def save_cache(self):
+        """Atomically write the cache, so concurrent runs never see a partial file."""
+        if self.cache_path is None:
+            return
+        while len(self.cache) > self.max_cache_entries:
+            self.cache.pop(next(iter(self.cache)))  # drop the oldest entries first
+        try:
+            yaml_io.write_file(self.cache_path, self.cache, allow_unicode=True)
+        except OSError as e:
+            self.logger.warning(f"Vault-root cache could not be written: {e}")
+
+    @staticmethod
+    def is_vault_root(directory):
+        return os.path.isdir(os.path.join(directory, ".obsidian"))
+
+    @staticmethod
+    def _directory_of(path):
+        path = os.path.normpath(os.path.abspath(path))
+        return path if os.path.isdir(path) else os.path.dirname(path)
+
+    def resolve(self, path, persist=True):
+        """
+        Return the vault-root of `path` (a file or directory), or `None` if it is not inside a vault.
+
+        :param persist: Set to `False` for transient paths which should not end up in the persisted cache.
+        """
+        directory = self._directory_of(path)
+        cached_root = self.cache.get(directory)
+        if (
+            cached_root is not None
+            and self.is_vault_root(cached_root)
+            and (directory + os.sep).startswith(os.path.join(cached_root, ""))
+        ):
+            self.logger.debug(f"Vault-root of '{directory}' read from cache.")
+            return cached_root
+
+        vault_root = None
+        current = directory
+        while True:
+            if self.is_vault_root(current):
+                vault_root = current
+                break
+            parent = os.path.dirname(current)
+            if parent == current:  # reached the filesystem-root
+                break
+            current = parent
+
+        if vault_root is None:
+            self.logger.debug(f"'{directory}' is not located inside an Obsidian-vault.")
+            if self.cache.pop(directory, None) is not None and persist:
+                self.save_cache()
+            return None
+        if persist and cached_root != vault_root:
+            self.cache.pop(directory, None)
+            self.cache[directory] = vault_root
+            self.save_cache()
+        return vault_root
+
+    def relative_components(self, path, persist=True):
+        """
+        Return `(vault_root, [vault_root, subdir_1, ..., subdir_n])` for the directory of `path`.
+
+        :raises FileNotFoundError: if `path` is not located inside an Obsidian-vault.
+        """
+        vault_root = self.resolve(path, persist=persist)
+        if vault_root is None:
+            raise FileNotFoundError(
+                f"'{path}' is not located inside an Obsidian-vault (no '.obsidian'-folder found in any parent-directory)."
+            )
+        directory = self._directory_of(path)
+        relative = os.path.relpath(directory, vault_root)
+        components = [vault_root]
+        if relative != os.curdir:
+            components.extend(relative.split(os.sep))
+        return vault_root, components
@@ -5,6 +5,7 @@ import logging as logging
 import webbrowser
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
+from obsidianknittrpy.modules.core.FormatDefinitions import FormatDefinitions
 
 
 class OT_Argument:
@@ -45,7 +46,12 @@ class OT:
         skip_gui=False,
         stepsized_gui_show=False,
         loglevel="Info",
+        format_definitions=None,
     ):
+        """
+        :param config_file: The format-definitions, or the path of a file containing them.
+        :param format_definitions: Parsed `FormatDefinitions` of `config_file`, if already loaded.
+        """
         self.loglevel = loglevel
         self.logger = logging.getLogger(
             self.__class__.__module__ + "." + self.__class__.__qualname__
@@ -56,6 +62,7 @@ class OT:
         self.DDL_ParamDelimiter = DDL_ParamDelimiter
         self.skip_gui = skip_gui
         self.stepsized_gui_show = stepsized_gui_show
+        self.format_definitions = format_definitions
 
         self.classname = "ot (" + format + ")"
         # this.GUITitle="Define output format - "
@@ -86,66 +93,29 @@ class OT:
 
     def load_config(self):
         try:
-            if os.path.exists(self.config_file):
-                with open(self.config_file, "r") as f:
-                    text = f.read()
-            else:
-                text = self.config_file
-
-            # Split into sections based on format
-            if str(self.type + "\n") not in text:
+            # parsed once per distinct format-definitions, and shared by all instances
+            if self.format_definitions is None:
+                self.format_definitions = FormatDefinitions.load(self.config_file)
+            if self.type not in self.format_definitions:
                 raise ValueError(
                     f"The string '{self.type}' was not found in the format-definitions."
                 )
-            lines = (
-                text.split(self.type + "\n")[1].split("\n\n")[0].strip().splitlines()
-            )
+            spec = self.format_definitions.get(self.type)
 
-            if not lines:
+            if spec is None:
                 self.result = self.type + "()"
                 self.error = self.errors[2]
                 print(f"{self.__class__.__name__} > Initialization Error: {self.error}")
                 return
 
-            current_param = None
-
-            for line in lines:
-                line = line.strip()
-                if not line or line.startswith(";"):  # Skip comments and empty lines
-                    continue
-
-                # Check if the line defines a rendering package - this is metadata
-                if "renderingpackage" in line:
-                    key = line.split(":")[0]
-                    key_value_pairs = line.split("|")
-                    current_param = None
-                    for kv in key_value_pairs:
-                        if not kv.count("Value:"):
-                            continue
-                        k__ = kv.split("Value:")[1]
-                        if current_param is None:
-                            # self.key = k__
-                            setattr(self, key, k__)
-                    continue
-
-                # Split the line by the pipe character to extract key-value pairs
-                key_value_pairs = line.split("|")
-                ind = 0
-                current_param = None
-                for kv in key_value_pairs:
-                    ind = ind + 1
-                    key, value = self.parse_key_value(kv)
-                    if key and value:
-                        if current_param is None:
-                            current_param = key
-                            # Initialize a new Argument instance with Control set
-                            self.arguments[current_param] = OT_Argument(control=value)
-                        else:
-                            # Populate the argument properties based on subsequent key-value pairs
-                            setattr(self.arguments[current_param], key, value)
-            self.arguments = {
-                key: self.arguments[key] for key in sorted(self.arguments)
-            }
+            # rendering package - this is metadata
+            for key, value in spec["attributes"].items():
+                setattr(self, key, value)
+            # the instance modifies its arguments, so they are copied from the spec
+            for parameter, properties in spec["arguments"].items():
+                self.arguments[parameter] = OT_Argument(control=properties["Control"])
+                for key, value in properties.items():
+                    setattr(self.arguments[parameter], key, value)
             # print(self.get_error(0))
         except FileNotFoundError:
             print(f"Configuration file '{self.config_file}' not found.")
@@ -786,6 +786,7 @@ class ObsidianKnittrGUI:
 #########
 
 from obsidianknittrpy.modules.guis.DynamicArguments import OT
+from obsidianknittrpy.modules.core.FormatDefinitions import FormatDefinitions
 
 
 def handle_ot_guis(args, pb, CH, same_manuscript_chosen, format_definitions):
@@ -793,6 +794,7 @@ def handle_ot_guis(args, pb, CH, same_manuscript_chosen, format_definitions):
     x = 1645
     y = 475
     ShowGui = 1
+    definitions = FormatDefinitions.load(format_definitions)
     for format in CH.get_key("OUTPUT_TYPE"):
         ot = OT(
             config_file=format_definitions,
@@ -801,6 +803,7 @@ def handle_ot_guis(args, pb, CH, same_manuscript_chosen, format_definitions):
             skip_gui=CH.get_key("GENERAL_CONFIGURATION", "full_submit"),
             stepsized_gui_show=False,
             loglevel=args["loglevel"],
+            format_definitions=definitions,
         )  # Create instance of OT
 
         # Merge commandline-args values into the ot.arguments where available
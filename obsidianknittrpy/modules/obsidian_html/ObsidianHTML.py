@@ -2,9 +2,13 @@ import os
 import subprocess
 import re
 import shutil
-import yaml
 import importlib.util
 import logging
+from obsidianknittrpy.modules.utils.process_stream import run_streaming
+from obsidianknittrpy.modules.utils import yaml_io
+from obsidianknittrpy.modules.obsidian_html.ObsidianHTML_Worker import (
+    ObsidianHTML_WorkerClient,
+)
 import obsidianhtml  # this is an alibi-import so that pipreqs will find it when building the 'requirements.txt'-file for the package.
 
 
@@ -21,6 +25,12 @@ class ObsidianHTML:
         own_ohtml_fork_dir="",
         auto_submit_gui=False,
         encoding="utf-16-le",
+        timeout=None,
+        progress_callback=None,
+        worker_state_path=None,
+        environment=None,
+        vault_root_resolver=None,
+        vault_root=None,
     ):
         # Set initial variables
         self.logger = logging.getLogger(
@@ -31,6 +41,13 @@ class ObsidianHTML:
         self.encoding = encoding
         self.encoding = self.encoding if use_own_fork else "utf-8"
         self.config_path = os.path.normpath(os.path.abspath(config_path))
+        self.vault_root = vault_root
+        if self.vault_root is None and vault_root_resolver is not None:
+            self.vault_root = vault_root_resolver.resolve(manuscript_path)
+            if self.vault_root is None:
+                self.logger.critical(
+                    f"'{manuscript_path}' is not located inside an Obsidian-vault."
+                )
         self.config_template = None
         self.initialise_configuration()
         self.use_convert = use_convert
@@ -44,11 +61,20 @@ class ObsidianHTML:
         )
         self.own_ohtml_fork_dir = own_ohtml_fork_dir
         self.auto_submit_gui = auto_submit_gui
+        self.timeout = timeout
+        self.progress_callback = progress_callback
+        self.worker_state_path = worker_state_path
+        self.environment = environment
+        self.progress = {"module": "", "notes_converted": 0, "md_path": ""}
         self.obsidianhtml_path = ""
         self.obsidianhtml_available = self.check_obsidianhtml()
         self.python_available = self.check_python()
         # Initialize if checks passed
-        if not self.obsidianhtml_available or not self.python_available:
+        if (
+            not self.obsidianhtml_available
+            or not self.python_available
+            or (vault_root_resolver is not None and self.vault_root is None)
+        ):
             self.initialized = False
         else:
             self.initialized = True
@@ -58,6 +84,7 @@ class ObsidianHTML:
         self.config_template = f"""
 # Input and output path of markdown files
 obsidian_entrypoint_path_str: {os.path.normpath(self.manuscript_path)}
+{f"obsidian_folder_path_str: {self.vault_root}" if self.vault_root else ""}
 max_note_depth: 15
 copy_vault_to_tempdir: True
 
@@ -81,6 +108,7 @@ module_config:
         - "/.DS_Store/**/*"
 
 toggles:
+  stdout_current_file: True
   strict_line_breaks: True
   wrap_inclusions: False
   strip_inclusion_headers: True
@@ -113,8 +141,8 @@ toggles:
                 "strip_inclusion_headers: True", ""
             )
         with open(self.config_path, "w", encoding=self.encoding) as file:
-            yaml.safe_dump(
-                yaml.safe_load(self.config_template), file, encoding=self.encoding
+            yaml_io.safe_dump(
+                yaml_io.safe_load(self.config_template), file, encoding=self.encoding
             )
         self.logger.info(f"ObsidianHTML-Configuration written to {self.config_path}")
 
@@ -217,14 +245,64 @@ toggles:
 
         return command
 
-    def execute_command(self, command, work_dir, env=None):
-        """Executes a command and returns its output."""
+    def execute_command(self, command, work_dir, env=None, on_line=None):
+        """
+        Executes a command and returns its output.
+
+        Output is streamed line by line to `on_line` while the command runs. If `self.timeout`
+        is exceeded, the process-tree is terminated and a `TimeoutError` is raised.
+        """
         if os.path.exists(work_dir):
-            result = subprocess.run(
-                command, cwd=work_dir, capture_output=True, text=True, env=env
-            )
+            try:
+                result = run_streaming(
+                    command,
+                    cwd=work_dir,
+                    env=env,
+                    timeout=self.timeout,
+                    on_line=on_line,
+                )
+            except subprocess.TimeoutExpired:
+                self.logger.critical(
+                    f"ObsidianHTML did not finish within {self.timeout}s and was terminated."
+                )
+                raise TimeoutError(
+                    f"ObsidianHTML exceeded its timeout of {self.timeout}s while converting '{self.manuscript_path}'."
+                )
             return result
 
+    def handle_output_line(self, stream_name, line):
+        """Parses progress-information from a single line of ObsidianHTML's output as it arrives."""
+        event = None
+        module_match = re.search(r"run_module\(\) :: (?P<module>\S+)", line)
+        note_match = re.match(r"^\s*b'(?P<note>.*)'$", line) or re.match(
+            r"^\s*\d+/\d+ - (?P<note>.*)$", line
+        )
+        md_path_match = re.search(r"md: (?P<md_path>.*)", line)
+        if module_match:
+            self.progress["module"] = module_match.group("module")
+            event = {"type": "module", "value": self.progress["module"]}
+        elif note_match:
+            self.progress["notes_converted"] += 1
+            event = {"type": "note", "value": note_match.group("note")}
+        elif md_path_match:
+            self.progress["md_path"] = md_path_match.group("md_path").strip()
+            event = {"type": "md_path", "value": self.progress["md_path"]}
+        elif stream_name == "stderr" and line.strip():
+            event = {"type": "stderr", "value": line}
+        if event is None:
+            return
+        event["notes_converted"] = self.progress["notes_converted"]
+        if self.progress_callback is not None:
+            self.progress_callback(event)
+        elif event["type"] == "note":
+            self.logger.info(
+                f"[{event["notes_converted"]}] converted '{event["value"]}'"
+            )
+        elif event["type"] == "stderr":
+            self.logger.warning(f"ObsidianHTML: {event["value"]}")
+        else:
+            self.logger.debug(f"ObsidianHTML {event["type"]}: {event["value"]}")
+
     def parse_output(self, output):
         """Parse specific paths and versions from ObsidianHTML output."""
         md_path_regex = r"md: (?P<md_path>.*)"
@@ -253,13 +331,68 @@ toggles:
             resource=self.config_path,
         )
 
+    def run_via_worker(self):
+        """
+        Submit the conversion to a running `ObsidianHTML_Worker`.
+
+        Returns `True` if the worker handled the conversion, and `False` if no worker is
+        running or the worker failed, in which case the caller falls back to a subprocess.
+        """
+        if not self.worker_state_path or not self.use_convert or self.use_own_fork:
+            return False
+        client = ObsidianHTML_WorkerClient(self.worker_state_path)
+        result = client.convert(
+            entrypoint=os.path.normpath(self.manuscript_path),
+            config=yaml_io.safe_load(self.config_template),
+            output_dir=self.work_dir,
+            verbose=self.verbose,
+            timeout=self.timeout,
+            environment=(
+                {
+                    key: value
+                    for key, value in self.environment.items()
+                    if os.environ.get(key) != value
+                }
+                if self.environment
+                else None
+            ),
+        )
+        if result is None:
+            return False
+        for line in result.get("stdout", "").splitlines():
+            self.handle_output_line("stdout", line)
+        if result["status"] != "ok":
+            self.logger.warning(
+                f"ObsidianHTML-worker failed ({result["error"]}); falling back to a subprocess."
+            )
+            self.progress = {"module": "", "notes_converted": 0, "md_path": ""}
+            return False
+        self.logger.info(
+            f"ObsidianHTML-worker converted {len(result["files"])} files in {result["duration"]:.2f}s."
+        )
+        self.output = {}
+        self.output["command"] = "worker:convert"
+        self.output["obsidian_html_path"] = self.obsidianhtml_path
+        self.output["obsidian_html_version"] = f"({result["obsidianhtml_version"]})"
+        self.output["obsidian_html_copydir"] = ""
+        self.output["output_path"] = result["output_path"]
+        self.output["files"] = result["files"]
+        self.output["stdOut"] = result["stdout"]
+        self.output["stdErr"] = ""
+        self.output["working_directory"] = self.work_dir
+        return True
+
     def run(self):
         """Main method to run ObsidianHTML."""
         if not self.validate_config():
             return False
+        if self.run_via_worker():
+            return True
         work_dir = self.work_dir
 
-        env = os.environ.copy()  # Copy the current environment
+        env = dict(
+            self.environment or os.environ
+        )  # Copy the current (or run-scoped) environment
         if self.use_own_fork:
             env["PYTHONPATH"] = os.path.dirname(
                 self.obsidianhtml_path
@@ -276,9 +409,16 @@ toggles:
             output_version = "(" + output_version + ")"
 
         command = self.construct_command()
-        output = self.execute_command(command, work_dir, env)
+        output = self.execute_command(
+            command, work_dir, env, on_line=self.handle_output_line
+        )
+        self.logger.info(
+            f"ObsidianHTML converted {self.progress["notes_converted"]} notes."
+        )
 
-        md_path = self.parse_output(output.stdout)
+        md_path = self.progress["md_path"]
+        if not os.path.exists(md_path):
+            md_path = self.parse_output(output.stdout)
         if not md_path:
             self.logger.critical(
                 "Failed to parse output. Please check manually.The utility will exit."
@@ -1,9 +1,12 @@
 from functools import partial
-from collections import deque
 from tkinter import ttk
 import tkinter as tk
 import os as os
+import shutil
 import logging
+from obsidianknittrpy.modules.core.VaultRootResolver import VaultRootResolver
+from obsidianknittrpy.modules.utils.link_tree import build_link_tree
+from obsidianknittrpy.modules.utils.vault_links import index_vault, link_closure
 
 
 # class TtkCheckList is sourced from https://stackoverflow.com/a/67348336, and slightly adopted to suit my own needs.
@@ -104,13 +107,63 @@ class TtkCheckList(ttk.Treeview):
 
 
 class ObsidianHTML_Limiter:
+    """
+    Limits the part of the vault ObsidianHTML has to scan to a selected (sub-)directory.
+
+    # Modes
+
+    By default, a temporary `.obsidian`-folder is created inside the selected directory of the
+    vault, so that ObsidianHTML detects it as the vault-root. This mutates the vault, and races
+    with other runs on the same vault.
+
+    If `virtual` is set, the vault is left untouched. Instead, the selected directory is mirrored
+    into `overlay_directory` (files are hardlinked, or symlinked/copied where hardlinks are not
+    possible), and the mirror receives the `.obsidian`-folder. `scope_root` and
+    `scoped_manuscript_path` point to the directory and manuscript ObsidianHTML must be run on.
+
+    # Levels
+
+    - `-1`: the true vault-root
+    - `0`: the manuscript's directory
+    - `N > 0`: N directories above the manuscript's directory
+    - `"auto"`: the deepest directory containing all notes and attachments reachable from the manuscript
+    """
+
+    # not mirrored into the overlay; ObsidianHTML excludes these anyways.
+    overlay_skip_names = (
+        ".obsidian",
+        ".git",
+        ".github",
+        ".quarto",
+        ".renv",
+        ".Rproj.user",
+        ".trash",
+        ".vscode",
+        ".DS_Store",
+        "_freeze",
+        "_site",
+    )
+
     def __init__(
-        self, manuscript_path, auto_submit=False, level=-1, cli_args=None, loglevel=None
+        self,
+        manuscript_path,
+        auto_submit=False,
+        level=-1,
+        cli_args=None,
+        loglevel=None,
+        vault_root_resolver=None,
+        virtual=False,
+        overlay_directory=None,
     ):
         self.logger = logging.getLogger(
             self.__class__.__module__ + "." + self.__class__.__qualname__
         )
         self.logger.setLevel(level=loglevel)
+        self.vault_root_resolver = (
+            vault_root_resolver
+            if vault_root_resolver is not None
+            else VaultRootResolver(loglevel=loglevel)
+        )
         self.width = 750
         self.height = 550
         if os.path.exists(manuscript_path):
@@ -118,6 +171,10 @@ class ObsidianHTML_Limiter:
             self.auto_submit = auto_submit
             self.default_level = level
             self.cli_args = cli_args if cli_args else {}
+            self.virtual = virtual and overlay_directory is not None
+            self.overlay_directory = overlay_directory
+            self.scope_root = None
+            self.scoped_manuscript_path = manuscript_path
             self.directory_structure = self.find_obsidian_vault_root()
             self.removed_selected_limiter_directory_success = False
             self.adjust_default_Level()
@@ -162,10 +219,13 @@ class ObsidianHTML_Limiter:
         Level = 0 > manuscript_dir
         Level = -1 > true vault-root
         Level > 0 = manuscript_dir - level
+        Level = "auto" > deepest common ancestor of the manuscript's link-closure
 
         """
 
-        if self.default_level == -1:  # vault-root
+        if self.default_level == "auto":
+            lvl = self.compute_auto_level()
+        elif self.default_level == -1:  # vault-root
             lvl = 1
         elif self.default_level == 0:  # manuscript-dir
             lvl = len(self.directory_structure[1])
@@ -178,6 +238,36 @@ class ObsidianHTML_Limiter:
         else:
             self.level = lvl
 
+    def compute_auto_level(self):
+        """
+        Select the deepest directory containing every note and attachment reachable from the
+        manuscript, and return its treeview-level.
+        """
+        vault_root = os.path.dirname(self.directory_structure[0])
+        by_name, files = index_vault(vault_root, skip_names=self.overlay_skip_names)
+        reachable = link_closure(self.manuscript_path, vault_root, by_name)
+        try:
+            common_directory = os.path.commonpath(
+                [os.path.dirname(path) for path in reachable]
+            )
+        except ValueError:  # paths on different drives
+            common_directory = vault_root
+        if not (common_directory + os.sep).startswith(os.path.join(vault_root, "")):
+            common_directory = vault_root  # links pointing outside of the vault
+        relative = os.path.relpath(common_directory, vault_root)
+        level = 1 if relative == os.curdir else 1 + len(relative.split(os.sep))
+        included = sum(
+            1
+            for path in files
+            if (path + os.sep).startswith(os.path.join(common_directory, ""))
+        )
+        self.logger.info(
+            f"Automatic limiter-level {level} selected '{common_directory}', which contains all {len(reachable)} "
+            f"notes and attachments reachable from the manuscript. {len(files) - included} of {len(files)} "
+            f"files are excluded from ObsidianHTML's scan."
+        )
+        return level
+
     def adjust_directory_structure(self):
         idx = 0
         self.adjusted_directory_structure = self.directory_structure
@@ -291,7 +381,16 @@ class ObsidianHTML_Limiter:
                     children = self.tree.get_children(iid)
             check_new(self, iid)
 
+    def selected_directory(self):
+        """Return the directory selected to act as the vault-root."""
+        return os.path.dirname(
+            os.path.normpath(self.selected_limiter_directory.rstrip("\\/"))
+        )
+
     def add_limiter(self):
+        self.scope_root = self.selected_directory()
+        if self.virtual:
+            return self.add_virtual_limiter()
         if self.selected_limiter_is_vaultroot:
             self.logger.debug("Selected limiter is the vault root. No action taken.")
             self.selected_limiter_preexisted = True
@@ -310,7 +409,44 @@ class ObsidianHTML_Limiter:
             self.logger.info(f"Created directory '{self.selected_limiter_directory}'.")
             # self.close()
 
+    def add_virtual_limiter(self):
+        """Mirror the selected directory into the overlay, without touching the vault."""
+        self.selected_limiter_preexisted = False
+        if self.scope_root == os.path.dirname(self.directory_structure[0]):
+            self.selected_limiter_is_vaultroot = True
+        if self.selected_limiter_is_vaultroot:
+            self.logger.debug("Selected limiter is the vault root. No overlay required.")
+            self.selected_limiter_preexisted = True
+            return
+        if os.path.exists(self.overlay_directory):
+            shutil.rmtree(self.overlay_directory)
+        counts = build_link_tree(
+            self.scope_root,
+            self.overlay_directory,
+            skip_names=self.overlay_skip_names,
+            # ObsidianHTML resolves the entrypoint, which would escape the overlay if it was a symlink.
+            no_symlink=[self.manuscript_path],
+        )
+        os.makedirs(os.path.join(self.overlay_directory, ".obsidian"), exist_ok=True)
+        self.scoped_manuscript_path = os.path.join(
+            self.overlay_directory,
+            os.path.relpath(os.path.abspath(self.manuscript_path), self.scope_root),
+        )
+        self.scope_root = self.overlay_directory
+        self.logger.info(
+            f"Mirrored '{self.selected_directory()}' into overlay '{self.overlay_directory}' "
+            f"({counts["hardlink"]} hardlinked, {counts["symlink"]} symlinked, {counts["copy"]} copied)."
+        )
+
     def remove_limiter(self):
+        if self.virtual:
+            if not self.selected_limiter_is_vaultroot and os.path.exists(
+                self.overlay_directory
+            ):
+                shutil.rmtree(self.overlay_directory, ignore_errors=True)
+                self.logger.info(f"Removed overlay '{self.overlay_directory}'.")
+                self.removed_selected_limiter_directory_success = True
+            return
         if self.selected_limiter_is_vaultroot:
             self.logger.warning("Cannot remove limiter; it is the vault root.")
             return
@@ -350,37 +486,15 @@ class ObsidianHTML_Limiter:
         return tv_string
 
     def find_obsidian_vault_root(self, reset=False):
-        found_location = ""
-        stack = deque() if reset else deque()  # Initialize or reset the directory stack
-        path = self.manuscript_path
-        original_path = path.rstrip("\\")  # Remove trailing backslash if present
-
-        # If path is a file, use its directory
-        if not os.path.isdir(original_path):
-            path = os.path.dirname(original_path)
-        else:
-            stack.append(os.path.basename(original_path))  # Add to stack if directory
-
-        while True:
-            # Construct the Obsidian folder path to check
-
-            obsidian_check_path = os.path.join(path, ".obsidian")
-
-            # Check if the directory contains the .obsidian folder
-            if os.path.isdir(obsidian_check_path):
-                obsidian_vault_path = obsidian_check_path
-                stack.appendleft(path)
-                return obsidian_vault_path, list(stack)
-
-            # If we have reached the root directory, stop the search
-            parent_dir = path
+        """
+        Return the vault's `.obsidian`-folder and the directory-stack `[vault_root, subdir_1, ..., manuscript_dir]`.
 
-            # Move up one directory level
-            if parent_dir not in stack:  # Avoid circular appending
-                stack.appendleft(
-                    os.path.basename(parent_dir)
-                )  # Add parent directory to the front of the stack
-            path = os.path.dirname(parent_dir)  # Update path to parent directory
+        Raises `FileNotFoundError` if the manuscript is not located inside a vault.
+        """
+        vault_root, stack = self.vault_root_resolver.relative_components(
+            self.manuscript_path
+        )
+        return os.path.join(vault_root, ".obsidian"), stack
 
 
 def check_new(instance, iid):
@@ -0,0 +1,320 @@
+import os
+import io
+import re
+import sys
+import json
+import time
+import getpass
+import secrets
+import logging
+import contextlib
+import multiprocessing
+import subprocess
+from multiprocessing.connection import Listener, Client
+from obsidianknittrpy.modules.utils import yaml_io
+
+
+class ObsidianHTML_Worker:
+    """
+    Long-lived worker which keeps `obsidianhtml` imported between conversions.
+
+    The worker listens on a local UNIX-socket (or a named pipe on windows) and accepts
+    conversion-jobs submitted by `ObsidianHTML_WorkerClient`. Its address and the
+    authentication-key required to connect are stored in a state-file which only the
+    current user can read.
+
+    # Job-format
+
+    ```
+    {"action": "convert", "entrypoint": <path>, "config": <dict>, "output_dir": <dir>, "verbose": <bool>}
+    ```
+
+    An optional `environment`-dict is applied to `os.environ` for the duration of the job.
+
+    The response contains the parsed `md`-output path, a manifest of all files in the
+    markdown-output folder, and the captured stdout of the conversion.
+
+    On systems supporting `fork`, every job runs in a child forked from the warm worker,
+    so state leaking between conversions cannot accumulate inside `obsidianhtml` itself.
+    Elsewhere, jobs run in the worker, and `os.environ` is restored after each of them.
+    """
+
+    def __init__(self, state_path, loglevel=None):
+        self.state_path = state_path
+        self.logger = logging.getLogger(
+            self.__class__.__module__ + "." + self.__class__.__qualname__
+        )
+        self.logger.setLevel(loglevel)
+        self.authkey = secrets.token_bytes(32)
+        self.address = self.default_address()
+        self.obsidianhtml = None
+        self.obsidianhtml_version = ""
+
+    def default_address(self):
+        """Return a per-user address for the listener."""
+        if sys.platform == "win32":
+            return rf"\\.\pipe\obsidianknittrpy-ohtml-worker-{getpass.getuser()}"
+        return os.path.join(os.path.dirname(self.state_path), "ohtml-worker.sock")
+
+    def warm_up(self):
+        """Import `obsidianhtml` once, so that subsequent jobs do not pay for it."""
+        import obsidianhtml
+        from obsidianhtml.lib import OpenIncludedFile
+
+        self.obsidianhtml = obsidianhtml
+        self.obsidianhtml_version = OpenIncludedFile("version").strip()
+        self.logger.info(
+            f"Imported obsidianhtml {self.obsidianhtml_version} from '{os.path.dirname(obsidianhtml.__file__)}'."
+        )
+
+    def write_state(self):
+        """Persist address, authkey and pid to the state-file."""
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        state = {
+            "address": self.address,
+            "authkey": self.authkey.hex(),
+            "pid": os.getpid(),
+            "obsidianhtml_version": self.obsidianhtml_version,
+        }
+        fd = os.open(self.state_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+
+    def remove_state(self):
+        for path in [self.state_path, self.address]:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def serve(self):
+        """Accept jobs until a `shutdown`-job is received."""
+        self.warm_up()
+        if sys.platform != "win32" and os.path.exists(self.address):
+            os.remove(self.address)  # stale socket of a crashed worker
+        listener = Listener(self.address, authkey=self.authkey)
+        self.write_state()
+        self.logger.info(f"ObsidianHTML-worker listening on '{self.address}'.")
+        try:
+            while True:
+                try:
+                    conn = listener.accept()
+                except (multiprocessing.AuthenticationError, OSError) as e:
+                    self.logger.warning(f"Rejected connection: {e}")
+                    continue
+                with conn:
+                    try:
+                        job = conn.recv()
+                    except EOFError:
+                        continue
+                    if job.get("action") == "shutdown":
+                        conn.send({"status": "ok"})
+                        break
+                    conn.send(self.handle_job(job))
+        finally:
+            listener.close()
+            self.remove_state()
+            self.logger.info("ObsidianHTML-worker stopped.")
+
+    def handle_job(self, job):
+        if job.get("action") == "ping":
+            return {
+                "status": "ok",
+                "pid": os.getpid(),
+                "obsidianhtml_version": self.obsidianhtml_version,
+            }
+        if job.get("action") != "convert":
+            return {"status": "error", "error": f"Unknown action '{job.get("action")}'"}
+        start_time = time.time()
+        if "fork" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("fork")
+            receiver, sender = context.Pipe(duplex=False)
+            child = context.Process(target=self._convert_child, args=(job, sender))
+            child.start()
+            sender.close()
+            try:
+                result = receiver.recv()
+            except EOFError:
+                result = {
+                    "status": "error",
+                    "error": "Conversion-process exited without a result.",
+                }
+            child.join()
+        else:
+            with self.preserved_environ():
+                result = self.convert(job)
+        result["duration"] = time.time() - start_time
+        result["obsidianhtml_version"] = self.obsidianhtml_version
+        return result
+
+    @staticmethod
+    @contextlib.contextmanager
+    def preserved_environ():
+        """Restore `os.environ` on exit, undoing whatever a job changed in it."""
+        previous_environ = dict(os.environ)
+        try:
+            yield
+        finally:
+            os.environ.clear()
+            os.environ.update(previous_environ)
+
+    def _convert_child(self, job, sender):
+        try:
+            sender.send(self.convert(job))
+        finally:
+            sender.close()
+
+    def convert(self, job):
+        """Run a single conversion in-process and collect its output."""
+        output_dir = job["output_dir"]
+        os.makedirs(output_dir, exist_ok=True)
+        config = dict(job["config"])
+        config["obsidian_entrypoint_path_str"] = job["entrypoint"]
+        config_path = os.path.join(output_dir, "obsidian_html-worker-configuration.yml")
+        yaml_io.write_file(config_path, config)
+        argv = ["obsidianhtml", "convert", "-i", config_path]
+        if job.get("verbose"):
+            argv.append("-v")
+
+        stdout = io.StringIO()
+        previous_argv, previous_cwd = sys.argv, os.getcwd()
+        exit_code = 0
+        try:
+            sys.argv = argv
+            os.environ.update(job.get("environment") or {})
+            os.chdir(output_dir)
+            with contextlib.redirect_stdout(stdout):
+                try:
+                    self.obsidianhtml.main()
+                except SystemExit as e:
+                    exit_code = e.code or 0
+        except Exception as e:
+            return {"status": "error", "error": repr(e), "stdout": stdout.getvalue()}
+        finally:
+            sys.argv = previous_argv
+            os.chdir(previous_cwd)
+
+        output = stdout.getvalue()
+        match = re.search(r"md: (?P<md_path>.*)", output)
+        md_path = match.group("md_path").strip() if match else ""
+        if exit_code != 0 or not os.path.exists(md_path):
+            return {
+                "status": "error",
+                "error": f"Conversion failed (exit-code {exit_code}).",
+                "stdout": output,
+            }
+        files = []
+        for root, _, filenames in os.walk(md_path):
+            for filename in filenames:
+                files.append(
+                    os.path.relpath(os.path.join(root, filename), md_path).replace(
+                        "\\", "/"
+                    )
+                )
+        return {
+            "status": "ok",
+            "output_path": md_path,
+            "files": sorted(files),
+            "stdout": output,
+        }
+
+
+class ObsidianHTML_WorkerClient:
+    """Submits jobs to a running `ObsidianHTML_Worker`, as described by its state-file."""
+
+    def __init__(self, state_path, connect_timeout=1):
+        self.state_path = state_path
+        self.connect_timeout = connect_timeout
+        self.logger = logging.getLogger(
+            self.__class__.__module__ + "." + self.__class__.__qualname__
+        )
+
+    def load_state(self):
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def request(self, job, timeout=None):
+        """Send `job` and return the worker's response, or `None` if no worker is reachable."""
+        state = self.load_state()
+        if state is None:
+            return None
+        if sys.platform != "win32" and not os.path.exists(state["address"]):
+            return None
+        try:
+            conn = Client(state["address"], authkey=bytes.fromhex(state["authkey"]))
+        except (OSError, multiprocessing.AuthenticationError) as e:
+            self.logger.debug(f"ObsidianHTML-worker not reachable: {e}")
+            return None
+        with conn:
+            conn.send(job)
+            if not conn.poll(timeout):
+                raise TimeoutError(
+                    f"ObsidianHTML-worker did not answer within {timeout}s."
+                )
+            return conn.recv()
+
+    def is_running(self):
+        response = self.request({"action": "ping"}, timeout=self.connect_timeout)
+        return response is not None and response.get("status") == "ok"
+
+    def convert(
+        self,
+        entrypoint,
+        config,
+        output_dir,
+        verbose=False,
+        timeout=None,
+        environment=None,
+    ):
+        return self.request(
+            {
+                "action": "convert",
+                "entrypoint": entrypoint,
+                "config": config,
+                "output_dir": output_dir,
+                "verbose": verbose,
+                "environment": environment,
+            },
+            timeout=timeout,
+        )
+
+    def shutdown(self):
+        return self.request({"action": "shutdown"}, timeout=self.connect_timeout)
+
+
+def start_worker_detached(state_path, loglevel="INFO"):
+    """Launch `okpy worker start --foreground` as a detached background-process."""
+    command = [
+        sys.executable,
+        "-m",
+        "obsidianknittrpy",
+        "worker",
+        "start",
+        "--foreground",
+        "--loglevel",
+        loglevel,
+    ]
+    if sys.platform == "win32":
+        flags = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+        process = subprocess.Popen(
+            command,
+            creationflags=flags,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+    else:
+        process = subprocess.Popen(
+            command,
+            start_new_session=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+    client = ObsidianHTML_WorkerClient(state_path)
+    for _ in range(100):  # wait up to ~10s for the worker to import obsidianhtml
+        if client.is_running():
+            return process.pid
+        if process.poll() is not None:
+            break
+        time.sleep(0.1)
+    return None
@@ -34,8 +34,9 @@ class BaseModule:
         self.past_module_method_instance = (
             past_module_method_instance if past_module_method_instance else ""
         )
-        self.RL = ResourceLogger()
-        self.RL.log_file = log_file
+        self.RL = ResourceLogger.instance()
+        if log_file is not None:
+            self.RL.log_file = log_file
 
     def get_config(self, key, default=None):
         """
@@ -113,7 +114,8 @@ import importlib.util
 import importlib
 import os
 import sys
-import yaml
+import time
+from obsidianknittrpy.modules.utils import yaml_io
 
 
 class ProcessingPipeline:
@@ -130,10 +132,12 @@ class ProcessingPipeline:
         debug=False,
         log_directory=None,
         RL=None,
+        timing_history=None,
     ):
         """
         Initialize the processing pipeline.
         :param config_file: Path to YAML configuration file
+        :param timing_history: Optional `TimingHistory`, recording the duration of every module
         """
         self.logger = logging.getLogger(
             self.__class__.__module__ + "." + self.__class__.__qualname__
@@ -145,6 +149,7 @@ class ProcessingPipeline:
         self.arguments["debug"] = debug
         self.log_directory = log_directory
         self.RL = RL
+        self.timing_history = timing_history
         self.custom_source_dir = custom_module_directory
         if os.path.exists(self.log_directory):
             self.logger.info(f"Removed module-logging-directory {self.log_directory}.")
@@ -156,8 +161,7 @@ class ProcessingPipeline:
             shutil.rmtree(self.log_directory)
         try:
             if os.path.exists(config_file):
-                with open(config_file, "r") as f:
-                    config = yaml.safe_load(f)
+                config = yaml_io.load_file(config_file)
         except:
             config = config_file
 
@@ -288,7 +292,12 @@ class ProcessingPipeline:
         for module in self.modules:
             module.init_log(self.debug)
             module.log_input(input_str)
+            start_time = time.perf_counter()
             input_str = module.process(input_str)
+            if self.timing_history is not None:
+                self.timing_history.record(
+                    "module", time.perf_counter() - start_time, name=module.name
+                )
             module.log_output(input_str)
         self.logger.debug(f"Processing-pipeline finished conversion.")
         return input_str
@@ -1,6 +1,6 @@
 from .processing_module_runner import BaseModule
+from obsidianknittrpy.modules.utils import yaml_io
 import re
-import yaml
 import os
 
 
@@ -108,7 +108,7 @@ class PurgeContents(BaseModule):
             ].strip()  # The rest of the content
 
             # Parse the YAML frontmatter into a Python dictionary
-            frontmatter_dict = yaml.safe_load(frontmatter_str)
+            frontmatter_dict = yaml_io.safe_load(frontmatter_str)
 
             # If frontmatter is None (empty YAML), initialize as an empty dictionary
             if frontmatter_dict is None:
@@ -142,7 +142,9 @@ class PurgeContents(BaseModule):
                             ]
 
             # Convert the modified frontmatter dictionary back to a YAML string
-            new_frontmatter_str = yaml.dump(frontmatter_dict, default_flow_style=False)
+            new_frontmatter_str = yaml_io.dump(
+                frontmatter_dict, default_flow_style=False
+            )
 
             # Reassemble the final file content
             new_data = f'---\n{new_frontmatter_str}---\n{markdown_content}'
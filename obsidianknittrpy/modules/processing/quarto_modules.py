@@ -1,4 +1,5 @@
 from .processing_module_runner import BaseModule
+from obsidianknittrpy.modules.utils import yaml_io
 import re
 import yaml
 
@@ -373,14 +374,14 @@ class EnforceFrontmatterYAML(BaseModule):
 
             # Parse the YAML frontmatter into a Python dictionary
             try:
-                frontmatter_dict = yaml.safe_load(frontmatter_str)
+                frontmatter_dict = yaml_io.safe_load(frontmatter_str)
             except yaml.YAMLError as e:
                 raise ValueError(f"Error parsing YAML frontmatter: {e}")
 
             # Dump the frontmatter back into YAML format
             # We set default_flow_style=False for pretty formatting
             # You can also customize the indentations here if needed
-            new_frontmatter_str = yaml.dump(
+            new_frontmatter_str = yaml_io.dump(
                 frontmatter_dict, default_flow_style=False, allow_unicode=True
             )
 
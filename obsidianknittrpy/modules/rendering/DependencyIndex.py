@@ -0,0 +1,80 @@
+import os
+import logging
+from collections import defaultdict
+
+
+class DependencyIndex:
+    """
+    Index of the vault-files known to ObsidianHTML (`index/files.json`), for resolving the relative
+    dependency-paths of a document (bibliographies, csl-files, filters, ...).
+
+    Every file is registered under all suffixes of its path relative to `base_directory`, e.g.
+    `refs/lib.bib` under `lib.bib`, `refs/lib.bib` and `<subfolder>/refs/lib.bib`. Paths are
+    compared component-wise (and case-insensitively on windows), so `lib.bib` does not match
+    `mylib.bib`. Building the index is linear in the number of files; every lookup afterwards
+    is a single dictionary-access.
+
+    Files below `_extensions` are additionally registered under every path-segment below it,
+    so Quarto-filters can be looked up by their extension-name (`fancy`, `org/fancy`).
+    """
+
+    def __init__(self, files, base_directory, loglevel=None):
+        self.logger = logging.getLogger(
+            self.__class__.__module__ + "." + self.__class__.__qualname__
+        )
+        self.logger.setLevel(loglevel)
+        self.base_directory = base_directory
+        self.suffixes = defaultdict(list)
+        self.extensions = defaultdict(list)
+        self.size = 0
+        for path in files:
+            relative_path = os.path.relpath(path, base_directory)
+            components = self.components(relative_path)
+            for start in range(len(components)):
+                self.suffixes[components[start:]].append((path, relative_path))
+            if "_extensions" in components:
+                below = components[components.index("_extensions") + 1 :]
+                for end in range(1, len(below) + 1):
+                    for start in range(end):
+                        self.extensions[below[start:end]].append(path)
+            self.size += 1
+
+    @staticmethod
+    def components(path):
+        """Split `path` into normalised components, dropping leading `.`- and `..`-components."""
+        components = [
+            os.path.normcase(part) for part in path.replace("\\", "/").split("/")
+        ]
+        components = [part for part in components if part and part != "."]
+        while components and components[0] == "..":
+            components.pop(0)
+        return tuple(components)
+
+    def lookup(self, relative_path):
+        """Return `(path, path relative to base_directory)` of every file whose path ends with `relative_path`."""
+        components = self.components(relative_path)
+        if not components:
+            return []
+        return self.suffixes.get(components, [])
+
+    def resolve(self, relative_path):
+        """
+        Return the single file matching `relative_path` as `(path, path relative to base_directory)`,
+        or `None` if there is no match.
+
+        Ambiguous matches are reported; the match closest to `base_directory` is used.
+        """
+        matches = self.lookup(relative_path)
+        if not matches:
+            return None
+        if len(matches) > 1:
+            matches = sorted(matches, key=lambda match: (match[1].count(os.sep), match[1]))
+            self.logger.warning(
+                f"Dependency '{relative_path}' is ambiguous, using '{matches[0][1]}'. Candidates: "
+                + ", ".join(f"'{relative}'" for _, relative in matches)
+            )
+        return matches[0]
+
+    def extension_files(self, name):
+        """Return the paths of files below an `_extensions`-directory whose path contains `name`."""
+        return self.extensions.get(self.components(name), [])
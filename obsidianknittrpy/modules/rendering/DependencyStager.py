@@ -0,0 +1,124 @@
+import os
+import uuid
+import shutil
+import hashlib
+import logging
+from obsidianknittrpy.modules.utils.link_tree import reflink_file
+
+
+class DependencyStager:
+    """
+    Stages dependencies (bibliographies, csl-files, extensions, ...) into the working directory.
+
+    For every file, the cheapest way is used:
+
+    1. skip it, if the target already is the same file (hardlink), or has the same size and
+       modification-time, or the same contents
+    2. hardlink it
+    3. clone it copy-on-write (reflink), where the filesystem supports it
+    4. copy it
+
+    Targets are always replaced instead of being written to, so a hardlinked target never
+    modifies its source. Within a run, every target is only staged once, so formats and filters
+    referencing the same files do not stage them again.
+    """
+
+    def __init__(self, loglevel=None):
+        self.logger = logging.getLogger(
+            self.__class__.__module__ + "." + self.__class__.__qualname__
+        )
+        self.logger.setLevel(loglevel)
+        self.staged = {}
+        self.counts = {"skipped": 0, "hardlink": 0, "reflink": 0, "copy": 0, "deduplicated": 0}
+        self.bytes_copied = 0
+        self.bytes_saved = 0
+
+    @staticmethod
+    def _key(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    @staticmethod
+    def _hash(path):
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.digest()
+
+    def is_current(self, source, target, source_stat):
+        """Check if `target` already holds the contents of `source`."""
+        try:
+            target_stat = os.stat(target)
+        except OSError:
+            return False
+        if os.path.samestat(source_stat, target_stat):
+            return True
+        if source_stat.st_size != target_stat.st_size:
+            return False
+        if source_stat.st_mtime_ns == target_stat.st_mtime_ns:
+            return True
+        if self._hash(source) != self._hash(target):
+            return False
+        # skip hashing next time
+        os.utime(target, ns=(target_stat.st_atime_ns, source_stat.st_mtime_ns))
+        return True
+
+    def stage_file(self, source, target):
+        """
+        Make `source` available at `target`.
+
+        :return: `True` if `target` was staged by this call, `False` if it was already staged during this run.
+        """
+        key = self._key(target)
+        source_stat = os.stat(source)
+        if key in self.staged:
+            self.counts["deduplicated"] += 1
+            self.bytes_saved += source_stat.st_size
+            return False
+        self.staged[key] = source
+        os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+        if self.is_current(source, target, source_stat):
+            self.counts["skipped"] += 1
+            self.bytes_saved += source_stat.st_size
+            return True
+        temp_path = f"{target}.staging-{uuid.uuid4().hex[:8]}"
+        try:
+            os.link(source, temp_path)
+            method = "hardlink"
+        except OSError:
+            if reflink_file(source, temp_path):
+                method = "reflink"
+            else:
+                shutil.copy2(source, temp_path)
+                method = "copy"
+        os.replace(temp_path, target)
+        self.counts[method] += 1
+        if method == "copy":
+            self.bytes_copied += source_stat.st_size
+        else:
+            self.bytes_saved += source_stat.st_size
+        return True
+
+    def stage_tree(self, source_directory, target_directory):
+        """
+        Stage every file below `source_directory` into `target_directory`.
+
+        :return: Target-paths of the files staged by this call.
+        """
+        staged = []
+        for root, _, files in os.walk(source_directory):
+            relative_root = os.path.relpath(root, source_directory)
+            for file in files:
+                target = os.path.normpath(
+                    os.path.join(target_directory, relative_root, file)
+                )
+                if self.stage_file(os.path.join(root, file), target):
+                    staged.append(target)
+        return staged
+
+    def summary(self):
+        return (
+            f"{len(self.staged)} files ("
+            + ", ".join(f"{count} {name}" for name, count in self.counts.items())
+            + f"); {self.bytes_copied} bytes copied, {self.bytes_saved} bytes saved"
+        )
@@ -0,0 +1,105 @@
+import os
+import re
+import shutil
+import hashlib
+import logging
+from obsidianknittrpy.modules.utils.link_tree import link_directory, move_into_place
+
+
+class ExecutionCache:
+    """
+    Persistent chunk-cache of knitr and Jupyter, kept outside the run-scoped working directory.
+
+    Every run gets a fresh, run-unique working directory, so caches Quarto keeps next to the
+    rendered document could never be reused. Instead, every manuscript gets its own directory in the
+    application-directory, identified by its resolved path:
+
+    ```
+    <cache_directory>/
+        <note-name>-<hash of manuscript path>/
+            manuscript.txt          # path of the manuscript, for humans
+            <format>/
+                knitr/              # `knitr.opts_chunk.cache.path`
+                jupyter/            # linked into the render-directory as `.jupyter_cache`
+                files/<stem>_files  # figures of cached chunks, restored before rendering
+    ```
+
+    The format's metadata enables `execute: cache`, so chunks only re-execute when their
+    code changes. knitr does not cache the figures of a chunk, so these are kept as well.
+    This requires stable names of the temporary qmd-files (see `RunWorkspace.temp_file_name()`).
+
+    Quarto's `freeze` is not set: it is only honoured when rendering projects, not single files.
+    """
+
+    def __init__(self, cache_directory, manuscript_path, loglevel=None):
+        self.logger = logging.getLogger(
+            self.__class__.__module__ + "." + self.__class__.__qualname__
+        )
+        self.logger.setLevel(loglevel)
+        manuscript_path = os.path.normcase(os.path.realpath(manuscript_path))
+        digest = hashlib.sha256(manuscript_path.encode("utf-8")).hexdigest()[:12]
+        name = re.sub(
+            r"[^\w-]+", "_", os.path.splitext(os.path.basename(manuscript_path))[0]
+        )
+        self.manuscript_path = manuscript_path
+        self.directory = os.path.join(cache_directory, f"{name[:40]}-{digest}")
+
+    def format_directory(self, format_name):
+        return os.path.join(self.directory, format_name.replace("::", "_"))
+
+    def metadata(self, format_name, parameters=None):
+        """
+        Return the execution-options enabling the cache, merged into the format's `parameters`.
+
+        Options set explicitly in `parameters` are kept.
+        """
+        parameters = dict(parameters) if parameters else {}
+        execute = dict(parameters.get("execute") or {})
+        execute.setdefault("cache", True)
+        knitr = dict(parameters.get("knitr") or {})
+        opts_chunk = dict(knitr.get("opts_chunk") or {})
+        opts_chunk.setdefault(
+            "cache.path",
+            os.path.join(self.format_directory(format_name), "knitr").replace(
+                "\\", "/"
+            )
+            + "/",
+        )
+        knitr["opts_chunk"] = opts_chunk
+        parameters["execute"] = execute
+        parameters["knitr"] = knitr
+        return parameters
+
+    def prepare(self, format_name, render_directory, temp_file_path):
+        """Make the cached state of `format_name` available in its render-directory."""
+        format_directory = self.format_directory(format_name)
+        for name in ["knitr", "jupyter", "files"]:
+            os.makedirs(os.path.join(format_directory, name), exist_ok=True)
+        with open(
+            os.path.join(self.directory, "manuscript.txt"), "w", encoding="utf-8"
+        ) as f:
+            f.write(self.manuscript_path)
+        jupyter_cache = os.path.join(render_directory, ".jupyter_cache")
+        if not os.path.lexists(jupyter_cache):
+            link_directory(os.path.join(format_directory, "jupyter"), jupyter_cache)
+        files_name = os.path.splitext(os.path.basename(temp_file_path))[0] + "_files"
+        cached_files = os.path.join(format_directory, "files", files_name)
+        if os.path.isdir(cached_files):
+            shutil.copytree(
+                cached_files,
+                os.path.join(render_directory, files_name),
+                dirs_exist_ok=True,
+            )
+            self.logger.debug(f"Restored cached chunk-figures of '{format_name}'.")
+
+    def persist(self, format_name, render_directory, temp_file_path):
+        """Keep the chunk-figures of a successful render for the next run."""
+        files_name = os.path.splitext(os.path.basename(temp_file_path))[0] + "_files"
+        rendered_files = os.path.join(render_directory, files_name)
+        if not os.path.isdir(rendered_files):
+            return
+        cached_files = os.path.join(self.format_directory(format_name), "files")
+        staging = os.path.join(cached_files, files_name + ".staging")
+        shutil.rmtree(staging, ignore_errors=True)
+        shutil.copytree(rendered_files, staging)
+        move_into_place(staging, os.path.join(cached_files, files_name))
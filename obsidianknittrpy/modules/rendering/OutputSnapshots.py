@@ -0,0 +1,190 @@
+import os
+import re
+import time
+import uuid
+import shutil
+import hashlib
+import datetime
+import logging
+from obsidianknittrpy.modules.utils.link_tree import reflink_file
+
+
+class OutputSnapshots:
+    """
+    Incremental snapshots of rendered outputs, taken before they are re-rendered.
+
+    Every manuscript gets its own directory of timestamped snapshots in the application-directory:
+
+    ```
+    <backup_directory>/
+        <note-name>-<hash of manuscript path>/
+            20250121T194759-1a2b/
+                quarto_html/index.html
+                quarto_html/index_files/...
+                quarto_pdf/index.pdf
+    ```
+
+    Like `rsync --link-dest`, files which did not change since the latest snapshot (same size
+    and modification-time) are hardlinked to it, so unchanged outputs cost neither time nor disk.
+    Changed files are cloned copy-on-write where possible, and copied otherwise; outputs are never
+    linked themselves, as a re-render must not modify their snapshot. A snapshot which would be
+    identical to the latest one is not kept.
+
+    Snapshots are assembled in a `.incomplete`-directory and renamed once complete. Only the
+    newest `keep` snapshots are retained, and of those only the ones younger than `max_age_days`;
+    the newest snapshot is always kept.
+    """
+
+    def __init__(
+        self, backup_directory, manuscript_path, keep=10, max_age_days=None, loglevel=None
+    ):
+        self.logger = logging.getLogger(
+            self.__class__.__module__ + "." + self.__class__.__qualname__
+        )
+        self.logger.setLevel(loglevel)
+        manuscript_path = os.path.normcase(os.path.realpath(manuscript_path))
+        digest = hashlib.sha256(manuscript_path.encode("utf-8")).hexdigest()[:12]
+        name = re.sub(
+            r"[^\w-]+", "_", os.path.splitext(os.path.basename(manuscript_path))[0]
+        )
+        self.directory = os.path.join(backup_directory, f"{name[:40]}-{digest}")
+        self.keep = max(1, keep)
+        self.max_age_days = max_age_days
+        self.counts = {"hardlink": 0, "reflink": 0, "copy": 0}
+        self.bytes_copied = 0
+
+    def snapshots(self):
+        """Paths of the complete snapshots, oldest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            entry.path
+            for entry in os.scandir(self.directory)
+            if entry.is_dir() and ".incomplete" not in entry.name
+        )
+
+    @staticmethod
+    def _walk(path):
+        """Yield `(source, path relative to path's parent)` of every file of a file or directory."""
+        if os.path.isfile(path):
+            yield path, os.path.basename(path)
+            return
+        parent = os.path.dirname(path)
+        for root, _, files in os.walk(path):
+            for file in files:
+                source = os.path.join(root, file)
+                yield source, os.path.relpath(source, parent)
+
+    @staticmethod
+    def is_unchanged(source_stat, previous):
+        if previous is None:
+            return False
+        try:
+            previous_stat = os.stat(previous)
+        except OSError:
+            return False
+        return (
+            previous_stat.st_size == source_stat.st_size
+            and previous_stat.st_mtime_ns == source_stat.st_mtime_ns
+        )
+
+    def _store(self, source, target, previous):
+        source_stat = os.stat(source)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if self.is_unchanged(source_stat, previous):
+            try:
+                os.link(previous, target)
+                self.counts["hardlink"] += 1
+                return "hardlink"
+            except OSError:
+                pass
+        if reflink_file(source, target):
+            self.counts["reflink"] += 1
+            return "reflink"
+        shutil.copy2(source, target)
+        self.counts["copy"] += 1
+        self.bytes_copied += source_stat.st_size
+        return "copy"
+
+    def snapshot(self, outputs):
+        """
+        Snapshot the outputs which currently exist.
+
+        :param outputs: Dict mapping a label (e.g. the format-name) to the files or directories to keep.
+        :return: Path of the new snapshot; of the latest one if nothing changed; `None` if no output exists.
+        """
+        sources = [
+            (label, path)
+            for label, paths in outputs.items()
+            for path in paths
+            if path and os.path.exists(path)
+        ]
+        if not sources:
+            return None
+        start_time = time.time()
+        snapshots = self.snapshots()
+        latest = snapshots[-1] if snapshots else None
+        files = [
+            (source, os.path.join(label.replace("::", "_"), relative))
+            for label, path in sources
+            for source, relative in self._walk(path)
+        ]
+        if (
+            latest is not None
+            and len(files) == self.count_files(latest)
+            and all(
+                self.is_unchanged(os.stat(source), os.path.join(latest, relative))
+                for source, relative in files
+            )
+        ):
+            self.logger.info(f"Outputs are unchanged since snapshot '{latest}'.")
+            return latest
+        name = (
+            datetime.datetime.now().strftime("%Y%m%dT%H%M%S")
+            + f"-{uuid.uuid4().hex[:4]}"
+        )
+        staging = os.path.join(self.directory, name + ".incomplete")
+        os.makedirs(staging)
+        stored = 0
+        changed = 0
+        for source, relative in files:
+            previous = os.path.join(latest, relative) if latest else None
+            try:
+                method = self._store(source, os.path.join(staging, relative), previous)
+            except OSError as e:
+                self.logger.warning(f"Could not back up '{source}': {e}")
+                continue
+            stored += 1
+            changed += method != "hardlink"
+        target = os.path.join(self.directory, name)
+        os.replace(staging, target)
+        self.logger.info(
+            f"Backed up {stored} files ({changed} changed) to '{target}' in {time.time() - start_time:.3f}s."
+        )
+        self.prune()
+        return target
+
+    @staticmethod
+    def count_files(path):
+        return sum(len(files) for _, _, files in os.walk(path))
+
+    def prune(self):
+        """Remove snapshots beyond the retention-policy, and leftovers of interrupted snapshots."""
+        removed = []
+        snapshots = self.snapshots()
+        expired = snapshots[: -self.keep]
+        if self.max_age_days is not None:
+            cutoff = time.time() - self.max_age_days * 86400
+            expired += [
+                path
+                for path in snapshots[-self.keep : -1]
+                if os.stat(path).st_mtime < cutoff
+            ]
+        for entry in os.scandir(self.directory):
+            if ".incomplete" in entry.name and entry.stat().st_mtime < time.time() - 3600:
+                expired.append(entry.path)
+        for path in expired:
+            shutil.rmtree(path, ignore_errors=True)
+            removed.append(path)
+            self.logger.debug(f"Removed snapshot '{path}'.")
+        return removed
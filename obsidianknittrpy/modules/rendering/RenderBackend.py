@@ -0,0 +1,454 @@
+import os
+import re
+import sys
+import shutil
+import logging
+import datetime
+import subprocess
+import yaml
+from abc import ABC, abstractmethod
+from obsidianknittrpy.modules.utils import yaml_io
+
+
+CHUNK_PATTERN = re.compile(r"^[ \t]*(?:`{3,}|~{3,})[ \t]*\{[ \t]*([A-Za-z][\w-]*)", re.M)
+INLINE_CHUNK_PATTERN = re.compile(r"`\{?(?:r|python|julia|ojs)\}?[ \t][^`\n]+`")
+QUARTO_SYNTAX_PATTERNS = {
+    "shortcodes": re.compile(r"\{\{<"),
+    "cross-references": re.compile(
+        r"@(?:fig|tbl|sec|eq|lst|thm|lem|cor|prp|cnj|def|exm|exr)-|\{#(?:fig|tbl|sec|eq|lst)-"
+    ),
+    "callouts or layout-divs": re.compile(
+        r"^:{3,}.*\.(?:callout|panel-|column-)", re.M
+    ),
+}
+
+
+def parse_frontmatter(text):
+    """Return the YAML-frontmatter of a markdown-string as a dict (empty if there is none or it is invalid)."""
+    if not text.startswith("---"):
+        return {}
+    end = text.find("\n---", 3)
+    if end == -1:
+        return {}
+    try:
+        frontmatter = yaml_io.safe_load(text[3:end])
+    except yaml.YAMLError:
+        return {}
+    return frontmatter if isinstance(frontmatter, dict) else {}
+
+
+def quarto_requirements(file_string):
+    """
+    List the reasons a document has to be rendered by Quarto instead of Pandoc.
+
+    Executable chunks (`{r}`, `{python}`, ...) need Quarto's execution-engines, and diagram-chunks
+    (`{mermaid}`, `{dot}`, as written by `ProcessDiagramCodeblocks`) are only rendered by Quarto.
+    Shortcodes, cross-references, callouts, extension-filters and per-format options in the
+    frontmatter are Quarto-features Pandoc does not know either.
+
+    :return: List of reasons; empty if the document can be rendered by Pandoc.
+    """
+    reasons = []
+    chunks = sorted(set(CHUNK_PATTERN.findall(file_string)))
+    if chunks:
+        reasons.append(f"chunks ({", ".join(chunks)})")
+    if INLINE_CHUNK_PATTERN.search(file_string):
+        reasons.append("inline code")
+    for reason, pattern in QUARTO_SYNTAX_PATTERNS.items():
+        if pattern.search(file_string):
+            reasons.append(reason)
+    frontmatter = parse_frontmatter(file_string)
+    filters = frontmatter.get("filters") or []
+    if any(
+        not (isinstance(f, str) and f.endswith(".lua"))
+        for f in (filters if isinstance(filters, list) else [filters])
+    ):
+        reasons.append("extension-filters")
+    if isinstance(frontmatter.get("format"), dict):
+        reasons.append("per-format options")
+    if any(key in frontmatter for key in ["engine", "jupyter", "knitr"]):
+        reasons.append("execution-engine options")
+    return reasons
+
+
+class RenderBackend(ABC):
+    """
+    Turns a temporary qmd-file into a single output-format.
+
+    Backends only construct and run commands; scheduling, caching and dependency-staging
+    are handled by the rendering-pipelines, so every backend benefits from them.
+
+    Subclasses implement `command()`, `version_command()` and `group_commands()`. `commands()`
+    returns the commands to try in order, each one a fallback of the previous; it is what the
+    pipelines' `RenderExecutor` runs. `render()` runs them synchronously in the given directory
+    and raises `subprocess.CalledProcessError` if the last one fails.
+    """
+
+    name = ""
+
+    def __init__(self, loglevel=None):
+        self.logger = logging.getLogger(
+            self.__class__.__module__ + "." + self.__class__.__qualname__
+        )
+        self.logger.setLevel(loglevel)
+        self._version = None
+
+    @abstractmethod
+    def command(self, input_path, format_suffix, metadata_file, output_name):
+        """Return the command rendering `input_path` to `output_name` (relative to the working directory)."""
+
+    @abstractmethod
+    def version_command(self):
+        """Return the command printing the backend's version, see `version()`."""
+
+    def version(self):
+        """Return the backend's version-string, queried once per instance."""
+        if self._version is None:
+            try:
+                result = subprocess.run(
+                    self.version_command(), capture_output=True, text=True
+                )
+                output = result.stdout.strip().splitlines()
+                version = output[0] if output else ""
+                if not version.startswith(self.name):  # `pandoc --version` names itself, `quarto --version` does not
+                    version = f"{self.name} {version}".strip()
+                self._version = version
+            except OSError:
+                self._version = f"{self.name} <unavailable>"
+        return self._version
+
+    def commands(self, input_path, format_suffix, metadata_file, output_name):
+        """Return the commands to try in order; each one is a fallback of the previous."""
+        return [self.command(input_path, format_suffix, metadata_file, output_name)]
+
+    @staticmethod
+    def run_commands(commands, cwd):
+        for index, command in enumerate(commands):
+            try:
+                subprocess.run(command, check=True, cwd=cwd)
+                return
+            except (subprocess.CalledProcessError, OSError):
+                if index == len(commands) - 1:
+                    raise
+
+    def render(self, input_path, format_suffix, metadata_file, output_name, cwd):
+        self.run_commands(
+            self.commands(input_path, format_suffix, metadata_file, output_name), cwd
+        )
+
+    def can_group(self, file_string):
+        """Check if this backend renders `file_string` via Quarto, so that `group_commands()` can be used."""
+        return False
+
+    @abstractmethod
+    def group_commands(self, input_path, format_suffixes):
+        """
+        Return the commands rendering `input_path` to several formats with a single invocation.
+
+        Output-names and format-options are read from the `format`-metadata of the document.
+        Only called if `can_group()` is true for the document.
+        """
+
+    def render_group(self, input_path, format_suffixes, cwd):
+        self.run_commands(self.group_commands(input_path, format_suffixes), cwd)
+
+
+class QuartoBackend(RenderBackend):
+    """Renders via `quarto render`."""
+
+    name = "quarto"
+
+    def command(self, input_path, format_suffix, metadata_file, output_name):
+        return [
+            "quarto",
+            "render",
+            input_path,
+            "--to",
+            format_suffix,
+            "--metadata-file",
+            metadata_file,
+            "--output",
+            output_name,
+        ]
+
+    def version_command(self):
+        return ["quarto", "--version"]
+
+    def can_group(self, file_string):
+        return True
+
+    def group_commands(self, input_path, format_suffixes):
+        return [["quarto", "render", input_path, "--to", ",".join(format_suffixes)]]
+
+
+class PandocBackend(RenderBackend):
+    """
+    Renders via Pandoc directly, skipping Quarto's startup and its execution-engines.
+
+    Uses `pandoc` if it is on the PATH, and the copy bundled with Quarto (`quarto pandoc`)
+    otherwise.
+
+    Quarto accepts format-options (`toc`, `number-sections`, `reference-doc`, ...) as metadata,
+    Pandoc only as options. The format's metadata-file and the document's frontmatter are
+    therefore translated into a Pandoc defaults-file (`<input>.defaults.yaml`):
+
+    - options listed in `writer_options` become Pandoc-options
+    - Lua-filters listed under `filters` are passed as filters, and citeproc is enabled if a
+      bibliography is declared
+    - dynamic dates (`now`, `today`) are resolved using `date-format`
+    - everything else is passed as metadata
+
+    Documents for which `quarto_requirements()` lists reasons cannot be rendered by this backend.
+    """
+
+    name = "pandoc"
+    format_names = {"pdf": "latex", "docx": "docx", "html": "html5", "odt": "odt"}
+    writer_options = {
+        "toc": "table-of-contents",
+        "toc-depth": "toc-depth",
+        "number-sections": "number-sections",
+        "number-offset": "number-offset",
+        "shift-heading-level-by": "shift-heading-level-by",
+        "reference-doc": "reference-doc",
+        "pdf-engine": "pdf-engine",
+        "pdf-engine-opt": "pdf-engine-opts",
+        "embed-resources": "embed-resources",
+        "email-obfuscation": "email-obfuscation",
+    }
+    date_tokens = {"YYYY": "%Y", "YY": "%y", "MM": "%m", "DD": "%d"}
+
+    def executable(self):
+        return ["pandoc"] if shutil.which("pandoc") else ["quarto", "pandoc"]
+
+    @staticmethod
+    def read_frontmatter(input_path):
+        with open(input_path, "r", encoding="utf-8") as f:
+            return parse_frontmatter(f.read())
+
+    def resolve_date(self, metadata):
+        """Replace Quarto's dynamic dates, which Pandoc would print verbatim."""
+        date_format = metadata.pop("date-format", "YYYY-MM-DD")
+        if metadata.get("date") in ["now", "today", "last-modified"]:
+            metadata["date"] = datetime.date.today().strftime(
+                re.sub(
+                    "YYYY|YY|MM|DD",
+                    lambda match: self.date_tokens[match.group()],
+                    str(date_format),
+                )
+            )
+
+    def defaults(self, input_path, format_suffix, metadata_file):
+        """Translate the format's metadata-file and the document's frontmatter into Pandoc-defaults."""
+        settings = {}
+        if metadata_file and os.path.exists(metadata_file):
+            loaded = yaml_io.load_file(metadata_file)
+            settings.update(loaded if isinstance(loaded, dict) else {})
+        settings.update(self.read_frontmatter(input_path))  # the document takes precedence
+        defaults = {
+            "from": "markdown",
+            "to": self.format_names.get(format_suffix, format_suffix),
+            "standalone": True,
+        }
+        for key, option in self.writer_options.items():
+            value = settings.pop(key, None)
+            if value is None or value == "" or value == []:
+                continue
+            if option == "pdf-engine-opts" and not isinstance(value, list):
+                value = [value]
+            defaults[option] = value
+        filters = settings.pop("filters", None) or []
+        defaults["filters"] = [
+            f
+            for f in (filters if isinstance(filters, list) else [filters])
+            if isinstance(f, str) and f.endswith(".lua")
+        ]
+        if settings.get("bibliography"):
+            defaults["citeproc"] = True
+        settings.pop("format", None)
+        self.resolve_date(settings)
+        defaults["metadata"] = settings
+        return defaults
+
+    def command(self, input_path, format_suffix, metadata_file, output_name):
+        """Write the defaults-file next to `input_path` and return the command using it."""
+        defaults_file = os.path.splitext(input_path)[0] + ".defaults.yaml"
+        yaml_io.write_file(
+            defaults_file,
+            self.defaults(input_path, format_suffix, metadata_file),
+            default_flow_style=False,
+        )
+        return self.executable() + [
+            input_path,
+            "--defaults",
+            defaults_file,
+            "--output",
+            output_name,
+        ]
+
+    def version_command(self):
+        return self.executable() + ["--version"]
+
+    def group_commands(self, input_path, format_suffixes):
+        """Pandoc writes a single format per invocation, so documents are never grouped."""
+        raise ValueError(
+            f"The '{self.name}'-backend cannot render several formats with one invocation."
+        )
+
+
+class FakeBackend(RenderBackend):
+    """
+    Deterministic stand-in engine for benchmarking and testing the rendering-orchestration.
+
+    Spawns a Python-process per render (so process-handling is exercised like for real
+    backends) which sleeps for `latency` seconds and writes an output of `output_size`
+    bytes, derived from the hash of the input- and metadata-file. Identical inputs
+    therefore produce byte-identical outputs.
+
+    `latency` is either a number of seconds, or a dict mapping file-suffixes (e.g. `pdf`) to seconds.
+    Grouped renders (see `group_commands()`) sleep for the summed latency of their formats.
+    """
+
+    name = "fake"
+    script = """
+import sys, time, hashlib
+input_path, metadata_file, output_name, latency, size = sys.argv[1:6]
+digest = hashlib.sha256()
+for path in [input_path, metadata_file]:
+    with open(path, "rb") as f:
+        digest.update(f.read())
+time.sleep(float(latency))
+block = digest.hexdigest().encode("ascii")
+size = int(size)
+with open(output_name, "wb") as f:
+    f.write((block * (size // len(block) + 1))[:size])
+"""
+    group_script = """
+import sys, time, hashlib, yaml
+input_path, latency, size = sys.argv[1:4]
+with open(input_path, "rb") as f:
+    text = f.read()
+options = yaml.safe_load(text[3 : text.find(b"\\n---", 3)])["format"]
+time.sleep(float(latency))
+block = hashlib.sha256(text).hexdigest().encode("ascii")
+size = int(size)
+for format_suffix in sys.argv[4:]:
+    with open(options[format_suffix]["output-file"], "wb") as f:
+        f.write((block * (size // len(block) + 1))[:size])
+"""
+
+    def __init__(self, latency=1.0, output_size=65536, loglevel=None):
+        super().__init__(loglevel=loglevel)
+        self.latency = latency
+        self.output_size = output_size
+
+    def latency_for(self, format_suffix):
+        if isinstance(self.latency, dict):
+            return self.latency.get(format_suffix, self.latency.get("default", 1.0))
+        return self.latency
+
+    def command(self, input_path, format_suffix, metadata_file, output_name):
+        return [
+            sys.executable,
+            "-c",
+            self.script,
+            input_path,
+            metadata_file,
+            output_name,
+            str(self.latency_for(format_suffix)),
+            str(self.output_size),
+        ]
+
+    def version_command(self):
+        return [sys.executable, "-c", "print('fake 1')"]
+
+    def version(self):
+        return f"fake 1 (latency={self.latency}, output_size={self.output_size})"
+
+    def group_commands(self, input_path, format_suffixes):
+        latency = sum(self.latency_for(suffix) for suffix in format_suffixes)
+        return [
+            [
+                sys.executable,
+                "-c",
+                self.group_script,
+                input_path,
+                str(latency),
+                str(self.output_size),
+            ]
+            + list(format_suffixes)
+        ]
+
+
+class AutoBackend(RenderBackend):
+    """
+    Renders documents without executable chunks or other Quarto-features via Pandoc, and all
+    others via Quarto.
+
+    The decision is made per format from the processed document, so a manuscript whose
+    code-chunks are stripped for some formats only pays for Quarto where it needs it. If Pandoc
+    is unavailable or fails, the format is rendered by Quarto instead.
+    """
+
+    name = "auto"
+
+    def __init__(self, loglevel=None):
+        super().__init__(loglevel=loglevel)
+        self.quarto = QuartoBackend(loglevel=loglevel)
+        self.pandoc = PandocBackend(loglevel=loglevel)
+
+    def version_command(self):
+        return self.quarto.version_command()
+
+    def version(self):
+        return f"auto ({self.quarto.version()}; {self.pandoc.version()})"
+
+    def can_group(self, file_string):
+        """Only documents requiring Quarto are grouped; the others are faster via Pandoc."""
+        return bool(quarto_requirements(file_string))
+
+    def group_commands(self, input_path, format_suffixes):
+        return self.quarto.group_commands(input_path, format_suffixes)
+
+    def command(self, input_path, format_suffix, metadata_file, output_name):
+        """Return the preferred command; `commands()` adds its fallback."""
+        return self.commands(input_path, format_suffix, metadata_file, output_name)[0]
+
+    def commands(self, input_path, format_suffix, metadata_file, output_name):
+        with open(input_path, "r", encoding="utf-8") as f:
+            reasons = quarto_requirements(f.read())
+        quarto_command = self.quarto.command(
+            input_path, format_suffix, metadata_file, output_name
+        )
+        if reasons:
+            self.logger.info(
+                f"Rendering '{output_name}' via Quarto, it requires: {", ".join(reasons)}."
+            )
+            return [quarto_command]
+        self.logger.info(
+            f"Rendering '{output_name}' via Pandoc, it contains no executable chunks."
+        )
+        return [
+            self.pandoc.command(input_path, format_suffix, metadata_file, output_name),
+            quarto_command,
+        ]
+
+
+RENDER_BACKENDS = {
+    "auto": AutoBackend,
+    "quarto": QuartoBackend,
+    "pandoc": PandocBackend,
+    "fake": FakeBackend,
+}
+
+
+def get_render_backend(name="auto", loglevel=None, **options):
+    """
+    Instantiate the render-backend registered under `name`.
+
+    :param options: Passed to the backend, e.g. `latency` and `output_size` for `fake`.
+    """
+    if name not in RENDER_BACKENDS:
+        raise ValueError(
+            f"Unknown render-backend '{name}'. Available backends: {list(RENDER_BACKENDS)}"
+        )
+    return RENDER_BACKENDS[name](loglevel=loglevel, **options)
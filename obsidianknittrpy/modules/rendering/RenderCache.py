@@ -0,0 +1,239 @@
+import os
+import re
+import json
+import time
+import shutil
+import hashlib
+import logging
+import tempfile
+from obsidianknittrpy.modules.utils.vault_links import extract_link_targets
+
+
+class RenderCache:
+    """
+    Content-addressed cache of rendered outputs.
+
+    A render is identified by the hash of everything which can influence its output:
+
+    - the format and the output-file's name
+    - the rendered `temp_*.qmd`
+    - the `<format>_config.yaml` passed via `--metadata-file`
+    - all resolved dependencies (bibliographies, csl-files, filter-extensions, images and
+      other local files referenced by the document)
+    - the version of the render-toolchain (e.g. `quarto --version`)
+
+    # Layout
+
+    ```
+    <cache_directory>/
+        <key[:2]>/<key>/
+            entry.json      # format, files, size; its mtime marks the last use
+            <output-file>
+            <output-stem>_files/
+    ```
+
+    Entries are written to a temporary directory first and renamed into place, so concurrent
+    runs never observe partial entries. Once the cache exceeds `max_size_mb`, the least
+    recently used entries are evicted.
+
+    If `bypass` is set, lookups always miss, but fresh renders are still stored.
+    """
+
+    def __init__(self, cache_directory, max_size_mb=2048, bypass=False, loglevel=None):
+        self.logger = logging.getLogger(
+            self.__class__.__module__ + "." + self.__class__.__qualname__
+        )
+        self.logger.setLevel(loglevel)
+        self.cache_directory = cache_directory
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self.bypass = bypass
+        self.hits = 0
+        self.misses = 0
+        self._referenced_files = {}
+        self._dependency_digests = {}
+
+    @staticmethod
+    def _hash_file(path, digest):
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+
+    def referenced_files(self, file_string, working_directory):
+        """
+        Collect local files a document depends on: link- and embed-targets, plus quoted
+        relative paths (e.g. `read.csv("data/x.csv")`) which exist below `working_directory`.
+
+        Formats usually share their file-string, so results are kept for the lifetime of the cache-instance.
+        """
+        memo_key = (file_string, working_directory)
+        if memo_key not in self._referenced_files:
+            self._referenced_files[memo_key] = self._collect_referenced_files(
+                file_string, working_directory
+            )
+        return list(self._referenced_files[memo_key])
+
+    @staticmethod
+    def _collect_referenced_files(file_string, working_directory):
+        candidates = set(extract_link_targets(file_string))
+        candidates.update(re.findall(r"[\"']([^\"'\n]{1,260})[\"']", file_string))
+        files = set()
+        for candidate in candidates:
+            if os.path.isabs(candidate) or "://" in candidate:
+                continue
+            path = os.path.normpath(os.path.join(working_directory, candidate))
+            if os.path.isfile(path):
+                files.add(path)
+            elif os.path.isdir(path) and os.path.basename(path) == "_extensions":
+                for root, _, filenames in os.walk(path):
+                    files.update(os.path.join(root, f) for f in filenames)
+        return sorted(files)
+
+    def compute_key(self, format_name, output_name, file_paths, dependencies, toolchain):
+        """
+        Compute the cache-key of a render.
+
+        :param file_paths: Files whose contents are hashed verbatim (the qmd and its metadata-file).
+        :param dependencies: Dependency-files; missing files are hashed as missing.
+        :param toolchain: Version-string of the render-toolchain.
+        """
+        digest = hashlib.sha256()
+        for part in [format_name, output_name, toolchain]:
+            digest.update(str(part).encode("utf-8") + b"\0")
+        for path in file_paths:
+            self._hash_file(path, digest)
+            digest.update(b"\0")
+        digest.update(self.dependency_digest(dependencies))
+        return digest.hexdigest()
+
+    def dependency_digest(self, dependencies):
+        """
+        Hash the dependency-files. Formats sharing a file-string share their dependencies, which
+        are staged before rendering starts, so the digest is computed once per distinct set.
+        """
+        dependencies = tuple(sorted(set(dependencies)))
+        if dependencies not in self._dependency_digests:
+            digest = hashlib.sha256()
+            for path in dependencies:
+                digest.update(os.path.basename(path).encode("utf-8") + b"\0")
+                if os.path.isfile(path):
+                    self._hash_file(path, digest)
+                else:
+                    digest.update(b"<missing>")
+                digest.update(b"\0")
+            self._dependency_digests[dependencies] = digest.digest()
+        return self._dependency_digests[dependencies]
+
+    def _entry_directory(self, key):
+        return os.path.join(self.cache_directory, key[:2], key)
+
+    def restore(self, key, target_directory):
+        """
+        Copy the outputs cached under `key` into `target_directory`.
+
+        :return: The restored output-file's path, or `None` on a miss.
+        """
+        if self.bypass:
+            return None
+        entry_directory = self._entry_directory(key)
+        entry_path = os.path.join(entry_directory, "entry.json")
+        try:
+            with open(entry_path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self.misses += 1
+            return None
+        for name in entry["files"]:
+            source = os.path.join(entry_directory, name)
+            target = os.path.join(target_directory, name)
+            if os.path.isdir(source):
+                shutil.copytree(source, target, dirs_exist_ok=True)
+            else:
+                shutil.copy2(source, target)
+        os.utime(entry_path)  # mark as recently used
+        self.hits += 1
+        return os.path.join(target_directory, entry["output"])
+
+    def store(self, key, format_name, output_path, support_paths=()):
+        """
+        Store a freshly rendered output under `key`.
+
+        :param support_paths: Additional files or folders next to the output which belong to it,
+                              e.g. the `<stem>_files`-folder of html-outputs. Missing paths are skipped.
+        """
+        entry_directory = self._entry_directory(key)
+        if os.path.exists(entry_directory):
+            return
+        output_name = os.path.basename(output_path)
+        names = [output_name]
+        for support_path in support_paths:
+            if os.path.exists(support_path):
+                names.append(os.path.basename(support_path))
+        os.makedirs(os.path.dirname(entry_directory), exist_ok=True)
+        temp_directory = tempfile.mkdtemp(dir=os.path.dirname(entry_directory))
+        try:
+            size = 0
+            for name in names:
+                source = os.path.join(os.path.dirname(output_path), name)
+                target = os.path.join(temp_directory, name)
+                if os.path.isdir(source):
+                    shutil.copytree(source, target)
+                    for root, _, filenames in os.walk(target):
+                        size += sum(
+                            os.path.getsize(os.path.join(root, f)) for f in filenames
+                        )
+                else:
+                    shutil.copy2(source, target)
+                    size += os.path.getsize(target)
+            with open(
+                os.path.join(temp_directory, "entry.json"), "w", encoding="utf-8"
+            ) as f:
+                json.dump(
+                    {
+                        "format": format_name,
+                        "output": output_name,
+                        "files": names,
+                        "size": size,
+                        "created": time.time(),
+                    },
+                    f,
+                )
+            os.replace(temp_directory, entry_directory)
+        except OSError as e:
+            shutil.rmtree(temp_directory, ignore_errors=True)
+            if not os.path.exists(entry_directory):  # not stored concurrently by another run
+                self.logger.warning(f"Render of '{format_name}' was not cached: {e}")
+            return
+        self.logger.debug(f"Cached render of '{format_name}' under {key[:12]}.")
+        self.evict()
+
+    def entries(self):
+        """Return `(last_used, size, entry_directory)` for every cached entry."""
+        entries = []
+        if not os.path.isdir(self.cache_directory):
+            return entries
+        for shard in os.scandir(self.cache_directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                entry_path = os.path.join(entry.path, "entry.json")
+                try:
+                    with open(entry_path, "r", encoding="utf-8") as f:
+                        size = json.load(f)["size"]
+                    entries.append((os.path.getmtime(entry_path), size, entry.path))
+                except (OSError, ValueError, KeyError):
+                    continue  # temporary directories of in-flight stores
+        return entries
+
+    def evict(self):
+        """Remove the least recently used entries until the cache fits into `max_size`."""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        while entries and total > self.max_size:
+            _, size, entry_directory = entries.pop(0)
+            shutil.rmtree(entry_directory, ignore_errors=True)
+            total -= size
+            evicted += 1
+        if evicted:
+            self.logger.info(f"Evicted {evicted} render-cache entries.")
+        return evicted
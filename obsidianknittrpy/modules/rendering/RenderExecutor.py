@@ -0,0 +1,247 @@
+import os
+import re
+import time
+import asyncio
+import logging
+
+from obsidianknittrpy.modules.utils.process_stream import (
+    kill_process_tree,
+    process_group_kwargs,
+)
+
+
+class RenderResult:
+    """
+    Outcome of rendering a single format.
+
+    `status` is one of `rendered`, `restored` (from the render-cache), `failed`, `timeout` and `cancelled`.
+    """
+
+    def __init__(
+        self,
+        format_name,
+        status,
+        exit_code=None,
+        duration=0.0,
+        output_path=None,
+        warnings=None,
+        log_path=None,
+    ):
+        self.format_name = format_name
+        self.status = status
+        self.exit_code = exit_code
+        self.duration = duration
+        self.output_path = output_path
+        self.warnings = warnings if warnings else []
+        self.log_path = log_path
+
+    @property
+    def ok(self):
+        return self.status in ["rendered", "restored"]
+
+    def to_dict(self):
+        return {
+            "format": self.format_name,
+            "status": self.status,
+            "exit_code": self.exit_code,
+            "duration": round(self.duration, 3),
+            "output_path": self.output_path,
+            "warnings": self.warnings,
+            "log_path": self.log_path,
+        }
+
+    def __repr__(self):
+        return f"RenderResult({self.format_name!r}, {self.status!r}, exit_code={self.exit_code})"
+
+
+class RenderExecutor:
+    """
+    Runs render-commands as asyncio-subprocesses.
+
+    The combined stdout and stderr of every command is written to `<log_directory>/<format>.log`
+    while it runs. Progress (`[ 3/12]`-counters and `NN%`-bars of knitr and Quarto) is parsed
+    from it and logged whenever it advances; warnings are collected into the `RenderResult`.
+
+    # Timeouts and cancellation
+
+    `timeout` is a number of seconds, or a dict mapping file-suffixes (e.g. `pdf`) to seconds,
+    with an optional `default`. Commands exceeding it are killed. Every command runs in its own
+    process-group, which is killed as a whole, so that children (e.g. deno, R or pandoc spawned by
+    Quarto) do not survive it and keep its output open.
+
+    `cancel()` may be called from any thread (e.g. when the GUI is closed): running commands are
+    killed, and commands which have not started yet are not started. Interrupting the process
+    (Ctrl+C) kills running commands as well.
+    """
+
+    progress_patterns = [
+        re.compile(r"\[\s*(\d+)\s*/\s*(\d+)\s*\]"),
+        re.compile(r"(\d{1,3})%"),
+    ]
+    warning_pattern = re.compile(r"^\s*(?:\[?WARN(?:ING)?\]?\b|Warning( message)?:)", re.I)
+
+    def __init__(self, log_directory=None, timeout=None, on_progress=None, loglevel=None):
+        self.logger = logging.getLogger(
+            self.__class__.__module__ + "." + self.__class__.__qualname__
+        )
+        self.logger.setLevel(loglevel)
+        self.log_directory = log_directory
+        self.timeout = timeout
+        self.on_progress = on_progress
+        self.cancelled = False
+        self._loop = None
+        self._processes = set()
+
+    def timeout_for(self, cost_key):
+        if isinstance(self.timeout, dict):
+            return self.timeout.get(cost_key, self.timeout.get("default"))
+        return self.timeout
+
+    def run(self, coroutine):
+        """Run `coroutine` on a new event-loop and return its result."""
+
+        async def main():
+            self._loop = asyncio.get_running_loop()
+            try:
+                return await coroutine
+            finally:
+                self._loop = None
+
+        return asyncio.run(main())
+
+    def cancel(self):
+        """Kill running commands and prevent further ones from starting. Thread-safe."""
+        self.cancelled = True
+        loop = self._loop
+        if loop is not None:
+            loop.call_soon_threadsafe(self._kill_all)
+
+    def _kill_all(self):
+        for process in list(self._processes):
+            self._kill(process)
+
+    @staticmethod
+    def _kill(process):
+        """Kill `process` with all of its children, so none of them keeps the output-pipe open."""
+        if not kill_process_tree(process.pid, force=True) and process.returncode is None:
+            process.kill()
+
+    def parse_progress(self, line):
+        """Return the progress in percent a line reports, or `None`."""
+        for pattern in self.progress_patterns:
+            match = pattern.search(line)
+            if match is None:
+                continue
+            if len(match.groups()) == 2:
+                done, total = (int(group) for group in match.groups())
+                return int(100 * done / total) if total else None
+            return min(int(match.group(1)), 100)
+        return None
+
+    async def _pump(self, name, stream, log_file, warnings):
+        progress = None
+        while True:
+            try:
+                raw = await stream.readline()
+            except ValueError:  # line exceeds the buffer-limit; skip its remainder
+                raw = await stream.read(2**16)
+            if not raw:
+                break
+            line = raw.decode("utf-8", errors="replace").rstrip()
+            if log_file is not None:
+                log_file.write(line + "\n")
+                log_file.flush()
+            if self.warning_pattern.search(line):
+                warnings.append(line.strip())
+            percent = self.parse_progress(line)
+            if percent is not None and percent != progress:
+                progress = percent
+                self.logger.info(f"{name}: {percent}%")
+                if self.on_progress is not None:
+                    self.on_progress(name, percent, line)
+
+    async def run_command(self, name, command, cwd, timeout, log_file, warnings):
+        """
+        Run a single command.
+
+        :return: `(status, exit_code)`, where status is `rendered`, `failed`, `timeout` or `cancelled`.
+        """
+        if log_file is not None:
+            log_file.write(f"$ {" ".join(command)}\n")
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *command,
+                cwd=cwd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                limit=2**20,
+                **process_group_kwargs(),
+            )
+        except OSError as e:
+            warnings.append(f"Could not start '{command[0]}': {e}")
+            return "failed", None
+        self._processes.add(process)
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(
+                    self._pump(name, process.stdout, log_file, warnings),
+                    process.wait(),
+                ),
+                timeout,
+            )
+        except asyncio.TimeoutError:
+            self._kill(process)
+            await process.wait()
+            return "timeout", process.returncode
+        except asyncio.CancelledError:
+            self._kill(process)
+            raise
+        finally:
+            self._processes.discard(process)
+        if process.returncode != 0:
+            return ("cancelled" if self.cancelled else "failed"), process.returncode
+        return "rendered", 0
+
+    async def execute(self, name, commands, cwd, timeout=None):
+        """
+        Run `commands` one after another until one succeeds; later commands are fallbacks of earlier ones.
+
+        :return: `RenderResult` without `output_path`.
+        """
+        log_path = None
+        log_file = None
+        if self.log_directory is not None:
+            os.makedirs(self.log_directory, exist_ok=True)
+            log_path = os.path.join(
+                self.log_directory, f"{name.replace("::", "_")}.log"
+            )
+            log_file = open(log_path, "w", encoding="utf-8")
+        warnings = []
+        status, exit_code = "cancelled", None
+        start_time = time.time()
+        try:
+            for index, command in enumerate(commands):
+                if self.cancelled:
+                    status, exit_code = "cancelled", None
+                    break
+                status, exit_code = await self.run_command(
+                    name, command, cwd, timeout, log_file, warnings
+                )
+                if status != "failed" or index == len(commands) - 1:
+                    break
+                self.logger.warning(
+                    f"'{command[0]}' failed to render {name} (exit code {exit_code}), falling back to '{commands[index + 1][0]}'."
+                )
+        finally:
+            if log_file is not None:
+                log_file.close()
+        for warning in warnings:
+            self.logger.warning(f"{name}: {warning}")
+        return RenderResult(
+            name,
+            status,
+            exit_code=exit_code,
+            duration=time.time() - start_time,
+            warnings=warnings,
+            log_path=log_path,
+        )
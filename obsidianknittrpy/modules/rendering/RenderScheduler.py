@@ -0,0 +1,185 @@
+import os
+import time
+import asyncio
+import logging
+from obsidianknittrpy.modules.core.TimingHistory import TimingHistory
+
+
+def total_memory_gb():
+    """Return the installed memory in GB, or `None` if it cannot be determined without extra dependencies."""
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") / 1024**3
+    except (AttributeError, ValueError, OSError):
+        pass
+    try:
+        import ctypes
+
+        class MEMORYSTATUSEX(ctypes.Structure):
+            _fields_ = [
+                ("dwLength", ctypes.c_ulong),
+                ("dwMemoryLoad", ctypes.c_ulong),
+                ("ullTotalPhys", ctypes.c_ulonglong),
+                ("ullAvailPhys", ctypes.c_ulonglong),
+                ("ullTotalPageFile", ctypes.c_ulonglong),
+                ("ullAvailPageFile", ctypes.c_ulonglong),
+                ("ullTotalVirtual", ctypes.c_ulonglong),
+                ("ullAvailVirtual", ctypes.c_ulonglong),
+                ("sullAvailExtendedVirtual", ctypes.c_ulonglong),
+            ]
+
+        status = MEMORYSTATUSEX()
+        status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return status.ullTotalPhys / 1024**3
+    except (AttributeError, OSError):
+        pass
+    return None
+
+
+class RenderScheduler:
+    """
+    Runs render-jobs concurrently on an asyncio event-loop, bounded by both a job-count and a cost-budget.
+
+    # Admission
+
+    Every job has a cost, looked up from `cost_weights` by its cost-key (the format's
+    file-suffix, e.g. `pdf`). A job only starts if fewer than `max_concurrency` jobs are
+    running and the summed cost of the running jobs plus its own stays within `capacity`.
+    A job is always admitted if nothing else is running, so expensive jobs cannot starve.
+
+    By default, `max_concurrency` is the number of CPUs, and `capacity` is the smaller of
+    CPU-count and installed memory in GB (one cost-unit is roughly one busy core or 1 GB).
+
+    # Ordering
+
+    Jobs start longest-first, based on the median render-durations recorded in `history`
+    (a `TimingHistory`). Jobs without a recorded duration are ordered by their cost.
+
+    # Failures
+
+    A job fails if it raises, or returns `False` or a result whose `ok` is false (see
+    `RenderResult`). With `fail_fast`, jobs which have not started yet are cancelled after the
+    first failure; their result is `None`. Jobs which are already running are stopped through
+    `on_fail_fast` (e.g. `RenderExecutor.cancel()`, which kills their process-groups). Once
+    `should_stop` returns true, no further jobs are started either.
+    """
+
+    default_cost_weights = {"pdf": 3, "docx": 2, "html": 1}
+
+    def __init__(
+        self,
+        max_concurrency=None,
+        capacity=None,
+        cost_weights=None,
+        fail_fast=False,
+        history=None,
+        loglevel=None,
+    ):
+        self.logger = logging.getLogger(
+            self.__class__.__module__ + "." + self.__class__.__qualname__
+        )
+        self.logger.setLevel(loglevel)
+        cpu_count = os.cpu_count() or 1
+        self.max_concurrency = max(1, int(max_concurrency or cpu_count))
+        if capacity is None:
+            memory = total_memory_gb()
+            capacity = cpu_count if memory is None else min(cpu_count, int(memory))
+        self.capacity = max(1, capacity)
+        self.cost_weights = dict(self.default_cost_weights)
+        self.cost_weights.update(cost_weights or {})
+        self.fail_fast = fail_fast
+        self.history = (
+            history if history is not None else TimingHistory(loglevel=loglevel)
+        )
+
+    def cost(self, cost_key):
+        return self.cost_weights.get(cost_key, 1)
+
+    def order(self, jobs):
+        """Sort `(name, cost_key, func)`-jobs longest expected duration first."""
+
+        def expected(job):
+            name, cost_key, _ = job
+            duration = self.history.estimate(name)
+            return (duration is not None, duration or 0, self.cost(cost_key))
+
+        return sorted(jobs, key=expected, reverse=True)
+
+    @staticmethod
+    def failed(result):
+        return result is False or getattr(result, "ok", True) is False
+
+    async def run(self, jobs, should_stop=None, on_fail_fast=None):
+        """
+        Run the jobs and wait for all of them.
+
+        :param jobs: List of `(name, cost_key, func)`; `func` is a coroutine-function called without arguments.
+        :param should_stop: Optional callable; once it returns true, no further jobs are started.
+        :param on_fail_fast: Optional callable, called once when `fail_fast` is triggered, to stop running jobs.
+        :return: Dict mapping each job's name to its result (`False` if it raised, `None` if cancelled).
+        """
+        ordered = self.order(jobs)
+        self.logger.info(
+            f"Scheduling {len(ordered)} render-jobs ({self.max_concurrency} concurrent, capacity {self.capacity}): "
+            + ", ".join(name for name, _, _ in ordered)
+        )
+        results = {name: None for name, _, _ in ordered}
+        condition = asyncio.Condition()
+        state = {"running": 0, "load": 0, "failed": False}
+
+        def stopped():
+            return (state["failed"] and self.fail_fast) or (
+                should_stop is not None and should_stop()
+            )
+
+        async def execute(name, cost, func):
+            start_time = time.time()
+            try:
+                result = await func()
+            except Exception as e:
+                self.logger.error(f"Render-job '{name}' failed: {e}")
+                result = False
+            async with condition:
+                results[name] = result
+                state["running"] -= 1
+                state["load"] -= cost
+                first_failure = self.failed(result) and not state["failed"]
+                if self.failed(result):
+                    state["failed"] = True
+                condition.notify_all()
+            if first_failure and self.fail_fast:
+                self.logger.warning(
+                    f"Render-job '{name}' failed, stopping the remaining render-jobs."
+                )
+                if on_fail_fast is not None:
+                    on_fail_fast()
+            self.logger.debug(f"Render-job '{name}' took {time.time() - start_time:.2f}s")
+
+        tasks = []
+        for name, cost_key, func in ordered:
+            cost = self.cost(cost_key)
+            async with condition:
+                await condition.wait_for(
+                    lambda: stopped()
+                    or state["running"] == 0
+                    or (
+                        state["running"] < self.max_concurrency
+                        and state["load"] + cost <= self.capacity
+                    )
+                )
+                if stopped():
+                    break
+                state["running"] += 1
+                state["load"] += cost
+            tasks.append(asyncio.create_task(execute(name, cost, func)))
+        await asyncio.gather(*tasks)
+        cancelled = [
+            name
+            for name, result in results.items()
+            if result is None or getattr(result, "status", None) == "cancelled"
+        ]
+        if stopped() and cancelled:
+            self.logger.warning(
+                f"Cancelled {len(cancelled)} render-jobs: {", ".join(cancelled)}"
+            )
+        return results
@@ -1,4 +1,4 @@
-import yaml
+from obsidianknittrpy.modules.utils import yaml_io
 
 
 class YamlHandler:
@@ -43,5 +43,6 @@ class YamlHandler:
         :param file_path: The path where the YAML file should be saved.
         """
         sanitized_data = YamlHandler.sanitize_parameters(data)
-        with open(file_path, "w") as yaml_file:
-            yaml.dump(sanitized_data, yaml_file, default_flow_style=False)
+        yaml_io.write_file(
+            file_path, sanitized_data, safe=False, default_flow_style=False
+        )
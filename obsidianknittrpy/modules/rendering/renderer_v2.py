@@ -1,6 +1,24 @@
-import subprocess, os, yaml, json, shutil, re
+import os, copy, yaml, json
 from obsidianknittrpy.modules.rendering.YamlHandler import YamlHandler
+from obsidianknittrpy.modules.utils import yaml_io
 from obsidianknittrpy.modules.core.ResourceLogger import ResourceLogger
+from obsidianknittrpy.modules.core.TimingHistory import TimingHistory
+from obsidianknittrpy.modules.rendering.RenderScheduler import RenderScheduler
+from obsidianknittrpy.modules.rendering.DependencyIndex import DependencyIndex
+from obsidianknittrpy.modules.rendering.DependencyStager import DependencyStager
+from obsidianknittrpy.modules.rendering.RenderExecutor import (
+    RenderExecutor,
+    RenderResult,
+)
+from obsidianknittrpy.modules.rendering.RenderBackend import (
+    QuartoBackend,
+    parse_frontmatter,
+)
+from obsidianknittrpy.modules.utils.link_tree import (
+    link_directory_entries,
+    move_into_place,
+)
+from functools import partial
 import logging
 import time
 
@@ -19,8 +37,28 @@ class RenderManager:
         debug=False,
         parameters=None,
         working_directory=None,
+        run_workspace=None,
+        render_cache=None,
+        scheduler=None,
+        isolate_formats=False,
+        backend=None,
+        execution_cache=None,
+        group_formats=False,
+        executor=None,
+        timing_history=None,
     ):
         self.mod_directory = mod_directory
+        self.scheduler = scheduler
+        self.executor = executor if executor else RenderExecutor(loglevel=log_level)
+        self.timing_history = (
+            timing_history if timing_history else TimingHistory(loglevel=log_level)
+        )
+        self.backend = backend
+        self.execution_cache = execution_cache
+        self.group_formats = group_formats
+        self.isolate_formats = isolate_formats
+        self.run_workspace = run_workspace
+        self.render_cache = render_cache
         self.use_parallel = use_parallel
         self.file_strings = file_strings
         self.file_suffixes = file_suffixes
@@ -30,6 +68,8 @@ class RenderManager:
         self.debug = debug
         self.log_level = log_level
         self.dependencies = {}
+        self.staged_dependencies = []
+        self.file_string_groups = {}
         self.parameters = parameters if parameters else {}
         self.working_directory = working_directory
 
@@ -37,8 +77,9 @@ class RenderManager:
         self.logger = logging.getLogger(
             self.__class__.__module__ + "." + self.__class__.__qualname__
         )
-        self.resource_logger = ResourceLogger(output_directory)
+        self.resource_logger = ResourceLogger.instance(output_directory)
         self.logger.setLevel(level=log_level)
+        self.dependency_stager = DependencyStager(loglevel=log_level)
         # Ensure output directory exists
         os.makedirs(self.output_directory, exist_ok=True)
         self.mod_filesjson_data = os.path.normpath(
@@ -76,6 +117,12 @@ class RenderManager:
             # Additional parsing logic if required for other mod files.
         except FileNotFoundError:
             raise FileNotFoundError(f"Mod files not found in {self.mod_directory}")
+        self.dependency_index = DependencyIndex(
+            self.dependency_files,
+            self.ohtml_paths["obsidian_folder"],
+            loglevel=self.log_level,
+        )
+        self.logger.debug(f"Indexed {self.dependency_index.size} vault-files.")
 
     def extract_yaml_frontmatter(self, input_str: str):
         """
@@ -97,7 +144,7 @@ class RenderManager:
 
             # Parse the YAML frontmatter into a Python dictionary
             try:
-                frontmatter_dict = yaml.safe_load(frontmatter_str)
+                frontmatter_dict = yaml_io.safe_load(frontmatter_str)
             except yaml.YAMLError as e:
                 raise ValueError(f"Error parsing YAML frontmatter: {e}")
 
@@ -125,162 +172,162 @@ class RenderManager:
     def convert_to_forward_slashes(self, path: str) -> str:
         return path.replace("\\", "/")
 
-    def find_matching_directories(self, paths, pattern):
-        # Compile the regex pattern
-        regex = re.compile(pattern)
+    def group_file_strings(self):
+        """
+        Group the formats by their file-string.
 
-        # Filter directories matching the pattern
-        matching_directories = [path for path in paths if regex.search(path)]
+        `prepare_file_strings` assigns the same string to every format, so usually all formats
+        share a single group. A format only gets its own group once its string diverges.
 
-        return matching_directories
+        :return: Dict mapping each distinct file-string to the names of the formats sharing it.
+        """
+        groups = {}
+        for format_name, file_string in self.file_strings.items():
+            groups.setdefault(file_string, []).append(format_name)
+        return groups
 
     def resolve_dependencies(self):
-        """Resolves file and directory dependencies."""
-        frontmatter_keys = ["csl", "bibliography", "filters"]
+        """
+        Resolves file and directory dependencies.
+
+        Every distinct file-string is resolved once, and the result is assigned to all formats
+        sharing it. The resulting groups are kept in `file_string_groups`.
+        """
         self.logger.info(f"Resolving File-dependencies:")
-        for format_name, file_string in self.file_strings.items():
-            # TODO: in here, parse the text and replace dependencies as found
-            # parse the file-string. for every match, copy the entry in self.dependency_files
-            # over. The root into which to copy shall be %working_directory%
-            # The root in the self.dependency_files from which to trim is the `tmpdir/input` .
-            # The directory-structures beyond that are what is required to be the second half of the combined
-            # filepath of the resolved dependency. Doing this should mean that relative filepaths will be
-            # parseable by quarto when converting the doc; since they were placed into and relative to the
-            # working directory.
-            #
-            # Exception: any filepath structured like `./path/to/file.suffix`, or `../path/to/another/file.suffix`
-            # will fail because we cannot just base them into working_directory and call it a day. Instead, for these
-            # we must update the references in the filestrings.
-
-            # Find all occurences of
-            # - "^\w*source\((?<path>.*(R|RData|xlsx|csv|...))\)"
-            # - "(\W+\.bib)"
-            # - "(\W+\.csl)"
-            # check if they are relative. If they are, continue with replacing them
-            #
-            # Once they are collected, iterate over self.dependency_files
-            # And on match,
-            # - replace the relative paths with an absolute path constructed from %working_directory%
-            # - replace the reference to that file in the file-string with the constructed absolute path in %working_directory%
-            #           - is this dumb? I think this isn't actually necessary, since the working directory is already the working directory. If the files are positioned correctly therein, we can just insert them
-            #             However, for files which lay further upstream than the working directory, their paths will have to be fixed if they are relative.
-            try:
-                frontmatter = self.extract_yaml_frontmatter(file_string)
-                frontmatter_init = frontmatter
-            except ValueError as e:
-                self.logger.error(f"Error parsing frontmatter for  {format_name}: {e}")
-                continue
-            # iterate through the specified frontmatter keys
-            for key in frontmatter_keys:
-                #  Iterate through keys in the list of keys to purge
-                # self.logger.info(f"Resolving File-dependencies:")
-                if key in frontmatter:
-                    values = frontmatter[key]
-                    # Check if the value is a string or a list of file paths
-                    self.logger.info(f"\t{key} ({format_name})")
-                    if not isinstance(values, list):
-                        # Handle the case for a single string (a relative file path)
-                        values = [values]
-
-                    resolved_values = []
-                    for value in values:
-                        if "filters" in key:  # in case of filters, we must
-                            if self._is_relative_path(value):
-
-                                # Define the pattern
-                                pattern = r"_extensions/.*/" + value
-                                # get the extensions' files
-                                matches = self.find_matching_directories(
-                                    self.dependency_files, pattern
-                                )
-                                # construct the target-paths
-                                ## get source-dir
-                                source_directory = os.path.dirname(
-                                    self.ohtml_paths["obsidian_entrypoint"]
-                                )
-                                source_extensions_directory = os.path.normpath(
-                                    os.path.join(source_directory, "_extensions")
+        file_string_groups = {}
+        for file_string, format_names in self.group_file_strings().items():
+            resolved_file_string = self._resolve_file_string(file_string, format_names)
+            for format_name in format_names:
+                self.file_strings[format_name] = resolved_file_string
+            file_string_groups.setdefault(resolved_file_string, []).extend(format_names)
+        self.file_string_groups = file_string_groups
+        for dependency in self.dependencies:
+            abs_path = os.path.abspath(dependency)
+            if not os.path.exists(abs_path):
+                raise RuntimeError(
+                    f"Dependency {dependency} cannot be resolved at {abs_path}."
+                )
+            self.dependencies[dependency] = abs_path
+        self.logger.info(f"Staged dependencies: {self.dependency_stager.summary()}")
+        self.resource_logger.log(
+            resource=f"({self.dependency_stager.summary()})",
+            action="staged",
+            module=__name__ + ".resolve_dependencies",
+        )
+
+    def _resolve_file_string(self, file_string, format_names):
+        """
+        Resolve and stage the dependencies declared in the frontmatter of a file-string.
+
+        :param format_names: Names of the formats sharing the file-string, for logging.
+        :return: The file-string with resolved dependency-paths; `file_string` itself if nothing changed.
+        """
+        frontmatter_keys = ["csl", "bibliography", "filters"]
+        label = ", ".join(format_names)
+        try:
+            frontmatter = self.extract_yaml_frontmatter(file_string)
+            frontmatter_init = copy.deepcopy(frontmatter)
+        except ValueError as e:
+            self.logger.error(f"Error parsing frontmatter for  {label}: {e}")
+            return file_string
+        # iterate through the specified frontmatter keys
+        for key in frontmatter_keys:
+            #  Iterate through keys in the list of keys to purge
+            # self.logger.info(f"Resolving File-dependencies:")
+            if key in frontmatter:
+                values = frontmatter[key]
+                # Check if the value is a string or a list of file paths
+                self.logger.info(f"\t{key} ({label})")
+                if not isinstance(values, list):
+                    # Handle the case for a single string (a relative file path)
+                    values = [values]
+
+                resolved_values = []
+                for value in values:
+                    if "filters" in key:  # in case of filters, we must
+                        if self._is_relative_path(value):
+
+                            # get the extensions' files
+                            if not self.dependency_index.extension_files(value):
+                                self.logger.warning(
+                                    f"Filter '{value}' was not found in any '_extensions'-directory of the vault."
                                 )
-                                destination_extensions_directory = os.path.normpath(
-                                    os.path.join(self.working_directory, '_extensions')
+                            # construct the target-paths
+                            ## get source-dir
+                            source_directory = os.path.dirname(
+                                self.ohtml_paths["obsidian_entrypoint"]
+                            )
+                            source_extensions_directory = os.path.normpath(
+                                os.path.join(source_directory, "_extensions")
+                            )
+                            destination_extensions_directory = os.path.normpath(
+                                os.path.join(self.working_directory, '_extensions')
+                            )
+                            # move them over to the working directory
+                            if os.path.exists(source_extensions_directory):
+                                staged = self.dependency_stager.stage_tree(
+                                    source_extensions_directory,
+                                    destination_extensions_directory,
                                 )
-                                # move them over to the working directory
-                                if os.path.exists(source_extensions_directory):
-                                    shutil.copytree(
-                                        source_extensions_directory,
-                                        destination_extensions_directory,
-                                        dirs_exist_ok=True,
-                                    )
+                                if staged:
                                     self.resource_logger.log(
                                         resource=destination_extensions_directory,
                                         action="created",
                                         module=__name__ + ".resolve_dependencies",
                                     )
-                                resolved_values.append(value)
-                            else:
-                                resolved_values.append(value)
-                            # filters must be provided as a yaml-list, never as a key. even if there is only a single filter active.
-                            frontmatter[key] = resolved_values
+                                self.staged_dependencies.extend(staged)
+                            resolved_values.append(value)
                         else:
-                            if self._is_relative_path(value):
-                                resolved_path = self._resolve_dependency_path(value)
-                                resolved_path = self.convert_to_forward_slashes(
-                                    resolved_path
+                            resolved_values.append(value)
+                        # filters must be provided as a yaml-list, never as a key. even if there is only a single filter active.
+                        frontmatter[key] = resolved_values
+                    else:
+                        if self._is_relative_path(value):
+                            resolved_path = self._resolve_dependency_path(value)
+                            if resolved_path:
+                                resolved_values.append(
+                                    self.convert_to_forward_slashes(resolved_path)
                                 )
-                                # resolved_path = os.path.relpath(
-                                #     resolved_path, self.working_directory
-                                # )
-                                if resolved_path:
-                                    resolved_values.append(resolved_path)
-                                else:
-                                    self.logger.error(
-                                        f"Could not resolve dependency: {value}"
-                                    )
                             else:
-                                resolved_values.append(value)
-                            frontmatter[key] = (
-                                resolved_values
-                                if len(resolved_values) > 1
-                                else resolved_values[0]
-                            )
-            if frontmatter != frontmatter_init:
-                self.resource_logger.log(
-                    resource=f"file-string '{format_name}'",
-                    action="modified",
-                    module=__name__ + ".resolve_dependencies",
-                )
-            new_frontmatter = yaml.dump(frontmatter, default_flow_style=False)
-            new_file_string = (
-                f"---\n{new_frontmatter}---\n{file_string.split('---',2)[2]}"
-            )
-            self.file_strings[format_name] = new_file_string
-            pass
-        for dependency in self.dependencies:
-            abs_path = os.path.abspath(dependency)
-            if not os.path.exists(abs_path):
-                raise RuntimeError(
-                    f"Dependency {dependency} cannot be resolved at {abs_path}."
-                )
-            self.dependencies[dependency] = abs_path
+                                self.logger.error(
+                                    f"Could not resolve dependency: {value}"
+                                )
+                        else:
+                            resolved_values.append(value)
+                        frontmatter[key] = (
+                            resolved_values
+                            if len(resolved_values) > 1
+                            else resolved_values[0]
+                        )
+        if frontmatter == frontmatter_init:
+            return file_string
+        self.resource_logger.log(
+            resource=f"file-string '{label}'",
+            action="modified",
+            module=__name__ + ".resolve_dependencies",
+        )
+        new_frontmatter = yaml_io.dump(frontmatter, default_flow_style=False)
+        return f"---\n{new_frontmatter}---\n{file_string.split('---',2)[2]}"
 
     def _resolve_dependency_path(self, relative_path):
         """
-        Resolves a relative path by matching it with an entry in self.dependency_files.
-        Returns the resolved path or None if not found.
-        """
-        base_dir = self.ohtml_paths["obsidian_folder"]
-        for dependency_path in self.dependency_files:
-            # Reconstruct absolute path
-            relative_base = os.path.relpath(dependency_path, base_dir)
-            if relative_path.lstrip("./") in relative_base:
-                # Construct the new path relative to the working directory
-                new_path = os.path.join(self.working_directory, relative_base)
-                # Ensure the directory exists
-                os.makedirs(os.path.dirname(new_path), exist_ok=True)
-                # Copy the file to the new path
-                shutil.copy(dependency_path, new_path)
-                return new_path
-        return None
+        Resolves a relative path by looking up the vault-file whose path ends with it in the dependency-index,
+        and stages it to the same relative location below the working directory.
+        Returns the resolved path relative to the working directory, or None if not found.
+
+        The path is written into the rendered document, so it must not contain the run-unique
+        working directory: the document's render-cache key would change with every run otherwise.
+        Render-directories link the working directory's entries, so the path resolves in them as well.
+        """
+        match = self.dependency_index.resolve(relative_path)
+        if match is None:
+            return None
+        dependency_path, relative_base = match
+        # Construct the new path relative to the working directory
+        new_path = os.path.join(self.working_directory, relative_base)
+        if self.dependency_stager.stage_file(dependency_path, new_path):
+            self.staged_dependencies.append(new_path)
+        return os.path.relpath(new_path, self.working_directory)
 
     def yamlialize(self):
         """
@@ -295,9 +342,14 @@ class RenderManager:
             yaml_file_paths[format_name] = os.path.join(
                 self.output_directory, f"{format_name.replace('::', '_')}_config.yaml"
             )
-            YamlHandler.clean_yaml_dump(
-                self.parameters[format_name], yaml_file_paths[format_name]
-            )
+            parameters = self.parameters[format_name]
+            if (
+                self.execution_cache is not None
+                and self.isolate_formats
+                and self.run_workspace is not None
+            ):
+                parameters = self.execution_cache.metadata(format_name, parameters)
+            YamlHandler.clean_yaml_dump(parameters, yaml_file_paths[format_name])
             self.logger.info(
                 f"YAML configuration file created: {yaml_file_paths[format_name]}"
             )
@@ -311,61 +363,111 @@ class RenderManager:
             )
         self.yaml_file_paths = yaml_file_paths
 
+    def can_group_formats(self):
+        """
+        Check if all formats can be rendered by a single Quarto-invocation.
+
+        This requires multiple formats with identical file-strings (as produced by `prepare_file_strings`),
+        distinct file-suffixes, no `format`-key in the frontmatter and a backend which renders the
+        document via Quarto.
+        """
+        if not self.group_formats or len(self.file_strings) < 2:
+            return False
+        file_string_groups = self.group_file_strings()
+        suffixes = {self.file_suffixes[format_name] for format_name in self.file_strings}
+        if len(file_string_groups) != 1 or len(suffixes) != len(self.file_strings):
+            return False
+        file_string = next(iter(file_string_groups))
+        if "format" in parse_frontmatter(file_string):
+            return False
+        backend = self.backend if self.backend else QuartoBackend(loglevel=self.log_level)
+        return backend.can_group(file_string)
+
     def execute(self):
         """Sets up and executes the appropriate rendering pipeline."""
         self.parse_mod_files()  # load dependencies
-        self.resolve_dependencies()  # TODO: this must modify self.filestrings and resolve dependencies.
+        with self.timing_history.timed("dependencies"):
+            self.resolve_dependencies()  # TODO: this must modify self.filestrings and resolve dependencies.
         # dependencies in:
         # - frontmatter
         # - codeblocks
         # - embeds/images
         self.yamlialize()  # TODO: this must save the quarto-yaml-configuration-files to file.
 
-        pipeline = (
-            MultiRenderingPipeline_v2(
-                file_strings=self.file_strings,
-                file_suffixes=self.file_suffixes,
-                output_directory=self.output_directory,
-                input_name=self.input_name,
-                custom_file_names=self.custom_file_names,
-                debug=self.debug,
-                log_level=self.log_level,
-                working_directory=self.working_directory,
-                yaml_files=self.yaml_file_paths,
-            )
-            if self.use_parallel
-            else RenderingPipeline_v2(
-                file_strings=self.file_strings,
-                file_suffixes=self.file_suffixes,
-                output_directory=self.output_directory,
-                input_name=self.input_name,
-                custom_file_names=self.custom_file_names,
-                debug=self.debug,
-                log_level=self.log_level,
-                working_directory=self.working_directory,
-                yaml_files=self.yaml_file_paths,
-            )
-        )
-        self.logger.info(
-            f"Executing {pipeline.__class__.__qualname__} ({"parallel" if self.use_parallel else "sequential"})"
+        if self.can_group_formats():
+            pipeline_class, mode = GroupedRenderingPipeline_v2, "grouped"
+        elif self.use_parallel:
+            pipeline_class, mode = MultiRenderingPipeline_v2, "parallel"
+        else:
+            pipeline_class, mode = RenderingPipeline_v2, "sequential"
+        pipeline = pipeline_class(
+            file_strings=self.file_strings,
+            file_suffixes=self.file_suffixes,
+            output_directory=self.output_directory,
+            input_name=self.input_name,
+            custom_file_names=self.custom_file_names,
+            debug=self.debug,
+            log_level=self.log_level,
+            working_directory=self.working_directory,
+            yaml_files=self.yaml_file_paths,
+            run_workspace=self.run_workspace,
+            render_cache=self.render_cache,
+            dependencies=self.staged_dependencies,
+            scheduler=self.scheduler,
+            isolate_formats=self.isolate_formats,
+            backend=self.backend,
+            execution_cache=self.execution_cache,
+            executor=self.executor,
+            timing_history=self.timing_history,
         )
+        self.logger.info(f"Executing {pipeline.__class__.__qualname__} ({mode})")
         start_time = time.time()
-        pipeline.run()
+        self.results = pipeline.run()
+        if self.executor.cancelled:
+            self.logger.warning("Rendering was cancelled.")
         self.output_data = {
-            "rendered_output_paths": pipeline.rendered_output_paths,
-            "rendered_output_directory": pipeline.rendered_output_directory,
+            "rendered_output_paths": {
+                format_name: result.output_path
+                for format_name, result in self.results.items()
+                if result is not None and result.ok
+            },
+            "rendered_output_directory": pipeline.collect_output_directory(
+                self.results
+            ),
+            "results": {
+                format_name: (
+                    result.to_dict()
+                    if result is not None
+                    else RenderResult(format_name, "cancelled").to_dict()
+                )
+                for format_name, result in self.results.items()
+            },
         }
         end_time = time.time()
+        self.timing_history.record("rendering", end_time - start_time, name=mode)
         self.resource_logger.log(
             action="exec-time",
             module=self.__class__.__module__
             + "."
             + self.__class__.__qualname__
             + ".execute",
-            resource=f"({"parallel" if self.use_parallel else "sequential"}: {(time.time() - start_time)}s)",
+            resource=f"({mode}: {(end_time - start_time)}s)",
         )
+        if self.render_cache is not None:
+            self.resource_logger.log(
+                action="render-cache",
+                module=self.__class__.__module__
+                + "."
+                + self.__class__.__qualname__
+                + ".execute",
+                resource=f"({self.render_cache.hits} hits, {self.render_cache.misses} misses)",
+            )
         pass
 
+    def cancel(self):
+        """Cancel a running `execute()`; safe to call from other threads (e.g. a GUI)."""
+        self.executor.cancel()
+
 
 class RenderingPipeline_v2:
     """
@@ -384,6 +486,15 @@ class RenderingPipeline_v2:
         log_level=None,
         working_directory=None,
         yaml_files=None,
+        run_workspace=None,
+        render_cache=None,
+        dependencies=None,
+        scheduler=None,
+        isolate_formats=False,
+        backend=None,
+        execution_cache=None,
+        executor=None,
+        timing_history=None,
     ):
         """
         Initialize the rendering pipeline.
@@ -393,6 +504,15 @@ class RenderingPipeline_v2:
         :param input_name: Optional input note filename for naming output files
         :param custom_file_names: Optional dict of custom file names per format, e.g., {'html': 'custom_name.html'}
         :param debug: Enable or disable debug logging
+        :param run_workspace: Optional `RunWorkspace`, used to give temporary files run-unique names
+        :param render_cache: Optional `RenderCache`, used to skip renders whose inputs did not change
+        :param dependencies: Paths of the dependencies staged into the working directory
+        :param scheduler: Optional `RenderScheduler`, used by the parallel pipeline and to record render-durations
+        :param isolate_formats: Render every format in its own scratch-directory (requires `run_workspace`)
+        :param backend: `RenderBackend` used to render the formats; defaults to `QuartoBackend`
+        :param execution_cache: Optional `ExecutionCache`, keeping chunk-caches across runs (requires `isolate_formats`)
+        :param executor: `RenderExecutor` running the render-commands; defaults to one without logs or timeouts
+        :param timing_history: Optional `TimingHistory`, recording the duration of every render
         """
         self.file_strings = file_strings
         self.file_suffixes = file_suffixes
@@ -402,12 +522,28 @@ class RenderingPipeline_v2:
         self.debug = debug
         self.working_directory = working_directory
         self.yaml_file_paths = yaml_files
-        self.rendered_output_paths = {}
+        self.run_workspace = run_workspace
+        self.render_cache = render_cache
+        self.dependencies = dependencies if dependencies else []
+        self.scheduler = scheduler
+        self.isolate_formats = isolate_formats and run_workspace is not None
+        self.render_directories = {}
+        self.rendered_output_directory = None
 
         # Set up logging
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(level=log_level)
-        self.resource_logger = ResourceLogger(output_directory)
+        self.backend = backend if backend else QuartoBackend(loglevel=log_level)
+        self.executor = executor if executor else RenderExecutor(loglevel=log_level)
+        self.timing_history = (
+            timing_history if timing_history else TimingHistory(loglevel=log_level)
+        )
+        self.execution_cache = execution_cache if self.isolate_formats else None
+        if execution_cache is not None and not self.isolate_formats:
+            self.logger.warning(
+                "The execution-cache requires rendering formats in isolated directories and is disabled."
+            )
+        self.resource_logger = ResourceLogger.instance(output_directory)
 
         # Ensure output directory exists
         if not os.path.exists(self.output_directory):
@@ -482,9 +618,13 @@ class RenderingPipeline_v2:
         :param format_name: Format name used in the filename.
         :return: Path to the temporary file.
         """
-        file_path = os.path.join(
-            self.working_directory, f"temp_{format_name.replace('::', '_')}.qmd"
-        )
+        if self.run_workspace is not None:
+            file_name = self.run_workspace.temp_file_name(
+                format_name, stable=self.execution_cache is not None
+            )
+        else:
+            file_name = f"temp_{format_name.replace('::', '_')}.qmd"
+        file_path = os.path.join(self.render_directory(format_name), file_name)
         with open(file_path, 'w', encoding='utf-8') as file:
             file.write(file_string)
         self.logger.info(f"File string written to: {file_path}")
@@ -498,53 +638,238 @@ class RenderingPipeline_v2:
         )
         return file_path
 
-    def run(self):
+    def render_directory(self, format_name):
         """
-        Main rendering method. Renders each file string to its specified format using Quarto.
+        Return the directory a format is rendered in.
+
+        With `isolate_formats`, every format gets its own scratch-directory inside the run-workspace,
+        into which the entries of the working directory are linked. Quarto's intermediates, `*_files`-
+        and cache-folders of concurrent renders therefore cannot collide. Otherwise, this is the
+        working directory itself.
         """
-        for format_name, file_string in self.file_strings.items():
-            self.logger.info(f"Rendering format: {format_name}")
-            # self.resource_logger.log("yamlialize", "created", yaml_file_path)
+        if not self.isolate_formats:
+            return self.working_directory
+        if format_name not in self.render_directories:
+            scratch_root = os.path.join(self.run_workspace.work_dir, "render")
+            directory = os.path.join(scratch_root, format_name.replace("::", "_"))
+            output_names = {
+                os.path.basename(self.determine_output_filename(name))
+                for name in self.file_strings
+            }
 
-            # Write the file string to a temporary file
-            temp_file_path = self.write_file_string(file_string, format_name)
+            def exclude(entry):
+                return (
+                    entry.name in output_names
+                    or entry.name in ["_freeze", ".quarto"]
+                    or entry.name.startswith("resource_log.")
+                    or entry.name.endswith(("_files", "_cache"))
+                    or (entry.name.startswith("temp_") and entry.name.endswith(".qmd"))
+                    or os.path.normcase(os.path.abspath(entry.path))
+                    == os.path.normcase(os.path.abspath(scratch_root))
+                )
 
-            # Determine output filename
-            output_file_path = self.determine_output_filename(format_name)
+            linked = link_directory_entries(
+                self.working_directory, directory, exclude=exclude
+            )
+            self.logger.debug(
+                f"Linked {linked} entries of '{self.working_directory}' into render-directory '{directory}'."
+            )
+            self.render_directories[format_name] = directory
+        return self.render_directories[format_name]
 
-            # Determine the working directory for Quarto
-            quart_working_directory = self.working_directory
-            self.logger.info(
-                f"Setting Quarto's working-directory to '{quart_working_directory}'"
+    def publish_outputs(self, format_name, output_name, temp_file_path):
+        """
+        Move a format's output (and its `*_files`-folders) from its render-directory into the working directory.
+
+        :return: The output's path in the working directory.
+        """
+        render_directory = self.render_directory(format_name)
+        names = [
+            output_name,
+            os.path.splitext(output_name)[0] + "_files",
+            os.path.splitext(os.path.basename(temp_file_path))[0] + "_files",
+        ]
+        for name in names:
+            source = os.path.join(render_directory, name)
+            if os.path.lexists(source) and not os.path.islink(source):
+                move_into_place(source, os.path.join(self.working_directory, name))
+        return os.path.normpath(os.path.join(self.working_directory, output_name))
+
+    def toolchain_version(self):
+        """Return the version of the render-backend, queried once per backend."""
+        return self.backend.version()
+
+    def render_cache_key(self, format_name, temp_file_path, output_file_path):
+        """Compute the render-cache key of a format, or `None` if no cache is used."""
+        if self.render_cache is None:
+            return None
+        dependencies = self.dependencies + self.render_cache.referenced_files(
+            self.file_strings[format_name], self.working_directory
+        )
+        return self.render_cache.compute_key(
+            format_name,
+            os.path.basename(output_file_path),
+            [temp_file_path, self.yaml_file_paths[format_name]],
+            dependencies,
+            self.toolchain_version(),
+        )
+
+    async def render_format(self, format_name, temp_file_path, output_file_path):
+        """
+        Render a single format via the render-backend, or restore it from the render-cache.
+
+        :param format_name: Format name (e.g., 'quarto::html').
+        :param temp_file_path: Path to the format's temporary qmd-file.
+        :param output_file_path: Output-path as determined by `determine_output_filename`.
+        :return: `RenderResult` of the format.
+        """
+        output_name = os.path.basename(output_file_path)
+        cache_key = self.render_cache_key(format_name, temp_file_path, output_file_path)
+        if cache_key is not None:
+            abs_output_path = self.render_cache.restore(
+                cache_key, self.working_directory
             )
-            # Run Quarto render command
-            try:
-                command = [
-                    "quarto",
-                    "render",
-                    temp_file_path,
-                    "--to",
-                    self.file_suffixes[format_name],
-                    "--metadata-file",
-                    self.yaml_file_paths[format_name],
-                    "--output",
-                    os.path.basename(output_file_path),
-                ]
-                subprocess.run(command, check=True, cwd=quart_working_directory)
-                abs_output_path = os.path.normpath(
-                    os.path.join(
-                        quart_working_directory, os.path.basename(output_file_path)
-                    )
-                )
+            if abs_output_path is not None:
+                abs_output_path = os.path.normpath(abs_output_path)
                 self.logger.info(
-                    f"Rendered {format_name} output to: '{abs_output_path}'."
+                    f"Restored {format_name} output from render-cache to: '{abs_output_path}'."
                 )
-                self.rendered_output_paths[format_name] = abs_output_path
-            except subprocess.CalledProcessError as e:
-                self.logger.error(f"Failed to render {format_name} output. Error: {e}")
+                self.resource_logger.log(
+                    self.__class__.__module__
+                    + "."
+                    + self.__class__.__qualname__
+                    + ".render_format",
+                    "restored",
+                    abs_output_path,
+                )
+                return RenderResult(
+                    format_name, "restored", output_path=abs_output_path
+                )
+        if self.execution_cache is not None:
+            self.execution_cache.prepare(
+                format_name, self.render_directory(format_name), temp_file_path
+            )
+        result = await self.executor.execute(
+            format_name,
+            self.backend.commands(
+                temp_file_path,
+                self.file_suffixes[format_name],
+                self.yaml_file_paths[format_name],
+                output_name,
+            ),
+            cwd=self.render_directory(format_name),
+            timeout=self.executor.timeout_for(self.file_suffixes[format_name]),
+        )
+        if not result.ok:
+            self.logger.error(
+                f"Failed to render {format_name} output ({result.status}, exit code {result.exit_code})."
+                + (f" See '{result.log_path}'." if result.log_path else "")
+            )
+            return result
+        abs_output_path = os.path.normpath(
+            os.path.join(self.working_directory, output_name)
+        )
+        if self.execution_cache is not None:
+            self.execution_cache.persist(
+                format_name, self.render_directory(format_name), temp_file_path
+            )
+        if self.isolate_formats:
+            abs_output_path = self.publish_outputs(
+                format_name, output_name, temp_file_path
+            )
+        self.logger.info(f"Rendered {format_name} output to: '{abs_output_path}'.")
+        result.output_path = abs_output_path
+        self.timing_history.record(
+            "render",
+            result.duration,
+            name=format_name,
+            toolchain=self.toolchain_version(),
+        )
+        if cache_key is not None and os.path.exists(abs_output_path):
+            self.render_cache.store(
+                cache_key,
+                format_name,
+                abs_output_path,
+                support_paths=[
+                    os.path.splitext(abs_output_path)[0] + "_files",
+                    os.path.splitext(
+                        os.path.join(
+                            self.working_directory, os.path.basename(temp_file_path)
+                        )
+                    )[0]
+                    + "_files",
+                ],
+            )
+        return result
+
+    def collect_output_directory(self, results):
+        """
+        Determine the single directory all formats were rendered into.
+
+        :param results: Dict mapping format-names to their `RenderResult`, as returned by `run()`.
+        """
+        dirs = []
+        for (
+            format_name,
+            result,
+        ) in results.items():  # retrieve uniform dirname
+            if result is None or not result.ok:
+                continue
+            dir_name = os.path.dirname(result.output_path)
+            dirs.append(dir_name)
+
+        if len(set(dirs)) == 1:  # check if all elements are identical
+            self.rendered_output_directory = dirs[0]
+        elif len(set(dirs)) == 0:
+            self.logger.critical("Outputs could not be rendered")
+            raise RuntimeError(
+                f"Outputs could not be rendered to their render-targets."
+            )
+        else:
+            self.logger.error(
+                "Output-formats were rendered into multiple target-directories. This should be impossible."
+            )
+            raise ValueError(
+                f"Output-formats were rendered into multiple ({len(set(dirs))}) target-directories. This should be impossible."
+            )
+        return self.rendered_output_directory
+
+    def cancel(self):
+        """Cancel rendering; safe to call from other threads."""
+        self.executor.cancel()
 
+    def run(self):
+        """
+        Main rendering method. Renders each file string to its specified format using Quarto.
+
+        :return: Dict mapping format-names to their `RenderResult` (`None` if cancelled before starting).
+        """
 
-from concurrent.futures import ThreadPoolExecutor
+        async def render_all():
+            results = {}
+            for format_name, file_string in self.file_strings.items():
+                if self.executor.cancelled:
+                    results[format_name] = None
+                    continue
+                self.logger.info(f"Rendering format: {format_name}")
+                # self.resource_logger.log("yamlialize", "created", yaml_file_path)
+
+                # Write the file string to a temporary file
+                temp_file_path = self.write_file_string(file_string, format_name)
+
+                # Determine output filename
+                output_file_path = self.determine_output_filename(format_name)
+
+                # Determine the working directory for Quarto
+                self.logger.info(
+                    f"Setting Quarto's working-directory to '{self.working_directory}'"
+                )
+                results[format_name] = await self.render_format(
+                    format_name, temp_file_path, output_file_path
+                )
+            return results
+
+        return self.executor.run(render_all())
 
 
 class MultiRenderingPipeline_v2(RenderingPipeline_v2):
@@ -552,6 +877,8 @@ class MultiRenderingPipeline_v2(RenderingPipeline_v2):
         """
         Main rendering method. Renders each file string to its specified format using Quarto.
         Executes in parallel
+
+        :return: Dict mapping format-names to their `RenderResult` (`None` if cancelled before starting).
         """
         self.output_paths = {}
         self.output_filenames = {}
@@ -576,63 +903,194 @@ class MultiRenderingPipeline_v2(RenderingPipeline_v2):
             f"Setting Quarto's working-directory to '{quart_working_directory}'"
         )
         # Run Quarto render command
-        with ThreadPoolExecutor() as executor:
-            futures = [
-                executor.submit(self.futures_render, format_name)
-                for format_name, parameters in self.output_paths.items()
-            ]
-            for future in futures:
-                future.result()
+        if self.render_cache is not None:
+            self.toolchain_version()  # query once, before the jobs need it
+        if self.scheduler is None:
+            self.scheduler = RenderScheduler(loglevel=self.logger.level)
+        return self.executor.run(
+            self.scheduler.run(
+                [
+                    (
+                        format_name,
+                        self.file_suffixes[format_name],
+                        partial(self.futures_render, format_name),
+                    )
+                    for format_name in self.output_paths
+                ],
+                should_stop=lambda: self.executor.cancelled,
+                on_fail_fast=self.executor.cancel,
+            )
+        )
 
-        dirs = []
-        for (
+    async def futures_render(self, format_name):
+        """Renders a single format as one of the concurrent render-jobs."""
+        # yaml_file_path = self.yamlialize(parameters, format_name)
+        # self.resource_logger.log("MultiRenderingPipeline", "rendering", yaml_file_path)
+        return await self.render_format(
             format_name,
-            file_path,
-        ) in self.rendered_output_paths.items():  # retrieve uniform dirname
-            dir_name = os.path.dirname(file_path)
-            dirs.append(dir_name)
+            self.output_paths[format_name],
+            self.output_filenames[format_name],
+        )
 
-        if len(set(dirs)) == 1:  # check if all elements are identical
-            self.rendered_output_directory = dirs[0]
-        elif len(set(dirs)) == 0:
-            self.logger.critical("Outputs could not be rendered")
-            raise RuntimeError(
-                f"Outputs could not be rendered to their render-targets."
-            )
+
+class GroupedRenderingPipeline_v2(RenderingPipeline_v2):
+    """
+    Renders all formats with a single Quarto-invocation (`quarto render --to html,pdf,...`).
+
+    Requires identical file-strings for all formats (see `RenderManager.can_group_formats()`).
+    The options of every format are merged into the `format`-metadata of one temporary
+    qmd-file, and their output-names are set via `output-file`. Quarto and the execution-engine
+    only start once, and with an `ExecutionCache`, all formats share one chunk-cache, so chunks
+    are executed once instead of once per format.
+    """
+
+    group_name = "grouped"
+
+    def grouped_file_string(self, format_names, output_file_paths):
+        """Merge the formats' options into the frontmatter of the shared file-string."""
+        file_string = self.file_strings[format_names[0]]
+        frontmatter = parse_frontmatter(file_string)
+        if frontmatter:
+            body = file_string[file_string.find("\n---", 3) + len("\n---") :]
         else:
-            self.logger.error(
-                "Output-formats were rendered into multiple target-directories. This should be impossible."
+            body = "\n" + file_string
+        formats = {}
+        for format_name in format_names:
+            options = yaml_io.load_file(self.yaml_file_paths[format_name]) or {}
+            if self.execution_cache is not None:
+                # replaced by the options of the shared execution-cache below
+                options.pop("execute", None)
+                options.pop("knitr", None)
+            options["output-file"] = os.path.basename(output_file_paths[format_name])
+            formats[self.file_suffixes[format_name]] = options
+        frontmatter["format"] = formats
+        if self.execution_cache is not None:
+            frontmatter.update(
+                self.execution_cache.metadata(
+                    self.group_name,
+                    {key: frontmatter.get(key) for key in ["execute", "knitr"]},
+                )
             )
-            raise ValueError(
-                f"Output-formats were rendered into multiple ({len(set(dirs))}) target-directories. This should be impossible."
+        return (
+            "---\n"
+            + yaml_io.safe_dump(
+                frontmatter, default_flow_style=False, allow_unicode=True
             )
+            + "---"
+            + body
+        )
 
-    def futures_render(self, format_name):
-        """Combines YAML generation and rendering for parallel execution."""
-        # yaml_file_path = self.yamlialize(parameters, format_name)
-        # self.resource_logger.log("MultiRenderingPipeline", "rendering", yaml_file_path)
+    def run(self):
+        """
+        Main rendering method. Renders all formats with a single Quarto-invocation.
+        Formats cached in the render-cache are restored and left out of the invocation.
 
-        # Render via subprocess.
-        try:
-            command = [
-                "quarto",
+        :return: Dict mapping format-names to their `RenderResult`.
+        """
+        format_names = list(self.file_strings)
+        output_file_paths = {
+            format_name: self.determine_output_filename(format_name)
+            for format_name in format_names
+        }
+        self.logger.info(f"Rendering formats together: {", ".join(format_names)}")
+        temp_file_path = self.write_file_string(
+            self.grouped_file_string(format_names, output_file_paths), self.group_name
+        )
+        results = {}
+        pending = {}
+        for format_name in format_names:
+            cache_key = None
+            if self.render_cache is not None:
+                cache_key = self.render_cache.compute_key(
+                    format_name,
+                    os.path.basename(output_file_paths[format_name]),
+                    [temp_file_path],
+                    self.dependencies
+                    + self.render_cache.referenced_files(
+                        self.file_strings[format_name], self.working_directory
+                    ),
+                    self.toolchain_version(),
+                )
+                restored_path = self.render_cache.restore(
+                    cache_key, self.working_directory
+                )
+                if restored_path is not None:
+                    restored_path = os.path.normpath(restored_path)
+                    self.logger.info(
+                        f"Restored {format_name} output from render-cache to: '{restored_path}'."
+                    )
+                    results[format_name] = RenderResult(
+                        format_name, "restored", output_path=restored_path
+                    )
+                    continue
+            pending[format_name] = cache_key
+        if not pending:
+            return results
+        render_directory = self.render_directory(self.group_name)
+        self.logger.info(f"Setting Quarto's working-directory to '{render_directory}'")
+        if self.execution_cache is not None:
+            self.execution_cache.prepare(
+                self.group_name, render_directory, temp_file_path
+            )
+        suffixes = [self.file_suffixes[format_name] for format_name in pending]
+        group_result = self.executor.run(
+            self.executor.execute(
+                self.group_name,
+                self.backend.group_commands(temp_file_path, suffixes),
+                cwd=render_directory,
+                timeout=max(
+                    (self.executor.timeout_for(suffix) for suffix in suffixes),
+                    key=lambda timeout: float("inf") if timeout is None else timeout,
+                ),
+            )
+        )
+        if not group_result.ok:
+            self.logger.error(
+                f"Failed to render {", ".join(pending)} output ({group_result.status}, exit code {group_result.exit_code})."
+                + (f" See '{group_result.log_path}'." if group_result.log_path else "")
+            )
+        else:
+            self.timing_history.record(
                 "render",
-                self.output_paths[format_name],
-                "--to",
-                self.file_suffixes[format_name],
-                "--metadata-file",
-                self.yaml_file_paths[format_name],
-                "--output",
-                os.path.basename(self.output_filenames[format_name]),
-            ]
-            subprocess.run(command, check=True, cwd=self.working_directory)
-            abs_output_path = os.path.normpath(
-                os.path.join(
-                    self.working_directory,
-                    os.path.basename(self.output_filenames[format_name]),
+                group_result.duration,
+                name="+".join(pending),
+                toolchain=self.toolchain_version(),
+            )
+            if self.execution_cache is not None:
+                self.execution_cache.persist(
+                    self.group_name, render_directory, temp_file_path
                 )
+        for format_name, cache_key in pending.items():
+            result = RenderResult(
+                format_name,
+                group_result.status,
+                exit_code=group_result.exit_code,
+                duration=group_result.duration,
+                warnings=group_result.warnings,
+                log_path=group_result.log_path,
             )
+            results[format_name] = result
+            if not group_result.ok:
+                continue
+            output_name = os.path.basename(output_file_paths[format_name])
+            abs_output_path = os.path.normpath(
+                os.path.join(self.working_directory, output_name)
+            )
+            if self.isolate_formats:
+                abs_output_path = self.publish_outputs(
+                    self.group_name, output_name, temp_file_path
+                )
+            if not os.path.exists(abs_output_path):
+                self.logger.error(f"Quarto did not render {format_name} output.")
+                result.status = "failed"
+                continue
             self.logger.info(f"Rendered {format_name} output to: '{abs_output_path}'.")
-            self.rendered_output_paths[format_name] = abs_output_path
-        except subprocess.CalledProcessError as e:
-            self.logger.error(f"Failed to render {format_name} output. Error: {e}")
+            result.output_path = abs_output_path
+            if cache_key is not None:
+                self.render_cache.store(
+                    cache_key,
+                    format_name,
+                    abs_output_path,
+                    support_paths=[os.path.splitext(abs_output_path)[0] + "_files"],
+                )
+        return results
@@ -3,7 +3,6 @@ import logging
 import subprocess
 import re as re
 import sys
-from obsidianknittrpy.modules.obsidian_html import ObsidianHTML
 
 
 def pre_configure_obsidianhtml_fork(CH, EH, args):
@@ -14,10 +13,11 @@ def pre_configure_obsidianhtml_fork(CH, EH, args):
     Finally, if neither of the first two occur, the relevant configuration keys are unset. This ensures that the user cannot provide
     """
     ## handle custom OHTML fork
-    if ("obsidian-html" in EH.list(return_type="set")) or (
+    set_tools = EH.list(return_type="set")
+    if ("obsidian-html" in set_tools) or (
         "OHTML.UseCustomFork" in args and args["OHTML.UseCustomFork"]
     ):
-        if "obsidian-html" in EH.list(return_type="set"):
+        if "obsidian-html" in set_tools:
             # 1. provided by external handler.
             # introduce the own OHTML-fork directory if set.
             try:
@@ -58,6 +58,20 @@ def pre_configure_obsidianhtml_fork(CH, EH, args):
     return CH
 
 
+def collect_rendering_overrides(args):
+    """Translate the rendering-flags of the commandline into settings-overrides for `CH.set_overrides()`."""
+    rendering = {}
+    if args.get("no_render_cache"):
+        rendering["use_cache"] = False
+    if args.get("max_concurrency") is not None:
+        rendering["max_concurrency"] = args["max_concurrency"]
+    if args.get("fail_fast"):
+        rendering["fail_fast"] = True
+    if args.get("render_backend") is not None:
+        rendering["backend"] = args["render_backend"]
+    return {"RENDERING": rendering} if rendering else {}
+
+
 def convert_format_args(args):
     """Execute the convert command."""
 
@@ -66,8 +80,9 @@ def convert_format_args(args):
 
     # Handle pass-through arguments
     try:
-        if args.pass_through:
-            for item in args.pass_through:
+        pass_through = getattr(args, "pass_through", None)  # not all commands take any
+        if pass_through:
+            for item in pass_through:
                 if "::" in item and "=" in item:
                     key, value = item.split("=", 1)
                     arguments[key.strip()] = value.strip()
@@ -158,6 +173,8 @@ def get_util_version(type=str, work_dir=""):
     elif type == "pandoc":
         command = ["pandoc", "-v"]
     elif type == "ohtml":
+        from obsidianknittrpy.modules.obsidian_html import ObsidianHTML
+
         obsidian_html = ObsidianHTML(
             manuscript_path=CH.get_key("MANUSCRIPT", "manuscript_path"),
             config_path=CH.default_obsidianhtmlconfiguration_location,
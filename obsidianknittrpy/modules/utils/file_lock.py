@@ -0,0 +1,41 @@
+import os
+import time
+from contextlib import contextmanager
+
+
+@contextmanager
+def file_lock(path):
+    """
+    Hold an exclusive lock on `path` for the duration of the `with`-block, across processes.
+
+    The lock-file is created if it does not exist, and is left in place afterwards: removing it
+    would let a waiting process lock a file which a newly started process then re-creates.
+    Locks are advisory, so they only exclude other users of `file_lock()`.
+
+    :param path: Path of the lock-file, e.g. `<file>.lock` next to the file it guards.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.05)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1,184 @@
+import os
+import sys
+import uuid
+import errno
+import shutil
+import logging
+
+FICLONE = 0x40049409  # linux ioctl cloning a file copy-on-write (btrfs, xfs, ...)
+
+
+def link_file(source, target, allow_symlink=True):
+    """
+    Make `source` available at `target` without copying its contents, if possible.
+
+    Tries a hardlink first, then (if `allow_symlink`) a symlink, and finally falls back to copying.
+
+    :param source: Existing file.
+    :param target: Path to create. Must not exist yet.
+    :param allow_symlink: Set to `False` if consumers resolve symlinks (e.g. via `Path.resolve()`),
+                          and would therefore escape the tree `target` is placed in.
+    :return: The method used, one of `"hardlink"`, `"symlink"` or `"copy"`.
+    """
+    try:
+        os.link(source, target)
+        return "hardlink"
+    except OSError:
+        pass
+    if allow_symlink:
+        try:
+            os.symlink(source, target)
+            return "symlink"
+        except OSError:
+            pass
+    shutil.copy2(source, target)
+    return "copy"
+
+
+def reflink_file(source, target):
+    """
+    Clone `source` to `target` copy-on-write, where the filesystem supports it.
+
+    :return: `True` if `target` was created, `False` if cloning is not supported (nothing is left behind).
+    """
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        with open(source, "rb") as s, open(target, "wb") as t:
+            fcntl.ioctl(t.fileno(), FICLONE, s.fileno())
+    except OSError:
+        if os.path.exists(target):
+            os.remove(target)
+        return False
+    shutil.copystat(source, target)
+    return True
+
+
+def build_link_tree(source_dir, target_dir, skip_names=(), no_symlink=()):
+    """
+    Mirror the directory-tree below `source_dir` into `target_dir`.
+
+    Directories are created as real directories, so that paths inside `target_dir` stay inside it
+    even when they are resolved. Files are linked via `link_file()`.
+
+    :param source_dir: Directory to mirror.
+    :param target_dir: Directory to create the mirror in.
+    :param skip_names: File- or directory-names which are not mirrored at all.
+    :param no_symlink: Source-files which must never be mirrored as a symlink.
+    :return: A dict counting the files mirrored per method.
+    """
+    no_symlink = {os.path.normcase(os.path.abspath(path)) for path in no_symlink}
+    counts = {"hardlink": 0, "symlink": 0, "copy": 0}
+    for root, directories, files in os.walk(source_dir):
+        directories[:] = [d for d in directories if d not in skip_names]
+        relative = os.path.relpath(root, source_dir)
+        target_root = os.path.normpath(os.path.join(target_dir, relative))
+        os.makedirs(target_root, exist_ok=True)
+        for file in files:
+            if file in skip_names:
+                continue
+            source = os.path.join(root, file)
+            allow_symlink = (
+                os.path.normcase(os.path.abspath(source)) not in no_symlink
+            )
+            try:
+                method = link_file(
+                    source, os.path.join(target_root, file), allow_symlink
+                )
+            except OSError as e:
+                logging.warning(f"Could not mirror '{source}': {e}")
+                continue
+            counts[method] += 1
+    return counts
+
+
+def link_directory(source, target):
+    """
+    Make the directory `source` available at `target`.
+
+    Tries a directory-symlink, then (on windows) a junction, and finally mirrors the tree via `build_link_tree()`.
+
+    :return: The method used, one of `"symlink"`, `"junction"` or `"tree"`.
+    """
+    try:
+        os.symlink(source, target, target_is_directory=True)
+        return "symlink"
+    except OSError:
+        pass
+    if sys.platform == "win32":
+        try:
+            import _winapi
+
+            _winapi.CreateJunction(source, target)
+            return "junction"
+        except (ImportError, OSError):
+            pass
+    build_link_tree(source, target)
+    return "tree"
+
+
+def link_directory_entries(source_dir, target_dir, exclude=None):
+    """
+    Make every entry of `source_dir` available in `target_dir`, without copying file-contents where possible.
+
+    Files are linked via `link_file()`, directories via `link_directory()`.
+
+    :param exclude: Optional callable `exclude(entry)` receiving an `os.DirEntry`; excluded entries are skipped.
+    :return: The number of linked entries.
+    """
+    os.makedirs(target_dir, exist_ok=True)
+    linked = 0
+    for entry in os.scandir(source_dir):
+        if exclude is not None and exclude(entry):
+            continue
+        target = os.path.join(target_dir, entry.name)
+        if os.path.lexists(target):
+            continue
+        try:
+            if entry.is_dir():
+                link_directory(entry.path, target)
+            else:
+                link_file(entry.path, target)
+        except OSError as e:
+            logging.warning(f"Could not link '{entry.path}': {e}")
+            continue
+        linked += 1
+    return linked
+
+
+def _swap_into_place(source, target):
+    """Rename `source` to `target`, replacing an existing file or directory at `target`."""
+    if os.path.isdir(target) and not os.path.islink(target):
+        previous = f"{target}.previous-{uuid.uuid4().hex[:8]}"
+        os.replace(target, previous)
+        os.replace(source, target)
+        shutil.rmtree(previous, ignore_errors=True)
+    else:
+        os.replace(source, target)
+
+
+def move_into_place(source, target):
+    """
+    Move the file or directory `source` to `target`, replacing what is there.
+
+    Readers of `target` either see the previous or the complete new version: `source` is
+    renamed into place directly, or, across filesystems, copied next to `target` first.
+    """
+    try:
+        _swap_into_place(source, target)
+        return
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+    staging = f"{target}.incoming-{uuid.uuid4().hex[:8]}"
+    if os.path.isdir(source):
+        shutil.copytree(source, staging)
+    else:
+        shutil.copy2(source, staging)
+    _swap_into_place(staging, target)
+    if os.path.isdir(source):
+        shutil.rmtree(source, ignore_errors=True)
+    else:
+        os.remove(source)
@@ -0,0 +1,172 @@
+import os
+import sys
+import queue
+import signal
+import subprocess
+import threading
+import time
+
+
+def process_group_kwargs():
+    """
+    Keyword-arguments for `subprocess.Popen` (and `asyncio.create_subprocess_exec`) which start
+    the child in its own process-group.
+    """
+    if sys.platform == "win32":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+def kill_process_tree(pid, force=False):
+    """
+    Signal the process-tree of `pid`, which must have been started with `process_group_kwargs()`.
+
+    On windows, `taskkill /T` is used to take down the whole tree. On other systems, the
+    process-group led by `pid` is sent SIGTERM, or SIGKILL if `force` is set. This still
+    reaches the children if `pid` itself has already exited.
+
+    :return: `False` if the process-tree could not be signalled.
+    """
+    if sys.platform == "win32":
+        result = subprocess.run(
+            ["taskkill", "/F", "/T", "/PID", str(pid)],
+            capture_output=True,
+        )
+        return result.returncode == 0
+    try:
+        os.killpg(pid, signal.SIGKILL if force else signal.SIGTERM)
+    except (ProcessLookupError, PermissionError):
+        return False
+    return True
+
+
+def terminate_process_tree(process, grace_period=5):
+    """
+    Terminate a process started via `run_streaming()` together with all of its children.
+
+    On windows, `taskkill /T` is used to take down the whole tree. On other systems, the
+    process-group created by `start_new_session` is signalled instead, even if `process`
+    itself has already exited: its children may still be running and hold its output-pipes
+    open. Processes which do not exit within `grace_period` seconds are killed.
+    """
+    if sys.platform == "win32":
+        if process.poll() is not None:
+            return
+        kill_process_tree(process.pid)
+        try:
+            process.wait(timeout=grace_period)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        return
+    if not kill_process_tree(process.pid) and process.poll() is None:
+        process.terminate()
+    deadline = time.monotonic() + grace_period
+    try:
+        process.wait(timeout=grace_period)
+    except subprocess.TimeoutExpired:
+        pass
+    while _process_group_alive(process.pid) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    kill_process_tree(process.pid, force=True)
+    if process.poll() is None:
+        process.kill()
+        process.wait()
+
+
+def _process_group_alive(pgid):
+    try:
+        os.killpg(pgid, 0)
+    except (ProcessLookupError, PermissionError):
+        return False
+    return True
+
+
+def _pump(stream, stream_name, line_queue):
+    """Read `stream` line by line and push each line onto `line_queue`."""
+    try:
+        for line in iter(stream.readline, ""):
+            line_queue.put((stream_name, line))
+    finally:
+        stream.close()
+        line_queue.put((stream_name, None))
+
+
+def run_streaming(
+    command, cwd=None, env=None, timeout=None, on_line=None, encoding="utf-8"
+):
+    """
+    Run `command` and stream its stdout and stderr line by line while it executes.
+
+    :param command: The command to execute, as a list.
+    :param cwd: Working directory of the child process.
+    :param env: Environment of the child process.
+    :param timeout: Seconds after which the process-tree is terminated. `None` disables the timeout.
+    :param on_line: Optional callable `on_line(stream_name, line)`, invoked for every line as it arrives.
+                    `stream_name` is either `"stdout"` or `"stderr"`.
+    :param encoding: Encoding used to decode the child's output.
+    :return: A `subprocess.CompletedProcess` with the full captured stdout and stderr.
+    :raises subprocess.TimeoutExpired: if the process did not finish within `timeout` seconds.
+    """
+    process = subprocess.Popen(
+        command,
+        cwd=cwd,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        encoding=encoding,
+        errors="replace",
+        bufsize=1,
+        **process_group_kwargs(),
+    )
+    line_queue = queue.Queue()
+    readers = [
+        threading.Thread(
+            target=_pump, args=(process.stdout, "stdout", line_queue), daemon=True
+        ),
+        threading.Thread(
+            target=_pump, args=(process.stderr, "stderr", line_queue), daemon=True
+        ),
+    ]
+    for reader in readers:
+        reader.start()
+
+    captured = {"stdout": [], "stderr": []}
+    open_streams = 2
+    deadline = None if timeout is None else time.monotonic() + timeout
+    try:
+        while open_streams > 0:
+            wait = None if deadline is None else max(0, deadline - time.monotonic())
+            try:
+                stream_name, line = line_queue.get(timeout=wait)
+            except queue.Empty:
+                terminate_process_tree(process)
+                raise subprocess.TimeoutExpired(
+                    command,
+                    timeout,
+                    output="".join(captured["stdout"]),
+                    stderr="".join(captured["stderr"]),
+                )
+            if line is None:
+                open_streams -= 1
+                continue
+            captured[stream_name].append(line)
+            if on_line is not None:
+                on_line(stream_name, line.rstrip("\r\n"))
+        wait = None if deadline is None else max(0, deadline - time.monotonic())
+        try:
+            process.wait(timeout=wait)
+        except subprocess.TimeoutExpired:
+            terminate_process_tree(process)
+            raise
+    except BaseException:
+        # includes KeyboardInterrupt: never leave an orphaned process-tree behind.
+        terminate_process_tree(process)
+        raise
+    return subprocess.CompletedProcess(
+        command,
+        process.returncode,
+        stdout="".join(captured["stdout"]),
+        stderr="".join(captured["stderr"]),
+    )
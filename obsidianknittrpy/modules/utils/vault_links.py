@@ -0,0 +1,85 @@
+import os
+import re
+import urllib.parse
+
+WIKILINK_PATTERN = re.compile(r"\[\[([^\]\|#\^]*)(?:[#\^][^\]\|]*)?(?:\|[^\]]*)?\]\]")
+MDLINK_PATTERN = re.compile(r"\]\(\s*<?([^)>\s]+)>?(?:\s+\"[^\"]*\")?\s*\)")
+
+
+def index_vault(vault_root, skip_names=()):
+    """
+    Index all files of a vault.
+
+    :param vault_root: Root-directory of the vault.
+    :param skip_names: File- or directory-names which are not indexed.
+    :return: A tuple `(by_name, files)`. `by_name` maps lower-cased file-names (with and, for notes,
+             without their `.md`-suffix) to lists of absolute paths. `files` lists all indexed files.
+    """
+    by_name = {}
+    files = []
+    for root, directories, filenames in os.walk(vault_root):
+        directories[:] = [d for d in directories if d not in skip_names]
+        for filename in filenames:
+            if filename in skip_names:
+                continue
+            path = os.path.join(root, filename)
+            files.append(path)
+            name = filename.lower()
+            by_name.setdefault(name, []).append(path)
+            if name.endswith(".md"):
+                by_name.setdefault(name[:-3], []).append(path)
+    return by_name, files
+
+
+def extract_link_targets(text):
+    """Return the raw targets of all wiki- and markdown-links (including embeds) in `text`."""
+    targets = [match.strip() for match in WIKILINK_PATTERN.findall(text)]
+    for match in MDLINK_PATTERN.findall(text):
+        target = urllib.parse.unquote(match.split("#")[0])
+        if target and "://" not in target and not target.startswith("mailto:"):
+            targets.append(target)
+    return [target for target in targets if target]
+
+
+def resolve_link_target(target, note_path, vault_root, by_name):
+    """
+    Resolve a link-target the way Obsidian does: paths relative to the note or vault-root
+    first, then by file-name anywhere in the vault.
+
+    Ambiguous names resolve to all candidates, so that no linked file is missed.
+    """
+    target = target.replace("\\", "/")
+    if "/" in target:
+        for base in [os.path.dirname(note_path), vault_root]:
+            candidate = os.path.normpath(os.path.join(base, target.lstrip("/")))
+            for path in [candidate, candidate + ".md"]:
+                if os.path.isfile(path):
+                    return [path]
+    name = os.path.basename(target).lower()
+    return by_name.get(name) or by_name.get(name + ".md") or []
+
+
+def link_closure(manuscript_path, vault_root, by_name, encoding="utf-8"):
+    """
+    Collect all notes and attachments reachable from `manuscript_path` by following links recursively.
+
+    :return: A set of absolute paths, including `manuscript_path` itself.
+    """
+    manuscript_path = os.path.abspath(manuscript_path)
+    reachable = {manuscript_path}
+    pending = [manuscript_path]
+    while pending:
+        note_path = pending.pop()
+        try:
+            with open(note_path, "r", encoding=encoding, errors="replace") as f:
+                text = f.read()
+        except OSError:
+            continue
+        for target in extract_link_targets(text):
+            for path in resolve_link_target(target, note_path, vault_root, by_name):
+                if path in reachable:
+                    continue
+                reachable.add(path)
+                if path.lower().endswith(".md"):
+                    pending.append(path)
+    return reachable
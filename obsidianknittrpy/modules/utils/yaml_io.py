@@ -0,0 +1,115 @@
+import os
+import copy
+import stat
+import tempfile
+import threading
+from collections import OrderedDict
+import yaml
+
+# libyaml's C-implementation parses and emits YAML about an order of magnitude faster than the
+# pure-Python one. It is optional in PyYAML, so fall back if it was not compiled in.
+try:
+    from yaml import CSafeLoader as SafeLoader
+    from yaml import CSafeDumper as SafeDumper
+    from yaml import CDumper as Dumper
+except ImportError:  # pragma: no cover
+    from yaml import SafeLoader, SafeDumper, Dumper
+
+HAS_LIBYAML = SafeLoader is not yaml.SafeLoader
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_cache_size = 64
+
+# Mode of newly created files, as `open()` would create them. Read once: `os.umask()` can only
+# be queried by setting it, which would affect files created concurrently by other threads.
+_umask = os.umask(0)
+os.umask(_umask)
+_default_mode = 0o666 & ~_umask
+
+
+def safe_load(stream):
+    """Drop-in for `yaml.safe_load`."""
+    return yaml.load(stream, Loader=SafeLoader)
+
+
+def safe_dump(data, stream=None, **kwargs):
+    """Drop-in for `yaml.safe_dump`."""
+    return yaml.dump(data, stream, Dumper=SafeDumper, **kwargs)
+
+
+def dump(data, stream=None, **kwargs):
+    """Drop-in for `yaml.dump`, which (unlike `safe_dump`) can represent arbitrary python-objects."""
+    return yaml.dump(data, stream, Dumper=Dumper, **kwargs)
+
+
+def load_file(path, encoding="utf-8"):
+    """
+    Parse the YAML-file at `path`.
+
+    Parsed files are memoised by path, modification-time and size, so reading an unchanged
+    file again only costs a `stat`. A copy of the memoised data is returned, so callers may
+    modify it.
+
+    :raises OSError: If the file cannot be read, like `open()`.
+    :raises yaml.YAMLError: If the file is not valid YAML.
+    """
+    key = os.path.normcase(os.path.abspath(path))
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None and cached[0] == signature:
+            _cache.move_to_end(key)
+            return copy.deepcopy(cached[1])
+    with open(path, "r", encoding=encoding) as f:
+        data = safe_load(f)
+    with _cache_lock:
+        _cache[key] = (signature, data)
+        _cache.move_to_end(key)
+        while len(_cache) > _cache_size:
+            _cache.popitem(last=False)
+    return copy.deepcopy(data)
+
+
+def write_file(path, data, safe=True, encoding="utf-8", **kwargs):
+    """
+    Write `data` to the YAML-file at `path` atomically.
+
+    The data is written to a temporary file next to `path`, which then replaces it, so readers
+    (and concurrent runs) never see a partially written file. The file keeps the mode of the
+    file it replaces; new files get the umask's default mode instead of the temporary file's 0600.
+
+    :param safe: Set to `False` to use `dump()` instead of `safe_dump()`.
+    :param kwargs: Passed on to the dumper, e.g. `allow_unicode` or `default_flow_style`.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(
+        dir=directory, prefix="." + os.path.basename(path) + ".", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "w", encoding=encoding) as f:
+            (safe_dump if safe else dump)(data, f, **kwargs)
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except OSError:
+            mode = _default_mode
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    invalidate(path)
+
+
+def invalidate(path=None):
+    """Drop `path` (or every file, if `None`) from the memoised files."""
+    with _cache_lock:
+        if path is None:
+            _cache.clear()
+        else:
+            _cache.pop(os.path.normcase(os.path.abspath(path)), None)
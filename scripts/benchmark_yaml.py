@@ -0,0 +1,102 @@
+"""
+Compare PyYAML's pure-Python implementation against `obsidianknittrpy.modules.utils.yaml_io`.
+
+Times parsing and dumping a large frontmatter and the default configuration, as well as
+reading a large configuration-file repeatedly (which `yaml_io.load_file` memoises).
+
+Usage: python scripts/benchmark_yaml.py [--repeat N]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import yaml
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from obsidianknittrpy.modules.utils import yaml_io
+from obsidianknittrpy.modules.core.ConfigurationHandler import ConfigurationHandler
+
+
+def large_frontmatter(entries=400):
+    """Frontmatter of a long manuscript: many authors, references, and per-format options."""
+    return {
+        "title": "A manuscript with a large frontmatter",
+        "author": [
+            {"name": f"Author {i}", "affiliation": f"Institute {i % 17}"}
+            for i in range(entries // 4)
+        ],
+        "bibliography": [f"references/part-{i}.bib" for i in range(entries // 8)],
+        "params": {f"parameter_{i}": i * 0.5 for i in range(entries)},
+        "format": {
+            suffix: {f"option-{i}": f"value {i}" for i in range(entries // 4)}
+            for suffix in ["html", "pdf", "docx"]
+        },
+    }
+
+
+def timed(function, repeat):
+    start_time = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start_time) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    frontmatter = large_frontmatter()
+    frontmatter_str = yaml.dump(frontmatter, default_flow_style=False)
+    CH = ConfigurationHandler(loglevel="WARNING")
+    CH.apply_defaults()
+    config = {"pipeline": CH.applied_pipeline, "frontmatter": frontmatter}
+    config_str = yaml_io.safe_dump(config, allow_unicode=True)
+    fd, config_path = tempfile.mkstemp(suffix=".yml")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(config_str)
+
+    def read_pure():
+        with open(config_path, "r", encoding="utf-8") as f:
+            return yaml.safe_load(f)
+
+    cases = [
+        (
+            f"parse frontmatter ({len(frontmatter_str) // 1024} KiB)",
+            lambda: yaml.safe_load(frontmatter_str),
+            lambda: yaml_io.safe_load(frontmatter_str),
+        ),
+        (
+            "dump frontmatter",
+            lambda: yaml.dump(frontmatter, default_flow_style=False),
+            lambda: yaml_io.dump(frontmatter, default_flow_style=False),
+        ),
+        (
+            "dump configuration",
+            lambda: yaml.dump(CH.applied_settings, allow_unicode=True),
+            lambda: yaml_io.dump(CH.applied_settings, allow_unicode=True),
+        ),
+        (
+            f"read config-file ({len(config_str) // 1024} KiB)",
+            read_pure,
+            lambda: yaml_io.load_file(config_path),
+        ),
+    ]
+    try:
+        print(f"libyaml available: {yaml_io.HAS_LIBYAML}\n")
+        print(f"{'case':<32} {'PyYAML':>10} {'yaml_io':>10} {'speedup':>8}")
+        for name, pure, accelerated in cases:
+            pure_ms = timed(pure, args.repeat)
+            accelerated_ms = timed(accelerated, args.repeat)
+            print(
+                f"{name:<32} {pure_ms:8.2f}ms {accelerated_ms:8.2f}ms {pure_ms / accelerated_ms:7.1f}x"
+            )
+    finally:
+        os.remove(config_path)
+
+
+if __name__ == "__main__":
+    main()
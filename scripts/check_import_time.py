@@ -0,0 +1,95 @@
+"""
+Check that light commands start quickly.
+
+Runs `python -X importtime -m obsidianknittrpy <command>` for every command in `COMMANDS` and fails if
+the cumulative import-time of `obsidianknittrpy` exceeds the budget, or if one of the modules in
+`FORBIDDEN` was imported. These are only required by the commands converting or rendering a
+note, or showing a GUI, and must be imported by the handlers using them.
+
+Usage: python scripts/check_import_time.py [--budget MILLISECONDS] [--repeat N]
+"""
+
+import os
+import sys
+import argparse
+import subprocess
+
+COMMANDS = [
+    ["version"],
+    ["tools", "list"],
+    ["stats"],
+    ["open", "--help"],  # parsing the arguments of a converting command
+]
+
+FORBIDDEN = [
+    "tkinter",
+    "obsidianhtml",
+    "bs4",
+    "asyncio",
+    "obsidianknittrpy.modules.guis.guis",
+    "obsidianknittrpy.modules.obsidian_html.ObsidianHTML",
+    "obsidianknittrpy.modules.rendering.renderer_v2",
+]
+
+
+def measure(command):
+    """
+    Return the cumulative import-time of `obsidianknittrpy` in milliseconds, and the set of imported modules.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "obsidianknittrpy"] + command,
+        cwd=os.path.abspath(os.path.join(os.path.dirname(__file__), "..")),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    total = 0
+    modules = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line.split("|"))
+        if not cumulative.isdigit():
+            continue  # header
+        modules.add(name)
+        if name == "obsidianknittrpy":
+            total += int(cumulative)
+        elif name.startswith("obsidianknittrpy.") and "." not in name.split(".", 1)[1]:
+            total += int(cumulative)  # top-level submodules, e.g. obsidianknittrpy.main
+    return total / 1000, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget", type=float, default=100, help="Budget in milliseconds.")
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Measure every command this often and use the fastest run.",
+    )
+    args = parser.parse_args()
+    failed = False
+    for command in COMMANDS:
+        runs = [measure(command) for _ in range(max(1, args.repeat))]
+        duration = min(run[0] for run in runs)
+        forbidden = sorted(
+            module
+            for module in set().union(*(run[1] for run in runs))
+            if any(
+                module == name or module.startswith(name + ".") for name in FORBIDDEN
+            )
+        )
+        status = "ok"
+        if duration > args.budget:
+            status = "SLOW"
+            failed = True
+        if forbidden:
+            status = "FORBIDDEN IMPORTS: " + ", ".join(forbidden)
+            failed = True
+        print(f"{' '.join(command):<15} {duration:8.1f} ms   {status}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
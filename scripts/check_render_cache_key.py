@@ -0,0 +1,105 @@
+"""
+Check that the render-cache is hit across runs.
+
+Renders a note whose frontmatter declares a `bibliography` and a `csl`-file twice via the
+`fake`-backend, each time in a new run-workspace (as every conversion does), and fails unless
+the second run restores all formats from the render-cache. Dependency-paths written into the
+rendered document must therefore not depend on the location of the run-workspace.
+
+Usage: python scripts/check_render_cache_key.py
+"""
+
+import os
+import sys
+import json
+import tempfile
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from obsidianknittrpy.modules.core.ResourceLogger import ResourceLogger
+from obsidianknittrpy.modules.core.RunWorkspace import RunWorkspace
+from obsidianknittrpy.modules.rendering.RenderBackend import get_render_backend
+from obsidianknittrpy.modules.rendering.RenderCache import RenderCache
+from obsidianknittrpy.modules.rendering.renderer_v2 import RenderManager
+
+FILE_STRING = """---
+title: Render-cache check
+bibliography: refs/library.bib
+csl: refs/style.csl
+---
+A citation [@key].
+"""
+
+
+def create_vault(vault_directory):
+    """Create the note and its dependencies; return their paths."""
+    files = {
+        "Main.md": FILE_STRING,
+        os.path.join("refs", "library.bib"): "@book{key, title={Title}}\n",
+        os.path.join("refs", "style.csl"): "<style/>\n",
+    }
+    paths = []
+    for name, content in files.items():
+        path = os.path.join(vault_directory, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        paths.append(path)
+    return paths
+
+
+def render(root, vault_directory, vault_files):
+    """Render the note in a new run-workspace; return the status of every format."""
+    run_workspace = RunWorkspace(os.path.join(root, "runs"), loglevel="WARNING")
+    run_workspace.create()
+    working_directory = os.path.join(run_workspace.work_dir, "md")
+    os.makedirs(working_directory)
+    mod_directory = run_workspace.module_log_directory
+    os.makedirs(mod_directory)
+    with open(
+        os.path.normpath(os.path.join(mod_directory, "index\\files.json")), "w"
+    ) as f:
+        json.dump({path: {} for path in vault_files}, f)
+    with open(os.path.join(mod_directory, "paths.json"), "w") as f:
+        json.dump(
+            {
+                "obsidian_folder": vault_directory,
+                "obsidian_entrypoint": os.path.join(vault_directory, "Main.md"),
+            },
+            f,
+        )
+    render_manager = RenderManager(
+        file_strings={"quarto::html": FILE_STRING, "quarto::pdf": FILE_STRING},
+        file_suffixes={"quarto::html": "html", "quarto::pdf": "pdf"},
+        mod_directory=mod_directory,
+        output_directory=working_directory,
+        working_directory=working_directory,
+        log_level="WARNING",
+        parameters={"quarto::html": {"toc": True}, "quarto::pdf": {"toc": False}},
+        run_workspace=run_workspace,
+        isolate_formats=True,
+        render_cache=RenderCache(os.path.join(root, "cache"), loglevel="WARNING"),
+        backend=get_render_backend("fake", loglevel="WARNING", latency=0),
+    )
+    render_manager.execute()
+    return {name: result.status for name, result in render_manager.results.items()}
+
+
+def main():
+    with tempfile.TemporaryDirectory() as root:
+        vault_directory = os.path.join(root, "vault")
+        vault_files = create_vault(vault_directory)
+        first = render(root, vault_directory, vault_files)
+        second = render(root, vault_directory, vault_files)
+        ResourceLogger.flush()
+    failed = False
+    for name in sorted(second):
+        ok = second[name] == "restored"
+        failed = failed or not ok
+        verdict = "ok" if ok else "MISS"
+        print(f"{name.ljust(16)}  {first[name]:>9} -> {second[name]:<9}  {verdict}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())